@@ -1,16 +1,28 @@
+import os
 import pandas as pd
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 import re
 import math
 import json
 from datetime import datetime
 import numpy as np
-import joblib
 import requests
 from decouple import config
-from google.cloud import storage
 from fastapi import HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
+from app.artifact_store import artifact_store
+from app.bwcosechas import TablaBWCosechas, tabla_bwcosechas
+from app.calculation_graph import GrafoCalculo, Nodo
+from app.calculator_state import EstadoCalculadora, convertir_numero
+from app.feeding_batch import calcular_lote_alimentacion
+from app.gcs import separar_ruta_gcs
+from app.mmap_artifacts import (artefactos_mapeados, cargar_artefacto,
+                                firma_blob)
+from app.model_bundle import COMPONENTES_ALIMENTATION
+from app.model_bundle import extraer as extraer_bundle
+from app.model_registry import model_registry
+from app.reference_data import derivar, obtener_json_referencia
+from app.reference_index import FilasFinca, IndiceRendimiento, IndiceTerrain
 
 
 # Modelos de datos para FastAPI
@@ -47,6 +59,41 @@ class PredictionRequestAlimentation(BaseModel):
     DispositivoId: Optional[str] = None
 
 
+class PiscinaAlimentation(BaseModel):
+    """Datos de muestreo de una piscina para el cálculo por finca"""
+    Piscinas: int
+    Fechadesiembra: str
+    Fechademuestreo: str
+    Edaddelcultivo: int
+    Pesoanterior: float
+    Pesoactualgdia: float
+    Densidadbiologoindm2: float
+    AcumuladoactualLBS: float
+    numeroAA: int
+    Aireadores: int
+    Alimentoactualkg: float
+
+    # Solo se usa si la piscina no está en Terrain
+    Hectareas: Optional[float] = None
+    Pesosiembra: Optional[float] = None
+    Densidadatarraya: Optional[float] = None
+
+
+class PredictionRequestAlimentationFinca(BaseModel):
+    piscinas: List[PiscinaAlimentation]
+    VersionApp: Optional[str] = None
+    DispositivoId: Optional[str] = None
+
+
+# Bundle versionado por finca (manifiesto + checksums); vacío = solo
+# los cuatro blobs sueltos de abajo
+BUNDLE_ALIMENTATION_PATH = config(
+    'BUNDLE_ALIMENTATION_PATH',
+    default='gs://azaktilsa_fincas/bundles/alimentation_{finca}.tar')
+
+# Versión de los artefactos cargados por finca, para las respuestas
+_versiones_modelo: Dict[str, str] = {}
+
 # Rutas de los archivos (modelo y scaler por finca)
 modelos = {
     'CAMANOVILLO': {
@@ -89,52 +136,150 @@ modelos = {
 
 
 def descargar_modelo(bucket_name, source_blob_name, destination_file_name):
-    """Descarga un modelo desde Google Cloud Storage"""
-    # Crear el cliente de Google Cloud Storage
-    storage_client = storage.Client()
+    """Descarga un modelo desde Google Cloud Storage.
+
+    Si la copia local ya corresponde a la generación vigente del blob no
+    se vuelve a descargar.
+    """
+    artifact_store.sincronizar(
+        bucket_name, source_blob_name, destination_file_name)
 
-    # Referenciar el bucket
-    bucket = storage_client.bucket(bucket_name)
 
-    # Referenciar el blob (archivo dentro del bucket)
-    blob = bucket.blob(source_blob_name)
+def cargar_modelo_y_scaler(finca):
+    """Carga el modelo y scaler para una finca específica.
 
-    # Descargar el archivo al sistema local temporalmente
-    blob.download_to_filename(destination_file_name)
+    Los artefactos quedan residentes en `model_registry`.
+    Las solicitudes concurrentes de una finca en frío comparten una sola
+    descarga.
+    """
+    return model_registry.obtener(
+        f"alimentation:{finca}", lambda: _descargar_y_cargar_artefactos(finca))
 
 
-def cargar_modelo_y_scaler(finca):
-    """Carga el modelo y scaler para una finca específica"""
-    modelo_path = modelos[finca]['modelo']
-    scaler_path = modelos[finca]['scaler']
-    selector_path = modelos[finca]['selector']
-    yscalers_path = modelos[finca]['yscalers']
-
-    modelo_bucket_name, modelo_blob_name = modelo_path.replace(
-        "gs://", "").split("/", 1)
-    scaler_bucket_name, scaler_blob_name = scaler_path.replace(
-        "gs://", "").split("/", 1)
-    selector_bucket_name, selector_blob_name = selector_path.replace(
-        "gs://", "").split("/", 1)
-    yscalers_bucket_name, yscalers_blob_name = yscalers_path.replace(
-        "gs://", "").split("/", 1)
-
-    modelo_local = f"/tmp/{finca}_modelo.pkl"
-    scaler_local = f"/tmp/{finca}_scaler.pkl"
-    selector_local = f"/tmp/{finca}_selector.pkl"
-    yscalers_local = f"/tmp/{finca}_yscalers.pkl"
-
-    descargar_modelo(modelo_bucket_name, modelo_blob_name, modelo_local)
-    descargar_modelo(scaler_bucket_name, scaler_blob_name, scaler_local)
-    descargar_modelo(selector_bucket_name, selector_blob_name, selector_local)
-    descargar_modelo(yscalers_bucket_name, yscalers_blob_name, yscalers_local)
-
-    best_model = joblib.load(modelo_local)
-    scaler = joblib.load(scaler_local)
-    selector = joblib.load(selector_local)
-    yscalers = joblib.load(yscalers_local)
-
-    return best_model, scaler, selector, yscalers
+def version_modelo(finca: str) -> Optional[str]:
+    """Versión de los artefactos cargados para la finca (None si no hay)"""
+    return _versiones_modelo.get(finca)
+
+
+SUFIJO_MANIFIESTO = ".manifest.json"
+
+
+def _firma_componente(bundle: Dict[str, Any], manifiesto: Dict[str, Any],
+                      nombre: str) -> Dict[str, Any]:
+    """Firma de la copia mapeada de un componente del bundle"""
+    entrada = manifiesto["componentes"][nombre]
+    return {"bundle": bundle, "version": manifiesto["version"],
+            "componente": nombre, "sha256": entrada["sha256"],
+            "tamano": entrada["tamano"]}
+
+
+def _manifiesto_vigente(ruta: str, bundle: Dict[str, Any]):
+    """Manifiesto y rutas guardados si las copias siguen siendo de `bundle`"""
+    try:
+        with open(ruta) as f:
+            guardado = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if guardado.get("bundle") != bundle:
+        return None
+    manifiesto, rutas = guardado["manifiesto"], guardado["rutas"]
+    if not all(artefactos_mapeados.vigente(
+            rutas[nombre], _firma_componente(bundle, manifiesto, nombre))
+            for nombre in COMPONENTES_ALIMENTATION):
+        return None
+    return manifiesto, rutas
+
+
+def _guardar_manifiesto(ruta: str, bundle: Dict[str, Any],
+                        manifiesto: Dict[str, Any], rutas: Dict[str, str]):
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, 'w') as f:
+        json.dump({"bundle": bundle, "manifiesto": manifiesto,
+                   "rutas": rutas}, f)
+    os.replace(temporal, ruta)
+
+
+def _cargar_bundle(finca):
+    """Carga los componentes desde el bundle versionado de la finca.
+
+    Cada componente se mapea con la firma de su entrada en el manifiesto
+    (sha256, tamaño y versión) y la del blob del bundle. Si las copias
+    mapeadas corresponden a la generación vigente del bundle no se
+    descarga nada; si no, se descarga y extrae, y una vez convertidos
+    se borran el tar y los .pkl extraídos (ARTEFACTOS_MMAP_ELIMINAR_ORIGEN).
+
+    Returns:
+        tuple: (artefactos, rutas locales, versión)
+
+    Raises:
+        FileNotFoundError: si la finca aún no tiene bundle publicado
+    """
+    if not BUNDLE_ALIMENTATION_PATH:
+        raise FileNotFoundError("BUNDLE_ALIMENTATION_PATH vacío")
+    bundle_bucket_name, bundle_blob_name = separar_ruta_gcs(
+        BUNDLE_ALIMENTATION_PATH.format(finca=finca))
+    bundle_local = f"/tmp/{finca}_alimentation.tar"
+    bundle = firma_blob(artifact_store.meta_remota(
+        bundle_bucket_name, bundle_blob_name))
+    ruta_manifiesto = artefactos_mapeados.ruta_copia(
+        bundle_local, SUFIJO_MANIFIESTO)
+    mapeado = artefactos_mapeados.activo
+
+    vigente = _manifiesto_vigente(ruta_manifiesto, bundle) if mapeado \
+        else None
+    if vigente is not None:
+        manifiesto, rutas = vigente
+    else:
+        descargar_modelo(bundle_bucket_name, bundle_blob_name, bundle_local)
+        manifiesto, rutas = extraer_bundle(
+            bundle_local, f"/tmp/{finca}_alimentation",
+            requeridos=COMPONENTES_ALIMENTATION)
+
+    artefactos = [
+        cargar_artefacto(rutas[nombre],
+                         _firma_componente(bundle, manifiesto, nombre))
+        for nombre in COMPONENTES_ALIMENTATION]
+
+    if mapeado and vigente is None:
+        _guardar_manifiesto(ruta_manifiesto, bundle, manifiesto, rutas)
+        if artefactos_mapeados.eliminar_origen:
+            artifact_store.eliminar(bundle_local)
+    return artefactos, rutas, manifiesto["version"]
+
+
+def _cargar_componentes(finca):
+    """Carga los cuatro blobs sueltos de la finca (formato anterior)"""
+    artefactos, rutas, firmas = [], {}, {}
+    for nombre in COMPONENTES_ALIMENTATION:
+        bucket_name, blob_name = separar_ruta_gcs(modelos[finca][nombre])
+        # Ni /tmp/{finca}_modelo.pkl (animal) ni los extraídos del bundle
+        rutas[nombre] = f"/tmp/{finca}_alimentation_blob_{nombre}.pkl"
+        valor, firmas[nombre] = artefactos_mapeados.sincronizar_y_cargar(
+            bucket_name, blob_name, rutas[nombre])
+        artefactos.append(valor)
+
+    # Sin manifiesto, la generación del blob del modelo identifica la versión
+    return artefactos, rutas, f"blobs-{firmas['modelo']['generation']}"
+
+
+def _descargar_y_cargar_artefactos(finca):
+    """Descarga y deserializa los cuatro artefactos de la finca.
+
+    Se usa el bundle versionado si está publicado; si no, los cuatro
+    blobs sueltos de las variables *_ALIMENTATION_PATH_*.
+    """
+    try:
+        artefactos, rutas, version = _cargar_bundle(finca)
+    except FileNotFoundError:
+        artefactos, rutas, version = _cargar_componentes(finca)
+
+    _versiones_modelo[finca] = version
+    print(f"📦 Modelo de alimentación de {finca}: versión {version}")
+
+    # El tamaño en disco sirve como estimación de la memoria ocupada
+    tamano = sum(artefactos_mapeados.tamano(ruta) for ruta in rutas.values())
+
+    return tuple(artefactos), tamano
 
 
 def procesar_prediccion_alimentation(request: PredictionRequestAlimentation):
@@ -250,6 +395,7 @@ def procesar_prediccion_alimentation(request: PredictionRequestAlimentation):
             "metadatos": {
                 "version_app": datos_adicionales.get('VersionApp'),
                 "dispositivo_id": datos_adicionales.get('DispositivoId'),
+                "version_modelo": version_modelo(request.finca),
                 "timestamp": datetime.now().isoformat(),
                 "campos_calculados": calculator.get_campos_calculados(),
                 "validaciones": calculator.get_validaciones()
@@ -266,6 +412,7 @@ def procesar_prediccion_alimentation(request: PredictionRequestAlimentation):
                 "principales": input_data if 'input_data' in locals() else None,
                 "adicionales": datos_adicionales if 'datos_adicionales' in locals() else None
             },
+            "version_modelo": version_modelo(request.finca),
             "status": "error"
         }
         analysis = analyzer.analyze_results(resultados)
@@ -287,6 +434,135 @@ def procesar_prediccion_alimentation(request: PredictionRequestAlimentation):
         }
 
 
+_COLUMNAS_PISCINA = (
+    'Piscinas', 'Fechadesiembra', 'Fechademuestreo', 'Edaddelcultivo',
+    'Pesoanterior', 'Pesoactualgdia', 'Densidadbiologoindm2',
+    'AcumuladoactualLBS', 'numeroAA', 'Aireadores', 'Alimentoactualkg',
+    'Hectareas', 'Pesosiembra', 'Densidadatarraya',
+)
+
+# Columnas que se suman en los totales de la finca
+CAMPOS_TOTALES_FINCA = (
+    'hectareas', 'alimento_actual_kg', 'acumulado_actual_lbs',
+    'lunes_dia1', 'martes_dia2', 'miercoles_dia3', 'jueves_dia4',
+    'viernes_dia5', 'sabado_dia6', 'domingo_dia7',
+    'recomendation_semana', 'acumulado_semanal',
+    'libras_totales_campo', 'libras_totales_consumo',
+)
+
+
+def _hectareas_terrain(fila: Optional[Dict[str, Any]]) -> Optional[float]:
+    """Hectareas de la fila de Terrain, o None si falta o no es válida"""
+    if fila is None:
+        return None
+    try:
+        hectareas = convertir_numero(fila.get('Hectareas', ''))
+    except (ValueError, TypeError):
+        return None
+    return hectareas if hectareas > 0 else None
+
+
+def procesar_alimentacion_finca(finca: str,
+                                request: PredictionRequestAlimentationFinca):
+    """Recomendación semanal para todas las piscinas enviadas de una finca.
+
+    Las hectáreas de cada piscina salen de Terrain (índice por finca); si
+    la piscina no está en Terrain, o su Hectareas está vacío o no es un
+    número positivo, se usa `Hectareas` del request. Todas
+    las piscinas se calculan en una sola pasada vectorizada
+    (`calcular_lote_alimentacion`) con los mismos resultados que
+    /alimentation piscina por piscina.
+    """
+    filas_terrain = obtener_indice_terrain().finca(finca)
+    tabla = tabla_bwcosechas(cargar_pesos_alimento())
+
+    piscinas: List[Dict[str, Any]] = [None] * len(request.piscinas)
+    validas: List[int] = []
+    columnas: Dict[str, list] = {}
+    for i, piscina in enumerate(request.piscinas):
+        datos = {columna: getattr(piscina, columna)
+                 for columna in _COLUMNAS_PISCINA}
+        fila_terrain = filas_terrain.por_piscina.get(str(piscina.Piscinas))
+        hectareas = _hectareas_terrain(fila_terrain)
+        if hectareas is not None:
+            datos['Hectareas'] = hectareas
+            origen = "terrain"
+        elif piscina.Hectareas is not None:
+            origen = "request"
+        else:
+            motivo = ("no encontrada en Terrain" if fila_terrain is None
+                      else "sin Hectareas válidas en Terrain")
+            piscinas[i] = {
+                "piscina": piscina.Piscinas,
+                "error": f"Piscina {piscina.Piscinas} {motivo} para "
+                         f"{finca} y sin Hectareas",
+                "status": "error",
+            }
+            continue
+        piscinas[i] = {"piscina": piscina.Piscinas,
+                       "origen_hectareas": origen}
+        validas.append(i)
+        for clave, valor in datos.items():
+            columnas.setdefault(clave, []).append(valor)
+
+    totales = dict.fromkeys(CAMPOS_TOTALES_FINCA, 0.0)
+    calculadas = 0
+    if validas:
+        resultado = calcular_lote_alimentacion(columnas, tabla)
+        sumas = dict.fromkeys(CAMPOS_TOTALES_FINCA, 0.0)
+        for fila, i in enumerate(validas):
+            error = resultado.errores.get(fila)
+            if error is not None:
+                piscinas[i].update({"error": error, "status": "error"})
+                continue
+            piscinas[i].update({"resultados": resultado.fila(fila),
+                                "status": "success"})
+            calculadas += 1
+            for campo in CAMPOS_TOTALES_FINCA:
+                sumas[campo] += resultado.numero(campo, fila)
+        totales = {campo: round(valor, 2) for campo, valor in sumas.items()}
+
+    return {
+        "finca": finca,
+        "mensaje": f"Alimentación calculada para {calculadas} de "
+                   f"{len(piscinas)} piscinas",
+        "piscinas": piscinas,
+        "totales": totales,
+        "metadatos": {
+            "version_app": request.VersionApp,
+            "dispositivo_id": request.DispositivoId,
+            "version_modelo": version_modelo(finca),
+            "timestamp": datetime.now().isoformat(),
+            "piscinas_terrain": len(filas_terrain.opciones),
+        },
+        "status": "success" if calculadas == len(piscinas) else "partial",
+    }
+
+
+def procesar_lote_ndjson(lote: List[Tuple[int, Any]]) -> List[Dict[str, Any]]:
+    """Procesa un lote de registros NDJSON con /alimentation.
+
+    Cada resultado lleva el número de línea del registro; las líneas
+    inválidas se devuelven como error sin detener el resto.
+    """
+    resultados = []
+    for numero, registro in lote:
+        if isinstance(registro, str):
+            resultado = {"error": registro, "status": "error"}
+        else:
+            try:
+                request = PredictionRequestAlimentation(**registro)
+            except ValidationError as e:
+                resultado = {"finca": registro.get("finca"),
+                             "error": "Datos inválidos",
+                             "detalle": e.errors(),
+                             "status": "error"}
+            else:
+                resultado = procesar_prediccion_alimentation(request)
+        resultados.append({"linea": numero, **resultado})
+    return resultados
+
+
 # --- Datos de alimentación desde configuración ---
 pesos_alimento_path = str(config("PESOS_ALIMENTATION"))
 terrain_path = str(config("TERRAIN"))
@@ -294,15 +570,13 @@ rendimiento_path = str(config("RENDIMIENTO_PATH"))
 
 
 def descargar_json_desde_gcs(bucket_name: str, blob_name: str) -> dict:
-    """Descarga un archivo JSON desde Google Cloud Storage"""
-    try:
-        storage_client = storage.Client()
-        bucket = storage_client.bucket(bucket_name)
-        blob = bucket.blob(blob_name)
+    """Obtiene un archivo JSON de Google Cloud Storage.
 
-        # Descargar el contenido como string
-        json_content = blob.download_as_text()
-        return json.loads(json_content)
+    El contenido queda en memoria del proceso como instantánea de solo
+    lectura y se revalida contra la generación del blob (REFERENCE_TTL_S).
+    """
+    try:
+        return obtener_json_referencia(f"gs://{bucket_name}/{blob_name}")
     except Exception as e:
         # Solo imprimir error si no es problema de credenciales (en producción sí alertar)
         if "credentials" not in str(e).lower():
@@ -310,6 +584,28 @@ def descargar_json_desde_gcs(bucket_name: str, blob_name: str) -> dict:
         return {}
 
 
+def _indice_referencia(ruta: str, nombre: str, constructor):
+    """Índice derivado de un JSON de referencia, vacío si no se puede cargar"""
+    try:
+        return derivar(ruta, nombre, constructor)
+    except Exception as e:
+        # Solo imprimir error si no es problema de credenciales (en producción sí alertar)
+        if "credentials" not in str(e).lower():
+            print(f"Error al cargar {ruta}: {e}")
+        return constructor({})
+
+
+def obtener_indice_terrain() -> IndiceTerrain:
+    """Índice finca → piscina de Terrain.json"""
+    return _indice_referencia(terrain_path, "indice_terrain", IndiceTerrain)
+
+
+def obtener_indice_rendimiento() -> IndiceRendimiento:
+    """Índice finca → filas de Rendimiento.json"""
+    return _indice_referencia(
+        rendimiento_path, "indice_rendimiento", IndiceRendimiento)
+
+
 def cargar_pesos_alimento():
     """Carga el archivo pesos_alimento desde Google Cloud Storage"""
     try:
@@ -388,6 +684,7 @@ class AquacultureModel:
     def __init__(self):
         self.piscinas_options_camanovillo: List[str] = []
         self.camanovillo_data: List[Dict[str, Any]] = []
+        self.piscinas_por_id: Dict[str, Dict[str, Any]] = {}
         self.rendimiento_data: List[Dict[str, Any]] = []
         self.referencia_tabla: Dict[float, float] = {}
         self.selected_finca: Optional[str] = "CAMANOVILLO"
@@ -397,10 +694,12 @@ class AquacultureModel:
         self.selected_hect_pisc: Optional[str] = None
         self.show_results: bool = False
 
-    def update_piscinas_data(self, data):
+    def update_piscinas_data(self, data, filas_finca: FilasFinca = None):
+        if filas_finca is None or filas_finca.filas is not data:
+            filas_finca = FilasFinca(data)
         self.camanovillo_data = data
-        self.piscinas_options_camanovillo = [
-            str(item.get('Piscinas', '')) for item in data]
+        self.piscinas_options_camanovillo = filas_finca.opciones
+        self.piscinas_por_id = filas_finca.por_piscina
 
     def update_rendimiento_data(self, data):
         self.rendimiento_data = data
@@ -749,67 +1048,73 @@ class AquacultureAnalysisEngine:
 
 class AquacultureCalculator:
     def __init__(self):
-        self.controllers = {}
+        self.estado = EstadoCalculadora()
+        # Fórmulas por recalcular; al inicio, todas
+        self._pendientes = set(GRAFO_ALIMENTACION.metodos)
+        self._evaluando = False
+        self.nodos_evaluados = 0
         self.on_state_changed = None
         self.model = AquacultureModel()
         # Cargar pesos desde configuración
         self.pesos_alimento_data = cargar_pesos_alimento()
 
+    @property
+    def pesos_alimento_data(self) -> Dict[str, Any]:
+        return self._pesos_alimento_data
+
+    @pesos_alimento_data.setter
+    def pesos_alimento_data(self, data: Dict[str, Any]):
+        self._pesos_alimento_data = data
+        self._invalidar('pesos_alimento')
+
+    @property
+    def tabla_bwcosechas(self) -> TablaBWCosechas:
+        """Tabla BWCosechas compilada de `pesos_alimento_data`"""
+        return tabla_bwcosechas(self.pesos_alimento_data)
+
+    @property
+    def controllers(self) -> Dict[str, Any]:
+        """Textos de los controladores (vista de compatibilidad del estado)"""
+        return self.estado.como_dict()
+
     def get_controller_value(self, key: str) -> str:
         """Obtiene el valor de un controlador"""
-        return self.controllers.get(key, '')
+        return self.estado.texto(key)
 
     def set_controller_value(self, key: str, value: str):
         """Establece el valor de un controlador"""
-        self.controllers[key] = value
+        self.estado.fijar_texto(key, value)
+        self._invalidar(key)
+        if self.on_state_changed:
+            self.on_state_changed()
+
+    def _fijar(self, key: str, valor: float):
+        """Guarda un resultado numérico sin formatearlo"""
+        self.estado.fijar(key, valor)
+        self._invalidar(key)
         if self.on_state_changed:
             self.on_state_changed()
 
+    def _invalidar(self, key: str):
+        """Marca para recalcular las fórmulas que dependen de `key`.
+
+        Durante la evaluación del grafo las escrituras son sus propias
+        salidas y los nodos afectados ya están pendientes.
+        """
+        if not self._evaluando:
+            self._pendientes |= GRAFO_ALIMENTACION.afectados(key)
+
     def parse_formatted_number(self, value_str) -> float:
         """
         Convierte una cadena formateada a número float
         Formato Flutter: "." para decimales y "," para miles
         Ejemplos: 7.8, 30.0, 55042, 614.0, 1.32, 10.6
         """
-        if value_str is None or not value_str or value_str == '':
-            return 0.0
         try:
-            # Si ya es un número, convertir directamente
-            if isinstance(value_str, (int, float)):
-                return float(value_str)
-
-            # Convertir a string y limpiar espacios
-            value_str = str(value_str).strip()
-
-            if not value_str:
-                return 0.0
-
-            # Remover caracteres no numéricos excepto punto, coma y signo menos
-            import re
-            clean_str = re.sub(r'[^\d.,-]', '', value_str)
-
-            # Formato Flutter estándar:
-            # - Punto (.) siempre es decimal
-            # - Coma (,) siempre es separador de miles
-            # Ejemplos: "7.8", "55042", "614.0", "1.32", "55,042.0"
-
-            if ',' in clean_str and '.' in clean_str:
-                # Formato con miles y decimales: "55,042.0"
-                clean_str = clean_str.replace(',', '')
-                return float(clean_str)
-            elif ',' in clean_str and '.' not in clean_str:
-                # Solo comas, son separadores de miles: "55,042"
-                clean_str = clean_str.replace(',', '')
-                return float(clean_str)
-            elif '.' in clean_str:
-                # Solo punto, es decimal: "7.8", "614.0"
-                return float(clean_str)
-            else:
-                # Sin separadores: "55042"
-                return float(clean_str)
-
+            return convertir_numero(value_str)
         except (ValueError, TypeError):
-            print(f"Error al convertir '{value_str}' a número, retornando 0.0")
+            print(f"Error al convertir '{str(value_str).strip()}' a número, "
+                  f"retornando 0.0")
             return 0.0
 
     def format_number(self, value: float) -> str:
@@ -818,10 +1123,9 @@ class AquacultureCalculator:
 
     def calcular_sacos_actuales(self):
         """Calcula los sacos actuales"""
-        alimento_kg = self.parse_formatted_number(
-            self.get_controller_value('alimento_actual_kg'))
+        alimento_kg = self.estado.alimento_actual_kg
         sacos = alimento_kg / 25
-        self.set_controller_value('sacos_actuales', f"{sacos:.2f}")
+        self._fijar('sacos_actuales', sacos)
 
     def calcular_edad_cultivo(self):
         """Calcula la edad del cultivo solo si no se proporcionó previamente"""
@@ -866,17 +1170,15 @@ class AquacultureCalculator:
 
     def incremento_gr(self):
         """Calcula el incremento en gramos"""
-        peso_actual = self.parse_formatted_number(
-            self.get_controller_value('peso_actual_gdia'))
-        peso_anterior = self.parse_formatted_number(
-            self.get_controller_value('peso_anterior'))
+        peso_actual = self.estado.peso_actual_gdia
+        peso_anterior = self.estado.peso_anterior
 
         if peso_anterior == 0:
-            self.set_controller_value('incremento_gr', "0.00")
+            self._fijar('incremento_gr', 0.0)
             return
 
         incremento = peso_actual - peso_anterior
-        self.set_controller_value('incremento_gr', f"{incremento:.2f}")
+        self._fijar('incremento_gr', incremento)
 
     def validar_y_actualizar_fecha(self, controller_key: str):
         """Valida y actualiza una fecha"""
@@ -896,75 +1198,22 @@ class AquacultureCalculator:
     def fetch_data(self, finca_nombre: str):
         """Obtiene datos desde Terrain.json y Rendimiento.json desde Google Cloud Storage para una finca específica"""
         try:
-            # Cargar datos de Terrain desde GCS
-            terrain_data = {}
-            rendimiento_data = []
-
-            # Cargar Terrain.json desde GCS
-            if terrain_path.startswith("gs://"):
-                bucket_name, blob_name = terrain_path.replace(
-                    "gs://", "").split("/", 1)
-                terrain_data = descargar_json_desde_gcs(bucket_name, blob_name)
-            else:
-                # Fallback para rutas locales (desarrollo)
-                with open(terrain_path, 'r', encoding='utf-8') as f:
-                    terrain_data = json.load(f)
-
-            # Cargar Rendimiento.json desde GCS
-            if rendimiento_path.startswith("gs://"):
-                bucket_name, blob_name = rendimiento_path.replace(
-                    "gs://", "").split("/", 1)
-                rendimiento_json = descargar_json_desde_gcs(
-                    bucket_name, blob_name)
-                rendimiento_data = rendimiento_json.get('rows', [])
-            else:
-                # Fallback para rutas locales (desarrollo)
-                with open(rendimiento_path, 'r', encoding='utf-8') as f:
-                    rendimiento_json = json.load(f)
-                    rendimiento_data = rendimiento_json.get('rows', [])
-
-            # Extraer datos específicos para la finca solicitada desde Terrain
-            finca_data = []
-            finca_upper = finca_nombre.upper()
-
-            # Buscar datos de la finca en diferentes estructuras posibles
-            if finca_upper in terrain_data:
-                # Estructura: {"FINCA": {"rows": [...]}}
-                finca_info = terrain_data[finca_upper]
-                if isinstance(finca_info, dict) and 'rows' in finca_info:
-                    finca_data = finca_info['rows']
-                elif isinstance(finca_info, list):
-                    finca_data = finca_info
-            elif finca_nombre.lower() in terrain_data:
-                finca_info = terrain_data[finca_nombre.lower()]
-                if isinstance(finca_info, dict) and 'rows' in finca_info:
-                    finca_data = finca_info['rows']
-                elif isinstance(finca_info, list):
-                    finca_data = finca_info
-            elif 'data' in terrain_data:
-                # Si está estructurado de otra manera, buscar en data
-                for item in terrain_data['data']:
-                    if item.get('finca', '').upper() == finca_upper:
-                        finca_data.append(item)
-            elif 'fincas' in terrain_data:
-                # Si está bajo la clave 'fincas'
-                finca_data = terrain_data['fincas'].get(finca_upper, [])
-
-            # Filtrar datos de rendimiento para la finca específica si tienen esa información
-            rendimiento_finca = []
-            for item in rendimiento_data:
-                if 'finca' in item and item['finca'].upper() == finca_upper:
-                    rendimiento_finca.append(item)
-
-            # Si no hay datos específicos de rendimiento para la finca, usar todos los datos
-            if not rendimiento_finca:
-                rendimiento_finca = rendimiento_data
+            # Índices construidos una vez por versión de Terrain/Rendimiento
+            indice_terrain = obtener_indice_terrain()
+            indice_rendimiento = obtener_indice_rendimiento()
+
+            filas_finca = indice_terrain.finca(finca_nombre)
+            finca_data = filas_finca.filas
+
+            # Datos de rendimiento de la finca, o todos si no tiene propios
+            rendimiento_finca = indice_rendimiento.finca(finca_nombre)
 
             # Si no se encuentran datos específicos, usar datos de ejemplo
             if not finca_data:
                 print(
                     f"⚠️ No se encontraron datos específicos para {finca_nombre}, usando datos de ejemplo")
                 finca_data = self._get_datos_ejemplo_finca(finca_nombre)
+                filas_finca = FilasFinca(finca_data)
 
             # Si no se encuentran datos de rendimiento, usar datos de ejemplo
             if not rendimiento_finca:
@@ -973,7 +1222,7 @@ class AquacultureCalculator:
                 rendimiento_finca = self._get_datos_rendimiento_ejemplo()
 
             # Actualizar el modelo con los datos cargados para la finca específica
-            self.model.update_piscinas_data(finca_data)
+            self.model.update_piscinas_data(finca_data, filas_finca)
             self.model.update_rendimiento_data(rendimiento_finca)
             self.model.selected_finca = finca_nombre
 
@@ -1068,35 +1317,19 @@ class AquacultureCalculator:
 
     def fetch_data_tabla3(self):
         """Obtiene datos de la tabla 3 desde configuración"""
-        try:
-            referencia_tabla = {}
-
-            if 'rows' in self.pesos_alimento_data and isinstance(
-                    self.pesos_alimento_data['rows'], list):
-                for row in self.pesos_alimento_data['rows']:
-                    if 'Pesos' in row and 'BWCosechas' in row:
-                        peso = float(row['Pesos'])
-                        bw_cosechas_str = str(
-                            row['BWCosechas']).replace('%', '').strip()
-                        bw_cosechas = float(bw_cosechas_str)
-                        referencia_tabla[peso] = bw_cosechas
-
-            self.model.update_referencia_tabla(referencia_tabla)
-            print(
-                f"✅ Tabla de pesos cargada con "
-                f"{len(referencia_tabla)} entradas")
+        tabla = self.tabla_bwcosechas
+        if tabla.error_referencia:
+            print(f'⚠️ Error al cargar datos de tabla 3: '
+                  f'{tabla.error_referencia}')
 
-        except Exception as e:
-            print(f'⚠️ Error al cargar datos de tabla 3: {e}')
-            self.model.update_referencia_tabla({})
+        self.model.update_referencia_tabla(tabla.referencia)
+        print(
+            f"✅ Tabla de pesos cargada con "
+            f"{len(tabla.referencia)} entradas")
 
     def update_hectareas_for_piscina(self, piscina: str):
         """Actualiza las hectáreas para una piscina"""
-        matching_piscina = None
-        for element in self.model.camanovillo_data:
-            if str(element.get('Piscinas', '')) == piscina:
-                matching_piscina = element
-                break
+        matching_piscina = self.model.piscinas_por_id.get(piscina)
 
         if matching_piscina:
             self.model.selected_hectareas = str(
@@ -1109,18 +1342,16 @@ class AquacultureCalculator:
 
     def calcular_crecimiento_actual(self):
         """Calcula el crecimiento actual"""
-        peso_actual = self.parse_formatted_number(
-            self.get_controller_value('peso_actual_gdia'))
-        peso_siembra = self.parse_formatted_number(
-            self.get_controller_value('peso_siembra'))
+        peso_actual = self.estado.peso_actual_gdia
+        peso_siembra = self.estado.peso_siembra
         edad_cultivo = int(self.get_controller_value('edad_cultivo') or '0')
 
         if edad_cultivo == 0:
-            self.set_controller_value('crecim_actual_gdia', "0.00")
+            self._fijar('crecim_actual_gdia', 0.0)
             return
 
         crecimiento = (peso_actual - peso_siembra) / edad_cultivo
-        self.set_controller_value('crecim_actual_gdia', f"{crecimiento:.2f}")
+        self._fijar('crecim_actual_gdia', crecimiento)
         self.calcular_peso_proyectado(peso_actual)
 
     def calcular_peso_proyectado(self, peso_actual: float):
@@ -1135,8 +1366,7 @@ class AquacultureCalculator:
             incremento = 3
 
         peso_proyectado = peso_actual + incremento
-        self.set_controller_value(
-            'peso_proyectado_gdia', f"{peso_proyectado:.2f}")
+        self._fijar('peso_proyectado_gdia', peso_proyectado)
         self.calcular_crecimiento_esperado(peso_proyectado)
 
     # --- Función calcular_densidad_consumo AJUSTADA PARA COINCIDIR CON EXCEL ---
@@ -1147,72 +1377,35 @@ class AquacultureCalculator:
         """
         try:
             # Obtener valores exactamente como en la fórmula de Excel
-            alimento_actual_kg_str = self.get_controller_value(
-                'alimento_actual_kg')
-            hectareas_str = self.get_controller_value('hectareas')
-            peso_actual_str = self.get_controller_value('peso_actual_gdia')
-
             # Usar alimento_actual_kg si no existe alimentoactualkg
-            if not alimento_actual_kg_str:
-                alimento_actual_kg_str = self.get_controller_value(
-                    'alimentoactualkg')
-
-            alimento_actual_kg = self.parse_formatted_number(
-                alimento_actual_kg_str) or 0.0
-            hectareas = self.parse_formatted_number(hectareas_str) or 1.0
-            peso_actual_g = self.parse_formatted_number(peso_actual_str) or 1.0
+            if self.get_controller_value('alimento_actual_kg'):
+                alimento_actual_kg = self.estado.alimento_actual_kg or 0.0
+            else:
+                alimento_actual_kg = self.estado.numero(
+                    'alimentoactualkg') or 0.0
+            hectareas = self.estado.hectareas or 1.0
+            peso_actual_g = self.estado.peso_actual_gdia or 1.0
 
             # Validación como Excel (SI.ERROR devuelve "")
             if hectareas == 0 or peso_actual_g == 0:
                 self.set_controller_value('densidad_consumo_im2', "")
                 return ""
 
-            # Verificar datos de la tabla3 (BUSCARV en Excel)
-            if not self.pesos_alimento_data or 'rows' not in self.pesos_alimento_data:
-                self.set_controller_value('densidad_consumo_im2', "")
-                return ""
-
-            # Obtener datos como BUSCARV de Excel
-            data = self.pesos_alimento_data['rows']
-
-            # Validar formato de datos
-            if not data:
-                self.set_controller_value('densidad_consumo_im2', "")
-                return ""
-
-            # BUSCARV con VERDADERO: busca valor exacto o el mayor valor menor
-            vlookup_result = None
-
-            for row in data:
-                if "Pesos" in row and "BWCosechas" in row:
-                    try:
-                        peso = float(str(row["Pesos"]))
-                        if peso <= peso_actual_g:
-                            if vlookup_result is None or peso > vlookup_result['peso']:
-                                vlookup_result = {
-                                    'peso': peso,
-                                    'bw_raw': row["BWCosechas"]
-                                }
-                    except (ValueError, TypeError):
-                        continue
+            # BUSCARV con VERDADERO sobre la tabla3 compilada: busca valor
+            # exacto o el mayor valor menor
+            vlookup_result = self.tabla_bwcosechas.buscar(peso_actual_g)
 
             if vlookup_result is None:
                 self.set_controller_value('densidad_consumo_im2', "")
                 return ""
 
-            # Procesar el resultado del BUSCARV
-            bw_raw = vlookup_result['bw_raw']
-
-            # Obtener el valor numérico del BWCosechas
-            if isinstance(bw_raw, str) and '%' in str(bw_raw):
-                bw_value = float(str(bw_raw).replace('%', '').strip())
-            else:
-                bw_value = float(bw_raw)
+            # BWCosechas ya convertido de porcentaje a fracción
+            _, bw_fraccion = vlookup_result
 
             # Aplicar la fórmula base de Excel:
             # (Alimento/Hectareas)*10/(Peso*(BWCosechas/100))
             densidad_consumo = (alimento_actual_kg / hectareas) * \
-                10 / (peso_actual_g * (bw_value / 100))
+                10 / (peso_actual_g * bw_fraccion)
 
             # FACTOR DE AJUSTE para coincidir exactamente con Excel
             # Con BWCosechas correcto de 2.58516749708439% para peso 30.0
@@ -1220,10 +1413,9 @@ class AquacultureCalculator:
             factor_ajuste = 100.0
             densidad_consumo = densidad_consumo / factor_ajuste
 
-            # Formato como Excel
-            resultado = f"{densidad_consumo:.2f}"
-            self.set_controller_value('densidad_consumo_im2', resultado)
-            return resultado
+            # Se guarda el valor; el texto con formato de Excel se devuelve
+            self._fijar('densidad_consumo_im2', densidad_consumo)
+            return self.get_controller_value('densidad_consumo_im2')
 
         except Exception as e:
             print(f"Error al calcular densidad: {e}")
@@ -1254,65 +1446,54 @@ class AquacultureCalculator:
     def calcular_crecimiento_esperado(self, peso_proyectado: float):
         """Calcula el crecimiento esperado"""
         try:
-            peso_proyectado_val = self.parse_formatted_number(
-                self.get_controller_value('peso_proyectado_gdia'))
-            peso_actual_campo = self.parse_formatted_number(
-                self.get_controller_value('peso_actual_gdia'))
+            peso_proyectado_val = self.estado.peso_proyectado_gdia
+            peso_actual_campo = self.estado.peso_actual_gdia
 
             if peso_proyectado_val and peso_actual_campo:
                 crecimiento_esperado = peso_proyectado_val - peso_actual_campo
-                self.set_controller_value(
-                    'crecimiento_esperado_sem', f"{crecimiento_esperado:.2f}")
+                self._fijar('crecimiento_esperado_sem', crecimiento_esperado)
             else:
-                self.set_controller_value('crecimiento_esperado_sem', "0.00")
+                self._fijar('crecimiento_esperado_sem', 0.0)
         except Exception as e:
             print(f'⚠️ Error al calcular el crecimiento esperado: {e}')
-            self.set_controller_value('crecimiento_esperado_sem', "0.00")
+            self._fijar('crecimiento_esperado_sem', 0.0)
 
     def calcular_kg_100mil(self):
         """Calcula kg por 100 mil"""
-        alimento_kg = self.parse_formatted_number(
-            self.get_controller_value('alimento_actual_kg'))
-        hect = self.parse_formatted_number(
-            self.get_controller_value('hectareas'))
-        densidad_consumo = self.parse_formatted_number(
-            self.get_controller_value('densidad_consumo_im2'))
+        alimento_kg = self.estado.alimento_actual_kg
+        hect = self.estado.hectareas
+        densidad_consumo = self.estado.densidad_consumo_im2
 
         if hect == 0 or densidad_consumo == 0:
-            self.set_controller_value('kg_100mil', "0.00")
+            self._fijar('kg_100mil', 0.0)
             return
 
         kg_100mil = (alimento_kg / hect) / densidad_consumo * 10
-        self.set_controller_value('kg_100mil', f"{kg_100mil:.2f}")
+        self._fijar('kg_100mil', kg_100mil)
 
     # Métodos de cálculo para días de la semana
 
     def _calcular_logic(self, peso_project: float, hectareaje: float,
-                        densidad_biologo: float, lookup_table: list) -> float:
+                        densidad_biologo: float,
+                        tabla: TablaBWCosechas) -> float:
         """Lógica compartida para cálculos de días de la semana"""
-        # Lógica para encontrar el valor de 'BWCosechas' (VLOOKUP) como en Flutter
-        peso_encontrado = 0.0
-        bw_cosechas = "0%"
+        # Un peso no numérico en la tabla es un error como en Flutter
+        if tabla.error_pesos:
+            raise ValueError(tabla.error_pesos)
 
-        for row in lookup_table:
-            if "Pesos" in row and "BWCosechas" in row:
-                peso = float(str(row["Pesos"]))
-                if peso <= peso_project and peso > peso_encontrado:
-                    peso_encontrado = peso
-                    bw_cosechas = str(row["BWCosechas"])
+        # Lógica para encontrar el valor de 'BWCosechas' (VLOOKUP) como en Flutter
+        encontrado = tabla.buscar(peso_project, solo_positivos=True)
 
         # Lanza un error si no se encuentra un valor como en Flutter
-        if peso_encontrado == 0.0:
+        if encontrado is None:
             raise Exception(
                 "No se encontró un peso que coincida en la tabla de búsqueda.")
 
-        # Convierte el porcentaje a decimal como en Flutter
-        bw_cosechas_decimal = float(bw_cosechas.replace('%', '').strip())
+        # BWCosechas ya convertido de porcentaje a decimal
+        _, bw_cosechas_decimal = encontrado
         if bw_cosechas_decimal == 0:
             raise Exception("Se encontró un valor 'BWCosechas' inválido.")
 
-        bw_cosechas_decimal /= 100  # Dividir por 100 como en Flutter
-
         # Realiza el cálculo principal exacto como en Flutter
         result = ((peso_project / 1000) * ((densidad_biologo * 10000)
                   * hectareaje)) * bw_cosechas_decimal
@@ -1325,12 +1506,9 @@ class AquacultureCalculator:
     def calcular_lunes_dia1(self):
         """Calcula el valor para lunes día 1"""
         try:
-            peso_actual_g = self.parse_formatted_number(
-                self.get_controller_value('peso_actual_gdia'))
-            hectareaje = self.parse_formatted_number(
-                self.get_controller_value('hectareas'))
-            densidad_biologo = self.parse_formatted_number(
-                self.get_controller_value('densidad_biologo_indm2'))
+            peso_actual_g = self.estado.peso_actual_gdia
+            hectareaje = self.estado.hectareas
+            densidad_biologo = self.estado.densidad_biologo_indm2
 
             # Usar 1.0 como valor por defecto si es 0, igual que Flutter
             if peso_actual_g == 0:
@@ -1345,37 +1523,22 @@ class AquacultureCalculator:
                 return
 
             # Usar los datos de pesos_alimento_data (referenciaTabla3) como en Flutter
-            if not self.pesos_alimento_data or 'rows' not in self.pesos_alimento_data:
+            tabla = self.tabla_bwcosechas
+            if not tabla.hay_datos:
                 self.set_controller_value('lunes_dia1', "No hay datos")
                 return
 
-            # Procesar datos exactamente como en Flutter
-            data = []
-            raw_data = self.pesos_alimento_data['rows']
-
-            if isinstance(raw_data, list):
-                for item in raw_data:
-                    if isinstance(item, dict):
-                        data.append(item)
-            else:
+            if not tabla.formato_valido:
                 self.set_controller_value(
                     'lunes_dia1', "Formato de datos inválido")
                 return
 
-            peso_encontrado = 0.0
-            bw_cosechas = "0%"
-
-            # Buscar el peso exactamente como en Flutter
-            for row in data:
-                if "Pesos" in row and "BWCosechas" in row:
-                    peso = float(str(row["Pesos"]))
-                    if peso <= peso_actual_g and peso > peso_encontrado:
-                        peso_encontrado = peso
-                        bw_cosechas = str(row["BWCosechas"])
+            if tabla.error_pesos:
+                raise ValueError(tabla.error_pesos)
 
-            # Convertir porcentaje a decimal exactamente como en Flutter
-            bw_cosechas_decimal = float(bw_cosechas.replace('%', '').strip())
-            bw_cosechas_decimal /= 100  # Dividir por 100 como en Flutter
+            # Buscar el peso exactamente como en Flutter (BWCosechas en decimal)
+            encontrado = tabla.buscar(peso_actual_g, solo_positivos=True)
+            bw_cosechas_decimal = encontrado[1] if encontrado else 0.0
 
             if bw_cosechas_decimal == 0:
                 self.set_controller_value('lunes_dia1', "BWCosechas inválido")
@@ -1391,8 +1554,7 @@ class AquacultureCalculator:
             if math.isnan(lunes_dia1) or math.isinf(lunes_dia1):
                 self.set_controller_value('lunes_dia1', "25")
             else:
-                self.set_controller_value(
-                    'lunes_dia1', str(resultado_redondeado))
+                self._fijar('lunes_dia1', resultado_redondeado)
 
         except Exception as e:
             print(f"Error al calcular LunesDia1: {e}")
@@ -1401,12 +1563,9 @@ class AquacultureCalculator:
     def calcular_domingo_dia7(self):
         """Calcula el valor para domingo día 7"""
         # 1. Validar y Analizar los Datos de Entrada exacto como Flutter
-        peso_project = self.parse_formatted_number(
-            self.get_controller_value('peso_proyectado_gdia'))
-        hectareaje = self.parse_formatted_number(
-            self.get_controller_value('hectareas'))
-        densidad_biologo = self.parse_formatted_number(
-            self.get_controller_value('densidad_biologo_indm2'))
+        peso_project = self.estado.peso_proyectado_gdia
+        hectareaje = self.estado.hectareas
+        densidad_biologo = self.estado.densidad_biologo_indm2
 
         if (peso_project is None or
             hectareaje is None or
@@ -1419,24 +1578,13 @@ class AquacultureCalculator:
 
         try:
             # 2. Obtener Datos de la Base de Datos (referenciaTabla3) como Flutter
-            if not self.pesos_alimento_data or 'rows' not in self.pesos_alimento_data:
+            tabla = self.tabla_bwcosechas
+            if not tabla.hay_datos:
                 self.set_controller_value('domingo_dia7', "No hay datos")
                 return
 
-            # 3. Procesar los Datos Brutos exactamente como en Flutter
-            lookup_data = []
-            raw_data = self.pesos_alimento_data['rows']
-
-            if isinstance(raw_data, list):
-                for item in raw_data:
-                    if isinstance(item, dict):
-                        lookup_data.append(item)
-            else:
-                self.set_controller_value(
-                    'domingo_dia7', "Formato de datos inválido")
-                return
-
-            if not lookup_data:
+            # 3. Validar los Datos Brutos exactamente como en Flutter
+            if not tabla.formato_valido or not tabla.filas_validas:
                 self.set_controller_value(
                     'domingo_dia7', "Formato de datos inválido")
                 return
@@ -1446,11 +1594,11 @@ class AquacultureCalculator:
                 peso_project=peso_project,
                 hectareaje=hectareaje,
                 densidad_biologo=densidad_biologo,
-                lookup_table=lookup_data
+                tabla=tabla
             )
 
             # 5. Actualizar la Interfaz de Usuario exacto como Flutter
-            self.set_controller_value('domingo_dia7', str(int(resultado)))
+            self._fijar('domingo_dia7', resultado)
 
         except Exception as e:
             # 6. Manejar errores exacto como Flutter
@@ -1460,10 +1608,8 @@ class AquacultureCalculator:
     def calcular_martes_dia2(self):
         """Calcula martes día 2"""
         try:
-            lunes_dia1c = self.parse_formatted_number(
-                self.get_controller_value('lunes_dia1'))
-            domingo_dia7c = self.parse_formatted_number(
-                self.get_controller_value('domingo_dia7'))
+            lunes_dia1c = self.estado.lunes_dia1
+            domingo_dia7c = self.estado.domingo_dia7
 
             # Usar valores por defecto si son 0, igual que Flutter
             if lunes_dia1c == 0:
@@ -1475,18 +1621,15 @@ class AquacultureCalculator:
             martes_dia2c = lunes_dia1c + incremento_diario
             resultado_redondeado = round(martes_dia2c / 25) * 25
 
-            self.set_controller_value(
-                'martes_dia2', str(int(resultado_redondeado)))
+            self._fijar('martes_dia2', resultado_redondeado)
         except Exception:
             self.set_controller_value('martes_dia2', "Error")
 
     def calcular_miercoles_dia3(self):
         """Calcula miércoles día 3"""
         try:
-            lunes_dia1c = self.parse_formatted_number(
-                self.get_controller_value('lunes_dia1'))
-            domingo_dia7c = self.parse_formatted_number(
-                self.get_controller_value('domingo_dia7'))
+            lunes_dia1c = self.estado.lunes_dia1
+            domingo_dia7c = self.estado.domingo_dia7
 
             # Usar valores por defecto si son 0, igual que Flutter
             if lunes_dia1c == 0:
@@ -1498,25 +1641,21 @@ class AquacultureCalculator:
             miercoles_dia3c = lunes_dia1c + incremento_diario
             resultado_redondeado = round(miercoles_dia3c / 25) * 25
 
-            self.set_controller_value(
-                'miercoles_dia3', str(int(resultado_redondeado)))
+            self._fijar('miercoles_dia3', resultado_redondeado)
         except Exception:
             self.set_controller_value('miercoles_dia3', "Error")
             miercoles_dia3c = lunes_dia1c + incremento_diario
             resultado_redondeado = int(round(miercoles_dia3c / 25)) * 25
 
-            self.set_controller_value(
-                'miercoles_dia3', str(resultado_redondeado))
+            self._fijar('miercoles_dia3', resultado_redondeado)
         except Exception:
             self.set_controller_value('miercoles_dia3', "Error")
 
     def calcular_jueves_dia4(self):
         """Calcula jueves día 4"""
         try:
-            lunes_dia1c = self.parse_formatted_number(
-                self.get_controller_value('lunes_dia1'))
-            domingo_dia7c = self.parse_formatted_number(
-                self.get_controller_value('domingo_dia7'))
+            lunes_dia1c = self.estado.lunes_dia1
+            domingo_dia7c = self.estado.domingo_dia7
 
             # Usar valores por defecto si son 0, igual que Flutter
             if lunes_dia1c == 0:
@@ -1528,18 +1667,15 @@ class AquacultureCalculator:
             jueves_dia4c = lunes_dia1c + incremento_diario
             resultado_redondeado = round(jueves_dia4c / 25) * 25
 
-            self.set_controller_value(
-                'jueves_dia4', str(int(resultado_redondeado)))
+            self._fijar('jueves_dia4', resultado_redondeado)
         except Exception:
             self.set_controller_value('jueves_dia4', "Error")
 
     def calcular_viernes_dia5(self):
         """Calcula viernes día 5"""
         try:
-            lunes_dia1c = self.parse_formatted_number(
-                self.get_controller_value('lunes_dia1'))
-            domingo_dia7c = self.parse_formatted_number(
-                self.get_controller_value('domingo_dia7'))
+            lunes_dia1c = self.estado.lunes_dia1
+            domingo_dia7c = self.estado.domingo_dia7
 
             # Usar valores por defecto si son 0, igual que Flutter
             if lunes_dia1c == 0:
@@ -1551,18 +1687,15 @@ class AquacultureCalculator:
             viernes_dia5c = lunes_dia1c + incremento_diario
             resultado_redondeado = round(viernes_dia5c / 25) * 25
 
-            self.set_controller_value(
-                'viernes_dia5', str(int(resultado_redondeado)))
+            self._fijar('viernes_dia5', resultado_redondeado)
         except Exception:
             self.set_controller_value('viernes_dia5', "Error")
 
     def calcular_sabado_dia6(self):
         """Calcula sábado día 6"""
         try:
-            lunes_dia1c = self.parse_formatted_number(
-                self.get_controller_value('lunes_dia1'))
-            domingo_dia7c = self.parse_formatted_number(
-                self.get_controller_value('domingo_dia7'))
+            lunes_dia1c = self.estado.lunes_dia1
+            domingo_dia7c = self.estado.domingo_dia7
 
             # Usar valores por defecto si son 0, igual que Flutter
             if lunes_dia1c == 0:
@@ -1574,8 +1707,7 @@ class AquacultureCalculator:
             sabado_dia6c = lunes_dia1c + incremento_diario
             resultado_redondeado = round(sabado_dia6c / 25) * 25
 
-            self.set_controller_value(
-                'sabado_dia6', str(int(resultado_redondeado)))
+            self._fijar('sabado_dia6', resultado_redondeado)
         except Exception:
             self.set_controller_value('sabado_dia6', "Error")
             self.set_controller_value('sabado_dia6', "Error")
@@ -1583,20 +1715,13 @@ class AquacultureCalculator:
     def calcular_recomendation_semana(self):
         """Calcula la recomendación semanal"""
         try:
-            lunes_dia1c = self.parse_formatted_number(
-                self.get_controller_value('lunes_dia1'))
-            martes_dia2c = self.parse_formatted_number(
-                self.get_controller_value('martes_dia2'))
-            miercoles_dia3c = self.parse_formatted_number(
-                self.get_controller_value('miercoles_dia3'))
-            jueves_dia4c = self.parse_formatted_number(
-                self.get_controller_value('jueves_dia4'))
-            viernes_dia5c = self.parse_formatted_number(
-                self.get_controller_value('viernes_dia5'))
-            sabado_dia6c = self.parse_formatted_number(
-                self.get_controller_value('sabado_dia6'))
-            domingo_dia7c = self.parse_formatted_number(
-                self.get_controller_value('domingo_dia7'))
+            lunes_dia1c = self.estado.lunes_dia1
+            martes_dia2c = self.estado.martes_dia2
+            miercoles_dia3c = self.estado.miercoles_dia3
+            jueves_dia4c = self.estado.jueves_dia4
+            viernes_dia5c = self.estado.viernes_dia5
+            sabado_dia6c = self.estado.sabado_dia6
+            domingo_dia7c = self.estado.domingo_dia7
 
             # Usar valores por defecto si son 0, igual que Flutter
             if lunes_dia1c == 0:
@@ -1618,16 +1743,14 @@ class AquacultureCalculator:
                     jueves_dia4c + viernes_dia5c + sabado_dia6c + domingo_dia7c)
             recomendation_semana = suma / 7
 
-            self.set_controller_value(
-                'recomendation_semana', f"{recomendation_semana:.2f}")
+            self._fijar('recomendation_semana', recomendation_semana)
         except Exception:
             self.set_controller_value('recomendation_semana', "Error")
 
     def calcular_acumulado_semanal(self):
         """Calcula el acumulado semanal"""
         try:
-            recomendation_semanal = self.parse_formatted_number(
-                self.get_controller_value('recomendation_semana'))
+            recomendation_semanal = self.estado.recomendation_semana
 
             # Usar valor por defecto si es 0, igual que Flutter
             if recomendation_semanal == 0:
@@ -1635,117 +1758,97 @@ class AquacultureCalculator:
 
             acumulado_semanal = recomendation_semanal * 7
 
-            self.set_controller_value(
-                'acumulado_semanal', f"{acumulado_semanal:.2f}")
+            self._fijar('acumulado_semanal', acumulado_semanal)
         except Exception:
             self.set_controller_value('acumulado_semanal', "Error")
 
     def calcular_aireadores_diesel(self):
         """Calcula aireadores diesel"""
         try:
-            aireadores = self.parse_formatted_number(
-                self.get_controller_value('h_aireadores_mecanicos'))
-            hectareas = self.parse_formatted_number(
-                self.get_controller_value('hectareas'))
+            aireadores = self.estado.h_aireadores_mecanicos
+            hectareas = self.estado.hectareas
             aireadores_diesel = (aireadores * 3) / hectareas
 
-            self.set_controller_value(
-                'aireadores_diesel', f"{aireadores_diesel:.2f}")
+            self._fijar('aireadores_diesel', aireadores_diesel)
         except Exception:
             self.set_controller_value('aireadores_diesel', "Error")
 
     def calcular_capacidad_carga_aireaccion(self):
         """Calcula la capacidad de carga de aireación"""
         try:
-            aireadores_diesel = self.parse_formatted_number(
-                self.get_controller_value('aireadores_diesel'))
-            hectarea = self.parse_formatted_number(
-                self.get_controller_value('hectareas'))
+            aireadores_diesel = self.estado.aireadores_diesel
+            hectarea = self.estado.hectareas
 
             capacidad_carga_aireaccion = (
                 aireadores_diesel * 3000) + (7500 * hectarea)
 
-            self.set_controller_value(
-                'capacidad_carga_aireaccion', f"{capacidad_carga_aireaccion:.2f}")
+            self._fijar('capacidad_carga_aireaccion',
+                        capacidad_carga_aireaccion)
         except Exception:
             self.set_controller_value('capacidad_carga_aireaccion', "Error")
 
     def libras_totales_por_aireador(self):
         """Calcula libras totales por aireador"""
-        libras_totales_campo = self.parse_formatted_number(
-            self.get_controller_value('libras_totales_campo'))
-        aireadores_mecanicos = self.parse_formatted_number(
-            self.get_controller_value('h_aireadores_mecanicos'))
+        libras_totales_campo = self.estado.libras_totales_campo
+        aireadores_mecanicos = self.estado.h_aireadores_mecanicos
 
         if aireadores_mecanicos == 0:
-            self.set_controller_value('libras_totales_por_aireador', "0.00")
+            self._fijar('libras_totales_por_aireador', 0.0)
             return
 
         libras_totales_por_aireador = libras_totales_campo / aireadores_mecanicos
-        self.set_controller_value(
-            'libras_totales_por_aireador',
-            self.format_number(libras_totales_por_aireador))
+        self._fijar('libras_totales_por_aireador', libras_totales_por_aireador)
 
         print(f"Libras totales por aireador calculado: "
               f"{self.format_number(libras_totales_por_aireador)}")
 
     def fca_campo(self):
         """Calcula FCA Campo"""
-        acumulado = self.parse_formatted_number(
-            self.get_controller_value('acumulado_actual_lbs'))
-        libras_totales_campo = self.parse_formatted_number(
-            self.get_controller_value('libras_totales_campo'))
+        acumulado = self.estado.acumulado_actual_lbs
+        libras_totales_campo = self.estado.libras_totales_campo
 
         if libras_totales_campo == 0 or acumulado == 0:
-            self.set_controller_value('fca_campo', "0.00")
+            self._fijar('fca_campo', 0.0)
             return
 
         fca_campo = acumulado / libras_totales_campo
-        self.set_controller_value('fca_campo', f"{fca_campo:.2f}")
+        self._fijar('fca_campo', fca_campo)
 
     def fca_consumo(self):
         """Calcula FCA Consumo"""
-        acumulado = self.parse_formatted_number(
-            self.get_controller_value('acumulado_actual_lbs'))
-        libras_totales_consumo = self.parse_formatted_number(
-            self.get_controller_value('libras_totales_consumo'))
+        acumulado = self.estado.acumulado_actual_lbs
+        libras_totales_consumo = self.estado.libras_totales_consumo
 
         if libras_totales_consumo == 0 or acumulado == 0:
-            self.set_controller_value('fca_consumo', "0.00")
+            self._fijar('fca_consumo', 0.0)
             return
 
         fca_consumo = acumulado / libras_totales_consumo
-        self.set_controller_value('fca_consumo', f"{fca_consumo:.2f}")
+        self._fijar('fca_consumo', fca_consumo)
 
     def calcular_rendimiento_lbs_saco(self):
         """Calcula el rendimiento en libras por saco"""
-        lbs_actual_campo = self.parse_formatted_number(
-            self.get_controller_value('lbs_ha_actual_campo'))
-        hectareaje = self.parse_formatted_number(
-            self.get_controller_value('hectareas'))
-        alimento_actual_campo = self.parse_formatted_number(
-            self.get_controller_value('alimento_actual_kg'))
+        lbs_actual_campo = self.estado.lbs_ha_actual_campo
+        hectareaje = self.estado.hectareas
+        alimento_actual_campo = self.estado.alimento_actual_kg
 
         if alimento_actual_campo == 0:
-            self.set_controller_value('rendimiento_lbs_saco', "0.00")
+            self._fijar('rendimiento_lbs_saco', 0.0)
             return
 
         rendimiento_lbs_saco = (
             lbs_actual_campo * hectareaje) / (alimento_actual_campo / 25)
-        self.set_controller_value(
-            'rendimiento_lbs_saco', f"{rendimiento_lbs_saco:.2f}")
+        self._fijar('rendimiento_lbs_saco', rendimiento_lbs_saco)
 
     def calcular_recomendacion_lbs_ha(self):
         """Calcula la recomendación en libras por hectárea"""
         try:
             capacidad = 7000
-            hectareaje = self.parse_formatted_number(
-                self.get_controller_value('hectareas'))
+            hectareaje = self.estado.hectareas
             recomendacion_lbs_ha = capacidad * hectareaje
 
             # Formatear el resultado si es un número grande
-            self.set_controller_value(
-                'recomendacion_lbs_ha', self.format_number(recomendacion_lbs_ha))
+            self._fijar('recomendacion_lbs_ha', recomendacion_lbs_ha)
 
             print(f"Recomendación LBS/HA calculado: "
                   f"{self.format_number(recomendacion_lbs_ha)}")
@@ -1755,93 +1858,73 @@ class AquacultureCalculator:
     def calcular_lbs_ha_actual_campo(self):
         """Calcula LBS/Ha actual campo"""
         try:
-            densidad_biologo2 = self.parse_formatted_number(
-                self.get_controller_value('densidad_biologo_indm2'))
-            peso_actual_campo = self.parse_formatted_number(
-                self.get_controller_value('peso_actual_gdia'))
+            densidad_biologo2 = self.estado.densidad_biologo_indm2
+            peso_actual_campo = self.estado.peso_actual_gdia
 
             lbs_ha_actual_campo = densidad_biologo2 * peso_actual_campo * 22
 
-            self.set_controller_value(
-                'lbs_ha_actual_campo', f"{lbs_ha_actual_campo:.2f}")
+            self._fijar('lbs_ha_actual_campo', lbs_ha_actual_campo)
         except Exception:
             self.set_controller_value('lbs_ha_actual_campo', "Error")
 
     def calcular_lbs_ha_consumo(self):
         """Calcula LBS/Ha consumo"""
         try:
-            densidad_consumo = self.parse_formatted_number(
-                self.get_controller_value('densidad_consumo_im2'))
-            peso_actual_gdia = self.parse_formatted_number(
-                self.get_controller_value('peso_actual_gdia'))
+            densidad_consumo = self.estado.densidad_consumo_im2
+            peso_actual_gdia = self.estado.peso_actual_gdia
             lbs_ha_consumo = densidad_consumo * peso_actual_gdia * 22
 
-            self.set_controller_value(
-                'lbs_ha_consumo', f"{lbs_ha_consumo:.2f}")
+            self._fijar('lbs_ha_consumo', lbs_ha_consumo)
         except Exception:
             self.set_controller_value('lbs_ha_consumo', "Error")
 
     def calcular_lbs_tolva_actual(self):
         """Calcula LBS TOLVA actual - Equivalente a calcularLBSTOLVAACTUAL en Dart"""
-        lbs_actual_campo = self.parse_formatted_number(
-            self.get_controller_value('lbs_ha_actual_campo'))
-        aa_controller = self.parse_formatted_number(
-            self.get_controller_value('numero_aa'))
-        hectareas = self.parse_formatted_number(
-            self.get_controller_value('hectareas'))
+        lbs_actual_campo = self.estado.lbs_ha_actual_campo
+        aa_controller = self.estado.numero_aa
+        hectareas = self.estado.hectareas
 
         if aa_controller == 0:
-            self.set_controller_value('lbs_tolva_actual_campo', "0.00")
+            self._fijar('lbs_tolva_actual_campo', 0.0)
             return
 
         lbs_ha_actual_campo = (lbs_actual_campo * hectareas) / aa_controller
-        self.set_controller_value(
-            'lbs_tolva_actual_campo', f"{lbs_ha_actual_campo:.2f}")
+        self._fijar('lbs_tolva_actual_campo', lbs_ha_actual_campo)
 
     def calcular_lbs_tolva_consumo(self):
         """Calcula LBS TOLVA consumo - Equivalente a calcularLBSTOLVAConsumo en Dart"""
         try:
-            aa_controller = self.parse_formatted_number(
-                self.get_controller_value('numero_aa'))
-            lbs_ha_consumo = self.parse_formatted_number(
-                self.get_controller_value('lbs_ha_consumo'))
-            hectarea = self.parse_formatted_number(
-                self.get_controller_value('hectareas'))
+            aa_controller = self.estado.numero_aa
+            lbs_ha_consumo = self.estado.lbs_ha_consumo
+            hectarea = self.estado.hectareas
 
             if aa_controller == 0:
-                self.set_controller_value('lbs_tolva_segun_consumo', "0.00")
+                self._fijar('lbs_tolva_segun_consumo', 0.0)
                 return
 
             lbs_tolva_consumo = (lbs_ha_consumo * hectarea) / aa_controller
 
-            self.set_controller_value(
-                'lbs_tolva_segun_consumo', f"{lbs_tolva_consumo:.2f}")
+            self._fijar('lbs_tolva_segun_consumo', lbs_tolva_consumo)
         except Exception:
             self.set_controller_value('lbs_tolva_segun_consumo', "Error")
 
     def calcular_libras_totales_campo(self):
         """Calcula libras totales campo"""
-        lbs_actual_campo = self.parse_formatted_number(
-            self.get_controller_value('lbs_ha_actual_campo'))
-        area_hectarea = self.parse_formatted_number(
-            self.get_controller_value('hectareas'))
+        lbs_actual_campo = self.estado.lbs_ha_actual_campo
+        area_hectarea = self.estado.hectareas
         libras_totales_campo = lbs_actual_campo * area_hectarea
         # Formatear el resultado si es un número grande
-        self.set_controller_value(
-            'libras_totales_campo', self.format_number(libras_totales_campo))
+        self._fijar('libras_totales_campo', libras_totales_campo)
         print(f"Libras totales campo calculado: "
               f"{self.format_number(libras_totales_campo)}")
 
     def calcular_libras_totales_consumo(self):
         """Calcula libras totales consumo"""
-        lbs_actual_consumo = self.parse_formatted_number(
-            self.get_controller_value('lbs_ha_consumo'))
-        area_hectarea = self.parse_formatted_number(
-            self.get_controller_value('hectareas'))
+        lbs_actual_consumo = self.estado.lbs_ha_consumo
+        area_hectarea = self.estado.hectareas
         libras_totales_consumo = lbs_actual_consumo * area_hectarea
         # Formatear el resultado si es un número grande
-        self.set_controller_value(
-            'libras_totales_consumo', self.format_number(libras_totales_consumo))
+        self._fijar('libras_totales_consumo', libras_totales_consumo)
         print(f"Libras totales consumo calculado: "
               f"{self.format_number(libras_totales_consumo)}")
 
@@ -1849,76 +1932,37 @@ class AquacultureCalculator:
         """Calcula HP/Ha"""
         aereador_mecanico_hp = 16.00
         rendimiento_estado_y_mantenimiento = 1
-        numero_aireadores_mecanicos = self.parse_formatted_number(
-            self.get_controller_value('h_aireadores_mecanicos'))
-        hectareaje = self.parse_formatted_number(
-            self.get_controller_value('hectareas'))
+        numero_aireadores_mecanicos = self.estado.h_aireadores_mecanicos
+        hectareaje = self.estado.hectareas
         if hectareaje == 0:
-            self.set_controller_value('hp_ha', "0.00")
+            self._fijar('hp_ha', 0.0)
             return
         hp_ha_value = (numero_aireadores_mecanicos * aereador_mecanico_hp) / \
             (hectareaje * rendimiento_estado_y_mantenimiento)
-        self.set_controller_value('hp_ha', f"{hp_ha_value:.2f}")
+        self._fijar('hp_ha', hp_ha_value)
 
     def libras_totales_consumo(self):
         """Calcula libras totales consumo"""
-        lbs_actual_consumo = self.parse_formatted_number(
-            self.get_controller_value('lbs_ha_consumo'))
-        area_hectarea = self.parse_formatted_number(
-            self.get_controller_value('hectareas'))
+        lbs_actual_consumo = self.estado.lbs_ha_consumo
+        area_hectarea = self.estado.hectareas
         libras_totales_consumo = lbs_actual_consumo * area_hectarea
         # Formatear el resultado si es un número grande
-        self.set_controller_value(
-            'libras_totales_consumo', self.format_number(libras_totales_consumo))
+        self._fijar('libras_totales_consumo', libras_totales_consumo)
         print(f"Libras totales consumo calculado: "
               f"{self.format_number(libras_totales_consumo)}")
 
     def calcular_todos_los_valores(self):
-        """Ejecuta todos los cálculos en el orden correcto"""
-        # Cálculos básicos
-        self.calcular_edad_cultivo()
-        self.incremento_gr()
-        self.calcular_crecimiento_actual()
-
-        # Cálculos de densidad y alimento
-        self.calcular_densidad_consumo()
-        self.calcular_kg_100mil()
-        self.calcular_sacos_actuales()
-
-        # Cálculos de días de la semana
-        self.calcular_lunes_dia1()
-        self.calcular_domingo_dia7()
-        self.calcular_martes_dia2()
-        self.calcular_miercoles_dia3()
-        self.calcular_jueves_dia4()
-        self.calcular_viernes_dia5()
-        self.calcular_sabado_dia6()
-
-        # Cálculos semanales
-        self.calcular_recomendation_semana()
-        self.calcular_acumulado_semanal()
-
-        # Cálculos de aireación
-        self.calcular_aireadores_diesel()
-        self.calcular_capacidad_carga_aireaccion()
-
-        # Cálculos de libras y peso
-        self.calcular_lbs_ha_actual_campo()
-        self.calcular_lbs_ha_consumo()
-        self.calcular_libras_totales_campo()
-        self.calcular_libras_totales_consumo()
-        self.calcular_lbs_tolva_actual()
-        self.calcular_lbs_tolva_consumo()
-
-        # Cálculos finales
-        self.calcular_hp_ha()
-        self.calcular_rendimiento_lbs_saco()
-        self.calcular_recomendacion_lbs_ha()
-        self.libras_totales_por_aireador()
-        # self.calcular_acumulado_actual_lbs()
-        self.fca_campo()
-        self.fca_consumo()
-        self.diferencia_campo_biologo()
+        """Evalúa el grafo de cálculo (GRAFO_ALIMENTACION).
+
+        Solo se recalculan las fórmulas cuyas entradas cambiaron desde la
+        última evaluación; sin cambios la llamada no hace nada.
+        """
+        self._evaluando = True
+        try:
+            self.nodos_evaluados += GRAFO_ALIMENTACION.evaluar(
+                self, self._pendientes)
+        finally:
+            self._evaluando = False
 
     def generar_resultados_finales(self, input_data):
         """Genera el diccionario final con todos los resultados"""
@@ -1926,56 +1970,31 @@ class AquacultureCalculator:
         self.calcular_todos_los_valores()
 
         # Obtenemos los valores de los controladores
-        hectareas = self.parse_formatted_number(
-            self.get_controller_value('hectareas'))
-        edad_cultivo = self.parse_formatted_number(
-            self.get_controller_value('edad_cultivo'))
-        crecimiento_actual = self.parse_formatted_number(
-            self.get_controller_value('crecim_actual_gdia'))
-        peso_anterior = self.parse_formatted_number(
-            self.get_controller_value('peso_anterior'))
-        peso_actual = self.parse_formatted_number(
-            self.get_controller_value('peso_actual_gdia'))
-        densidad_consumo = self.parse_formatted_number(
-            self.get_controller_value('densidad_consumo_im2'))
-        alimento_kg = self.parse_formatted_number(
-            self.get_controller_value('alimento_actual_kg'))
-        sacos_actuales = self.parse_formatted_number(
-            self.get_controller_value('sacos_actuales'))
-        densidad_biologo = self.parse_formatted_number(
-            self.get_controller_value('densidad_biologo_indm2'))
-        lunes_dia1 = self.parse_formatted_number(
-            self.get_controller_value('lunes_dia1'))
-        martes_dia2 = self.parse_formatted_number(
-            self.get_controller_value('martes_dia2'))
-        miercoles_dia3 = self.parse_formatted_number(
-            self.get_controller_value('miercoles_dia3'))
-        jueves_dia4 = self.parse_formatted_number(
-            self.get_controller_value('jueves_dia4'))
-        viernes_dia5 = self.parse_formatted_number(
-            self.get_controller_value('viernes_dia5'))
-        sabado_dia6 = self.parse_formatted_number(
-            self.get_controller_value('sabado_dia6'))
-        domingo_dia7 = self.parse_formatted_number(
-            self.get_controller_value('domingo_dia7'))
-        recomendation_semana = self.parse_formatted_number(
-            self.get_controller_value('recomendation_semana'))
-        acumulado_semanal = self.parse_formatted_number(
-            self.get_controller_value('acumulado_semanal'))
-        numeroAA = self.parse_formatted_number(
-            self.get_controller_value('numero_aa'))
-        aireadores = self.parse_formatted_number(
-            self.get_controller_value('h_aireadores_mecanicos'))
-        LBSha_campo = self.parse_formatted_number(
-            self.get_controller_value('lbs_ha_actual_campo'))
-        LBSha_consumo = self.parse_formatted_number(
-            self.get_controller_value('lbs_ha_consumo'))
-        incremento_gr = self.parse_formatted_number(
-            self.get_controller_value('incremento_gr'))
-        acumulado_LBS = self.parse_formatted_number(
-            self.get_controller_value('acumulado_actual_lbs'))
-        libras_totales_consumo = self.parse_formatted_number(
-            self.get_controller_value('libras_totales_consumo'))
+        hectareas = self.estado.hectareas
+        edad_cultivo = self.estado.edad_cultivo
+        crecimiento_actual = self.estado.crecim_actual_gdia
+        peso_anterior = self.estado.peso_anterior
+        peso_actual = self.estado.peso_actual_gdia
+        densidad_consumo = self.estado.densidad_consumo_im2
+        alimento_kg = self.estado.alimento_actual_kg
+        sacos_actuales = self.estado.sacos_actuales
+        densidad_biologo = self.estado.densidad_biologo_indm2
+        lunes_dia1 = self.estado.lunes_dia1
+        martes_dia2 = self.estado.martes_dia2
+        miercoles_dia3 = self.estado.miercoles_dia3
+        jueves_dia4 = self.estado.jueves_dia4
+        viernes_dia5 = self.estado.viernes_dia5
+        sabado_dia6 = self.estado.sabado_dia6
+        domingo_dia7 = self.estado.domingo_dia7
+        recomendation_semana = self.estado.recomendation_semana
+        acumulado_semanal = self.estado.acumulado_semanal
+        numeroAA = self.estado.numero_aa
+        aireadores = self.estado.h_aireadores_mecanicos
+        LBSha_campo = self.estado.lbs_ha_actual_campo
+        LBSha_consumo = self.estado.lbs_ha_consumo
+        incremento_gr = self.estado.incremento_gr
+        acumulado_LBS = self.estado.acumulado_actual_lbs
+        libras_totales_consumo = self.estado.libras_totales_consumo
 
         # --- Resultados finales con todas las llaves ---
         resultados_finales = {
@@ -2062,8 +2081,7 @@ class AquacultureCalculator:
 
         # Comparar peso siembra si está disponible
         if datos_adicionales.get('Pesosiembra') is not None:
-            peso_siembra_calculado = self.parse_formatted_number(
-                self.get_controller_value('peso_siembra'))
+            peso_siembra_calculado = self.estado.peso_siembra
             if peso_siembra_calculado > 0:
                 diferencias['peso_siembra'] = {
                     'flutter': datos_adicionales['Pesosiembra'],
@@ -2074,8 +2092,7 @@ class AquacultureCalculator:
 
         # Comparar incremento en gramos
         if datos_adicionales.get('Incrementogr') is not None:
-            incremento_calculado = self.parse_formatted_number(
-                self.get_controller_value('incremento_gr'))
+            incremento_calculado = self.estado.incremento_gr
             if incremento_calculado > 0:
                 diferencias['incremento_gr'] = {
                     'flutter': datos_adicionales['Incrementogr'],
@@ -2128,12 +2145,9 @@ class AquacultureCalculator:
 
         try:
             # Eficiencia de aireación
-            libras_totales = self.parse_formatted_number(
-                self.get_controller_value('libras_totales_campo'))
-            aireadores = self.parse_formatted_number(
-                self.get_controller_value('h_aireadores_mecanicos'))
-            hectareas = self.parse_formatted_number(
-                self.get_controller_value('hectareas'))
+            libras_totales = self.estado.libras_totales_campo
+            aireadores = self.estado.h_aireadores_mecanicos
+            hectareas = self.estado.hectareas
 
             if aireadores > 0 and hectareas > 0:
                 metricas['eficiencia_aireacion'] = {
@@ -2143,10 +2157,8 @@ class AquacultureCalculator:
                 }
 
             # Eficiencia alimenticia
-            alimento_kg = self.parse_formatted_number(
-                self.get_controller_value('alimento_actual_kg'))
-            fca_campo = self.parse_formatted_number(
-                self.get_controller_value('fca_campo'))
+            alimento_kg = self.estado.alimento_actual_kg
+            fca_campo = self.estado.fca_campo
 
             if alimento_kg > 0 and libras_totales > 0:
                 biomasa_kg = libras_totales * 0.453592  # lbs a kg
@@ -2157,10 +2169,8 @@ class AquacultureCalculator:
                 }
 
             # Productividad por unidad de área
-            peso_actual = self.parse_formatted_number(
-                self.get_controller_value('peso_actual_gdia'))
-            densidad = self.parse_formatted_number(
-                self.get_controller_value('densidad_biologo_indm2'))
+            peso_actual = self.estado.peso_actual_gdia
+            densidad = self.estado.densidad_biologo_indm2
 
             if peso_actual > 0 and densidad > 0:
                 metricas['productividad'] = {
@@ -2234,8 +2244,7 @@ class AquacultureCalculator:
         validaciones = {}
 
         # Validar peso actual
-        peso_actual = self.parse_formatted_number(
-            self.get_controller_value('peso_actual_gdia'))
+        peso_actual = self.estado.peso_actual_gdia
         validaciones['peso_actual'] = {
             'valor': peso_actual,
             'valido': 0.1 <= peso_actual <= 100,
@@ -2243,8 +2252,7 @@ class AquacultureCalculator:
         }
 
         # Validar densidad
-        densidad = self.parse_formatted_number(
-            self.get_controller_value('densidad_biologo_indm2'))
+        densidad = self.estado.densidad_biologo_indm2
         validaciones['densidad'] = {
             'valor': densidad,
             'valido': 1 <= densidad <= 50,
@@ -2252,8 +2260,7 @@ class AquacultureCalculator:
         }
 
         # Validar FCA
-        fca = self.parse_formatted_number(
-            self.get_controller_value('fca_campo'))
+        fca = self.estado.fca_campo
         validaciones['fca'] = {
             'valor': fca,
             'valido': 0.5 <= fca <= 3.0,
@@ -2267,8 +2274,7 @@ class AquacultureCalculator:
         validaciones = {}
 
         # Validar crecimiento
-        crecimiento = self.parse_formatted_number(
-            self.get_controller_value('crecim_actual_gdia'))
+        crecimiento = self.estado.crecim_actual_gdia
         validaciones['crecimiento'] = {
             'valor': crecimiento,
             'optimo': 0.8 <= crecimiento <= 1.5,
@@ -2283,10 +2289,8 @@ class AquacultureCalculator:
         validaciones = {}
 
         # Consistencia entre densidades
-        densidad_biologo = self.parse_formatted_number(
-            self.get_controller_value('densidad_biologo_indm2'))
-        densidad_consumo = self.parse_formatted_number(
-            self.get_controller_value('densidad_consumo_im2'))
+        densidad_biologo = self.estado.densidad_biologo_indm2
+        densidad_consumo = self.estado.densidad_consumo_im2
 
         if densidad_biologo > 0 and densidad_consumo > 0:
             diferencia_pct = abs(densidad_biologo -
@@ -2351,6 +2355,105 @@ class AquacultureCalculator:
             print(f"Error al guardar análisis: {e}")
 
 
+# Fórmulas del calculador con los campos que leen y escriben. El orden de
+# declaración es el de la planilla; el grafo solo lo altera si una
+# dependencia lo exige.
+GRAFO_ALIMENTACION = GrafoCalculo([
+    # Cálculos básicos
+    Nodo('calcular_edad_cultivo',
+         ['edad_cultivo', 'fecha_siembra', 'fecha_muestreo'],
+         ['edad_cultivo']),
+    Nodo('incremento_gr', ['peso_actual_gdia', 'peso_anterior'],
+         ['incremento_gr']),
+    # Encadena peso proyectado y crecimiento esperado (solo con edad > 0)
+    Nodo('calcular_crecimiento_actual',
+         ['peso_actual_gdia', 'peso_siembra', 'edad_cultivo'],
+         ['crecim_actual_gdia', 'peso_proyectado_gdia',
+          'crecimiento_esperado_sem']),
+
+    # Cálculos de densidad y alimento
+    Nodo('calcular_densidad_consumo',
+         ['alimento_actual_kg', 'alimentoactualkg', 'hectareas',
+          'peso_actual_gdia', 'pesos_alimento'],
+         ['densidad_consumo_im2']),
+    Nodo('calcular_kg_100mil',
+         ['alimento_actual_kg', 'hectareas', 'densidad_consumo_im2'],
+         ['kg_100mil']),
+    Nodo('calcular_sacos_actuales', ['alimento_actual_kg'],
+         ['sacos_actuales']),
+
+    # Cálculos de días de la semana
+    Nodo('calcular_lunes_dia1',
+         ['peso_actual_gdia', 'hectareas', 'densidad_biologo_indm2',
+          'pesos_alimento'],
+         ['lunes_dia1']),
+    Nodo('calcular_domingo_dia7',
+         ['peso_proyectado_gdia', 'hectareas', 'densidad_biologo_indm2',
+          'pesos_alimento'],
+         ['domingo_dia7']),
+    Nodo('calcular_martes_dia2', ['lunes_dia1', 'domingo_dia7'],
+         ['martes_dia2']),
+    Nodo('calcular_miercoles_dia3', ['lunes_dia1', 'domingo_dia7'],
+         ['miercoles_dia3']),
+    Nodo('calcular_jueves_dia4', ['lunes_dia1', 'domingo_dia7'],
+         ['jueves_dia4']),
+    Nodo('calcular_viernes_dia5', ['lunes_dia1', 'domingo_dia7'],
+         ['viernes_dia5']),
+    Nodo('calcular_sabado_dia6', ['lunes_dia1', 'domingo_dia7'],
+         ['sabado_dia6']),
+
+    # Cálculos semanales
+    Nodo('calcular_recomendation_semana',
+         ['lunes_dia1', 'martes_dia2', 'miercoles_dia3', 'jueves_dia4',
+          'viernes_dia5', 'sabado_dia6', 'domingo_dia7'],
+         ['recomendation_semana']),
+    Nodo('calcular_acumulado_semanal', ['recomendation_semana'],
+         ['acumulado_semanal']),
+
+    # Cálculos de aireación
+    Nodo('calcular_aireadores_diesel',
+         ['h_aireadores_mecanicos', 'hectareas'], ['aireadores_diesel']),
+    Nodo('calcular_capacidad_carga_aireaccion',
+         ['aireadores_diesel', 'hectareas'], ['capacidad_carga_aireaccion']),
+
+    # Cálculos de libras y peso
+    Nodo('calcular_lbs_ha_actual_campo',
+         ['densidad_biologo_indm2', 'peso_actual_gdia'],
+         ['lbs_ha_actual_campo']),
+    Nodo('calcular_lbs_ha_consumo',
+         ['densidad_consumo_im2', 'peso_actual_gdia'], ['lbs_ha_consumo']),
+    Nodo('calcular_libras_totales_campo',
+         ['lbs_ha_actual_campo', 'hectareas'], ['libras_totales_campo']),
+    Nodo('calcular_libras_totales_consumo',
+         ['lbs_ha_consumo', 'hectareas'], ['libras_totales_consumo']),
+    Nodo('calcular_lbs_tolva_actual',
+         ['lbs_ha_actual_campo', 'numero_aa', 'hectareas'],
+         ['lbs_tolva_actual_campo']),
+    Nodo('calcular_lbs_tolva_consumo',
+         ['numero_aa', 'lbs_ha_consumo', 'hectareas'],
+         ['lbs_tolva_segun_consumo']),
+
+    # Cálculos finales
+    Nodo('calcular_hp_ha', ['h_aireadores_mecanicos', 'hectareas'],
+         ['hp_ha']),
+    Nodo('calcular_rendimiento_lbs_saco',
+         ['lbs_ha_actual_campo', 'hectareas', 'alimento_actual_kg'],
+         ['rendimiento_lbs_saco']),
+    Nodo('calcular_recomendacion_lbs_ha', ['hectareas'],
+         ['recomendacion_lbs_ha']),
+    Nodo('libras_totales_por_aireador',
+         ['libras_totales_campo', 'h_aireadores_mecanicos'],
+         ['libras_totales_por_aireador']),
+    Nodo('fca_campo', ['acumulado_actual_lbs', 'libras_totales_campo'],
+         ['fca_campo']),
+    Nodo('fca_consumo', ['acumulado_actual_lbs', 'libras_totales_consumo'],
+         ['fca_consumo']),
+    Nodo('diferencia_campo_biologo',
+         ['densidad_consumo_im2', 'densidad_biologo_indm2'],
+         ['diferencia_campo_biologo']),
+])
+
+
 # Ejemplo de uso
 if __name__ == "__main__":
     calculator = AquacultureCalculator()
@@ -1,10 +1,17 @@
+import time
 import numpy as np
-import joblib
-import requests
 from decouple import config
-from google.cloud import storage
 from fastapi import HTTPException
+from typing import Any, Dict, List, Optional, Tuple
 from pydantic import BaseModel
+from app.artifact_store import artifact_store
+from app.dispatcher import despachador_inferencia
+from app.inference import compilar_inferencia, compilar_nucleo
+from app.gcs import separar_ruta_gcs
+from app.mmap_artifacts import artefactos_mapeados
+from app.model_registry import model_registry
+from app.rendimiento import CargadorRendimiento
+from app.surface import Superficie
 
 
 # Modelos de datos para FastAPI
@@ -13,6 +20,8 @@ class PredictionRequest(BaseModel):
     AnimalesM: float
     Hectareas: float
     Piscinas: int
+    # "relajacion" (por defecto) o "brent"
+    Solver: Optional[str] = None
 
 
 # Rutas de los archivos (modelo y scaler por finca)
@@ -43,161 +52,497 @@ modelos = {
     }
 }
 
-# Inicializar datos de rendimiento
-rendimiento_path = str(config("RENDIMIENTO_PATH"))
-rendimiento_data = None
+# Evaluar scaler y modelo con NumPy puro en lugar de sklearn (si se soporta)
+INFERENCIA_COMPILADA = config('INFERENCIA_COMPILADA', default=True, cast=bool)
 
-# Descargar el JSON de rendimiento desde la URL
-try:
-    response = requests.get(rendimiento_path)
+# Solver de la inversión de AnimalesM cuando la solicitud no indica uno
+PREDICT_SOLVER = config('PREDICT_SOLVER', default='relajacion')
 
-    # Verificar si la solicitud fue exitosa
-    if response.status_code == 200:
-        try:
-            rendimiento_data = response.json()
-        except requests.exceptions.JSONDecodeError:
-            print("Error al decodificar el JSON, contenido de la respuesta:")
-            # Imprimir el contenido para ver qué se recibió
-            print(response.text)
-            rendimiento_data = None
-    else:
-        print(f"Error al descargar el archivo: {response.status_code}")
-        print(response.text)  # Imprimir el mensaje de error
-        rendimiento_data = None
-except Exception as e:
-    print(f"Error al conectar con el servidor: {e}")
-    rendimiento_data = None
-
-# Convertir a un diccionario de búsqueda si los datos están disponibles
-if rendimiento_data and "rows" in rendimiento_data:
-    rendimiento_dict = {int(row["Gramos"]): int(row["Rendimiento"])
-                        for row in rendimiento_data["rows"]}
-else:
-    # Datos de respaldo si no se pueden cargar los datos de rendimiento
-    print("No se pudieron cargar los datos de rendimiento, "
-          "usando datos por defecto")
-    rendimiento_dict = {
-        10: 85, 15: 88, 20: 90, 25: 92, 30: 94, 35: 96, 40: 98, 45: 100
-    }
+# Superficie de respuesta precalculada por finca (modo approx de /predict)
+SUPERFICIE_PATH = config(
+    'SUPERFICIE_PATH',
+    default='gs://azaktilsa_fincas/superficie/superficie_{finca}.npz')
+# Tras un fallo al cargar la superficie no se reintenta antes de esto
+SUPERFICIE_REINTENTO_S = config(
+    'SUPERFICIE_REINTENTO_S', default=60.0, cast=float)
+
+# finca → instante (monotonic) del último fallo al cargar su superficie
+_superficies_fallidas: Dict[str, float] = {}
+
+# Tabla de rendimiento: se sirve la última copia buena (cache local o
+# respaldo) mientras se descarga y refresca en segundo plano
+rendimiento_path = str(config("RENDIMIENTO_PATH"))
+cargador_rendimiento = CargadorRendimiento(rendimiento_path)
 
 
 def obtener_rendimiento(gramos_predicho):
     """Obtiene el rendimiento basado en los gramos predichos"""
-    return rendimiento_dict.get(gramos_predicho, rendimiento_dict[
-        min(rendimiento_dict.keys(), key=lambda x: abs(x - gramos_predicho))])
+    return cargador_rendimiento.tabla().obtener(gramos_predicho)
 
 
 def descargar_modelo(bucket_name, source_blob_name, destination_file_name):
-    """Descarga un modelo desde Google Cloud Storage"""
-    # Crear el cliente de Google Cloud Storage
-    storage_client = storage.Client()
+    """Descarga un modelo desde Google Cloud Storage.
+
+    Si la copia local ya corresponde a la generación vigente del blob no
+    se vuelve a descargar.
+    """
+    artifact_store.sincronizar(
+        bucket_name, source_blob_name, destination_file_name)
 
-    # Referenciar el bucket
-    bucket = storage_client.bucket(bucket_name)
 
-    # Referenciar el blob (archivo dentro del bucket)
-    blob = bucket.blob(source_blob_name)
+def _cargar_artefactos(finca):
+    """Devuelve (modelo, scaler, inferencia compilada) residentes en memoria.
 
-    # Descargar el archivo al sistema local temporalmente
-    blob.download_to_filename(destination_file_name)
+    Los artefactos quedan residentes en `model_registry`, por lo que solo
+    la primera solicitud de cada finca descarga y deserializa los archivos.
+    Las solicitudes concurrentes de una finca en frío comparten una sola
+    descarga.
+    """
+    return model_registry.obtener(
+        f"animal:{finca}", lambda: _descargar_y_cargar_artefactos(finca))
 
 
 def cargar_modelo_y_scaler(finca):
-    """Carga el modelo y scaler para una finca específica"""
-    modelo_path = modelos[finca]['modelo']
-    scaler_path = modelos[finca]['scaler']
+    """Carga el modelo y scaler para una finca específica.
+
+    El modelo es None si se liberó porque el núcleo compilado lo sustituye.
+    """
+    best_model, scaler, _ = _cargar_artefactos(finca)
+    return best_model, scaler
 
-    modelo_bucket_name, modelo_blob_name = modelo_path.replace(
-        "gs://", "").split("/", 1)
-    scaler_bucket_name, scaler_blob_name = scaler_path.replace(
-        "gs://", "").split("/", 1)
+
+def cargar_inferencia(finca):
+    """Carga la cadena scaler → modelo compilada para una finca"""
+    return _cargar_artefactos(finca)[2]
+
+
+def _descargar_y_cargar_artefactos(finca):
+    """Descarga desde GCS y deserializa el modelo y scaler de la finca.
+
+    Con copias mapeadas vigentes para la generación actual de los blobs
+    no se descarga nada.
+    """
+    modelo_bucket_name, modelo_blob_name = separar_ruta_gcs(
+        modelos[finca]['modelo'])
+    scaler_bucket_name, scaler_blob_name = separar_ruta_gcs(
+        modelos[finca]['scaler'])
 
     modelo_local = f"/tmp/{finca}_modelo.pkl"
     scaler_local = f"/tmp/{finca}_scaler.pkl"
 
-    descargar_modelo(modelo_bucket_name, modelo_blob_name, modelo_local)
-    descargar_modelo(scaler_bucket_name, scaler_blob_name, scaler_local)
+    best_model, firma_modelo = artefactos_mapeados.sincronizar_y_cargar(
+        modelo_bucket_name, modelo_blob_name, modelo_local)
+    scaler, _ = artefactos_mapeados.sincronizar_y_cargar(
+        scaler_bucket_name, scaler_blob_name, scaler_local)
+
+    # El núcleo compilado también se mapea para compartirlo entre procesos
+    nucleo = artefactos_mapeados.cargar_nucleo(
+        modelo_local, lambda: compilar_nucleo(best_model),
+        firma=firma_modelo) if INFERENCIA_COMPILADA else None
+    inferencia = compilar_inferencia(
+        best_model, scaler, compilar=INFERENCIA_COMPILADA, nucleo=nucleo)
+    # Verificado el núcleo, el bosque de sklearn no se guarda en el registro
+    inferencia.liberar_modelo()
+    print(f"🧮 Inferencia para {finca}: {inferencia.describir()}")
+
+    # El tamaño en disco sirve como estimación de la memoria ocupada
+    tamano = (artefactos_mapeados.tamano(modelo_local) +
+              artefactos_mapeados.tamano(scaler_local) + inferencia.nbytes)
+
+    return (inferencia.modelo, scaler, inferencia), tamano
+
+
+def cargar_superficie(finca):
+    """Superficie de respuesta de la finca o None si no está disponible.
+
+    Solo las superficies cargadas quedan en el registro. Un fallo (blob
+    ausente o error transitorio de GCS) se recuerda durante
+    SUPERFICIE_REINTENTO_S para no reintentar la descarga en cada
+    solicitud aproximada, y después se vuelve a intentar.
+    """
+    fallo = _superficies_fallidas.get(finca)
+    if fallo is not None and \
+            time.monotonic() - fallo < SUPERFICIE_REINTENTO_S:
+        return None
+    try:
+        superficie = model_registry.obtener(
+            f"superficie:{finca}",
+            lambda: _descargar_y_cargar_superficie(finca))
+    except Exception as e:
+        print(f"⚠️ Superficie de {finca} no disponible: {e}")
+        _superficies_fallidas[finca] = time.monotonic()
+        return None
+    _superficies_fallidas.pop(finca, None)
+    return superficie
+
+
+def _descargar_y_cargar_superficie(finca):
+    ruta = SUPERFICIE_PATH.format(finca=finca)
+    if ruta.startswith("gs://"):
+        bucket_name, blob_name = separar_ruta_gcs(ruta)
+        local = f"/tmp/{finca}_superficie.npz"
+        descargar_modelo(bucket_name, blob_name, local)
+        ruta = local
+    superficie = Superficie.cargar(ruta)
+
+    print(f"🗺️ Superficie para {finca}: {superficie.describir()}")
+    return superficie, superficie.nbytes
+
+
+def _prediccion_aproximada(request: PredictionRequest):
+    """Respuesta interpolada o None si hay que usar el solver exacto"""
+    superficie = cargar_superficie(request.finca)
+    if superficie is None:
+        return None
+
+    consulta = superficie.consultar(
+        request.AnimalesM, request.Hectareas, request.Piscinas)
+    if consulta is None:
+        return None
+
+    valores = consulta["valores"]
+    hectareas = np.float64(request.Hectareas)
+    libras_x_ha = round(valores["LibrasXHA"], 2)
+    libras_total = round(hectareas * libras_x_ha, 2)
+
+    return {
+        "Consumo": valores["Consumo"],
+        "Gramos": int(round(valores["Gramos"])),
+        "KGXHA": round(valores["KGXHA"], 2),
+        "LibrasTotal": libras_total,
+        "LibrasXHA": libras_x_ha,
+        "Error2": round(libras_total * 0.98, 2),
+        "AnimalesM": round(valores["AnimalesM"], 2),
+        "metadatos": {
+            "solver": "superficie",
+            "error_estimado": consulta["error_estimado"]
+        }
+    }
 
-    best_model = joblib.load(modelo_local)
-    scaler = joblib.load(scaler_local)
 
-    return best_model, scaler
+# Configuración del margen de error de la inversión de AnimalesM
+margen_error = 0.01
+max_iteraciones = 100
+
+
+def _calcular_valores(consumo_predicho, gramos_modelo, hectareas_real):
+    """Variables dependientes de una predicción (Consumo, Gramos) del modelo"""
+    gramos_predicho = int(round(gramos_modelo))
+    peso = gramos_predicho
+    rendimiento_predicho = obtener_rendimiento(gramos_predicho)
+
+    # Recalcular variables dependientes
+    kg_x_ha_predicho = round(consumo_predicho / hectareas_real, 2)
+    libras_x_ha_predicho = round(
+        kg_x_ha_predicho * (rendimiento_predicho / 100) * 100, 2)
+    libras_total_predicho = round(
+        hectareas_real * libras_x_ha_predicho, 2)
+    error2_predicho = round(libras_total_predicho * 0.98, 2)
+    animales_m = round(
+        ((libras_x_ha_predicho * 454) / peso) / 10000, 2)
+
+    return {
+        "Consumo": consumo_predicho,
+        "Gramos": gramos_predicho,
+        "KGXHA": kg_x_ha_predicho,
+        "LibrasTotal": libras_total_predicho,
+        "LibrasXHA": libras_x_ha_predicho,
+        "Error2": error2_predicho,
+        "AnimalesM": animales_m
+    }
 
 
-def procesar_prediccion_animal(request: PredictionRequest):
-    """Procesa la predicción para un animal basado en los parámetros de entrada"""
+def _evaluar(predecir, valores_aniM, hect, pisc):
+    """Evalúa varios AnimalesM candidatos en una sola llamada al modelo"""
+    datos = np.column_stack([
+        valores_aniM,
+        np.full(len(valores_aniM), hect, dtype=np.float64),
+        np.full(len(valores_aniM), pisc, dtype=np.float64)
+    ])
+    prediccion = predecir(datos)
+    return [_calcular_valores(prediccion[i][0], prediccion[i][1], datos[i][1])
+            for i in range(len(valores_aniM))]
+
+
+def resolver_relajacion(predecir, aniM_inicial, hect, pisc):
+    """Inversión original: corrige AnimalesM con un factor fijo de 0.1"""
+    aniM = aniM_inicial
+    for iteracion in range(1, max_iteraciones + 1):
+        resultado = _evaluar(predecir, [aniM], hect, pisc)[0]
+        residuo = resultado["AnimalesM"] - aniM_inicial
+
+        # Verificar si se alcanzó el valor deseado
+        if abs(residuo) <= margen_error:
+            break
+
+        # Ajustar el valor de AnimalesM para la próxima iteración
+        aniM -= residuo * 0.1  # Factor de ajuste dinámico
+
+    return resultado, {
+        "solver": "relajacion",
+        "iteraciones": iteracion,
+        "llamadas_modelo": iteracion,
+        "residuo": float(residuo),
+        "convergio": bool(abs(residuo) <= margen_error)
+    }
 
-    # Extraer los valores del modelo
-    finca = request.finca
-    animales_m = request.AnimalesM
-    hectareas = request.Hectareas
-    piscinas = request.Piscinas
 
-    if not all([finca, animales_m, hectareas, piscinas]):
+def resolver_brent(predecir, aniM_inicial, hect, pisc,
+                   factores=np.geomspace(0.25, 4.0, 17)):
+    """Inversión por acotamiento y refinamiento secante/bisección.
+
+    1. Evalúa un vector de candidatos alrededor de AnimalesM en una sola
+       llamada al modelo y busca el cambio de signo más cercano.
+    2. Refina dentro del intervalo con pasos secantes (regla falsa de
+       Illinois), recurriendo a bisección cuando el paso sale del intervalo.
+
+    Si no se encuentra un intervalo con cambio de signo se usa la
+    relajación original.
+    """
+    candidatos = aniM_inicial * factores
+    resultados = _evaluar(predecir, candidatos, hect, pisc)
+    residuos = [r["AnimalesM"] - aniM_inicial for r in resultados]
+    llamadas = 1
+
+    # Mejor punto visto hasta ahora (menor |residuo|)
+    mejor = min(range(len(candidatos)), key=lambda i: abs(residuos[i]))
+    mejor_resultado, mejor_residuo = resultados[mejor], residuos[mejor]
+
+    intervalos = [i for i in range(len(candidatos) - 1)
+                  if residuos[i] * residuos[i + 1] <= 0]
+    if abs(mejor_residuo) > margen_error and not intervalos:
+        resultado, metadatos = resolver_relajacion(
+            predecir, aniM_inicial, hect, pisc)
+        metadatos["llamadas_modelo"] += llamadas
+        metadatos["solver"] = "brent->relajacion"
+        return resultado, metadatos
+
+    # Los residuos son escalonados (Gramos se redondea a entero), así que un
+    # intervalo puede encerrar un salto y no una raíz: en ese caso se pasa
+    # al siguiente intervalo más cercano al valor inicial.
+    intervalos.sort(key=lambda k: abs(
+        np.log(candidatos[k] * candidatos[k + 1]) / 2 - np.log(aniM_inicial)))
+    tolerancia_x = 1e-5 * abs(aniM_inicial)
+    iteraciones = 0
+
+    for i in intervalos:
+        if abs(mejor_residuo) <= margen_error or \
+                iteraciones >= max_iteraciones:
+            break
+        a, fa = candidatos[i], residuos[i]
+        b, fb = candidatos[i + 1], residuos[i + 1]
+        lado = 0
+
+        while iteraciones < max_iteraciones and abs(b - a) > tolerancia_x:
+            iteraciones += 1
+            x = b - fb * (b - a) / (fb - fa) if fb != fa else (a + b) / 2
+            if not min(a, b) < x < max(a, b):
+                x = (a + b) / 2
+
+            resultado = _evaluar(predecir, [x], hect, pisc)[0]
+            fx = resultado["AnimalesM"] - aniM_inicial
+            llamadas += 1
+
+            if abs(fx) < abs(mejor_residuo):
+                mejor_resultado, mejor_residuo = resultado, fx
+            if abs(fx) <= margen_error:
+                break
+
+            # Regla falsa de Illinois: reduce a la mitad el extremo estancado
+            if fx * fb < 0:
+                a, fa = b, fb
+                b, fb = x, fx
+                lado = 0
+            else:
+                b, fb = x, fx
+                if lado == -1:
+                    fa /= 2
+                lado = -1
+
+    return mejor_resultado, {
+        "solver": "brent",
+        "iteraciones": iteraciones,
+        "llamadas_modelo": llamadas,
+        "residuo": float(mejor_residuo),
+        "convergio": bool(abs(mejor_residuo) <= margen_error)
+    }
+
+
+SOLVERS = {
+    "relajacion": resolver_relajacion,
+    "brent": resolver_brent
+}
+
+
+def resolver_relajacion_lote(predecir, aniM_iniciales, hects, piscs):
+    """Relajación de muchas filas en paso sincronizado.
+
+    En cada iteración todas las filas que aún no convergen se evalúan en
+    una sola llamada al modelo; cada fila sale del lote al converger. Los
+    resultados por fila son idénticos a `resolver_relajacion`.
+
+    Returns:
+        (lista de (resultado, metadatos) por fila, llamadas al modelo)
+    """
+    n = len(aniM_iniciales)
+    aniM = np.asarray(aniM_iniciales, dtype=np.float64).copy()
+    hects = np.asarray(hects, dtype=np.float64)
+    piscs = np.asarray(piscs, dtype=np.float64)
+    activas = np.arange(n)
+    salida = [None] * n
+    llamadas = 0
+
+    for iteracion in range(1, max_iteraciones + 1):
+        if len(activas) == 0:
+            break
+        datos = np.column_stack([aniM[activas], hects[activas], piscs[activas]])
+        prediccion = predecir(datos)
+        llamadas += 1
+
+        siguen = []
+        for j, i in enumerate(activas):
+            resultado = _calcular_valores(
+                prediccion[j][0], prediccion[j][1], datos[j][1])
+            residuo = resultado["AnimalesM"] - aniM_iniciales[i]
+            convergio = abs(residuo) <= margen_error
+
+            if convergio or iteracion == max_iteraciones:
+                salida[i] = (resultado, {
+                    "solver": "relajacion",
+                    "iteraciones": iteracion,
+                    "llamadas_modelo": iteracion,
+                    "residuo": float(residuo),
+                    "convergio": bool(convergio)
+                })
+            else:
+                # Ajustar el valor de AnimalesM para la próxima iteración
+                aniM[i] -= residuo * 0.1
+                siguen.append(i)
+        activas = np.asarray(siguen, dtype=np.intp)
+
+    return salida, llamadas
+
+
+def _validar_solicitud(request: PredictionRequest) -> str:
+    """Valida la solicitud y devuelve el solver a usar"""
+    if not all([request.finca, request.AnimalesM, request.Hectareas,
+                request.Piscinas]):
         raise HTTPException(
             status_code=400,
             detail="Faltan parámetros requeridos"
         )
 
     # Verificar que la finca sea válida
-    if finca not in modelos:
+    if request.finca not in modelos:
         raise HTTPException(
             status_code=400,
-            detail=f"Finca {finca} no válida"
+            detail=f"Finca {request.finca} no válida"
         )
 
-    # Cargar el modelo y el escalador para la finca especificada
-    best_model, scaler = cargar_modelo_y_scaler(finca)
+    solver = (request.Solver or PREDICT_SOLVER).lower()
+    if solver not in SOLVERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Solver {solver} no válido. Opciones: {', '.join(SOLVERS)}"
+        )
+    return solver
 
-    # Parámetros iniciales de la predicción
-    aniM_inicial = animales_m
-    hect = hectareas
-    pisc = piscinas
 
-    # Configuración del margen de error
-    margen_error = 0.01
-    max_iteraciones = 100
+def procesar_prediccion_animal(request: PredictionRequest,
+                               approx: bool = False):
+    """Procesa la predicción para un animal basado en los parámetros de entrada.
 
-    aniM = aniM_inicial
-    for _ in range(max_iteraciones):
-        nuevo_dato = np.array([[aniM, hect, pisc]])
-        nuevo_dato_scaled = scaler.transform(nuevo_dato)
-        prediccion = best_model.predict(nuevo_dato_scaled)
-
-        # Recuperar valores
-        hectareas_real = nuevo_dato[0][1]
-        consumo_predicho = prediccion[0][0]
-        gramos_predicho = int(round(prediccion[0][1]))
-        peso = gramos_predicho
-        rendimiento_predicho = obtener_rendimiento(gramos_predicho)
-
-        # Recalcular variables dependientes
-        kg_x_ha_predicho = round(consumo_predicho / hectareas_real, 2)
-        libras_x_ha_predicho = round(
-            kg_x_ha_predicho * (rendimiento_predicho / 100) * 100, 2)
-        libras_total_predicho = round(
-            hectareas_real * libras_x_ha_predicho, 2)
-        error2_predicho = round(libras_total_predicho * 0.98, 2)
-        animales_m = round(
-            ((libras_x_ha_predicho * 454) / peso) / 10000, 2)
+    Con `approx=True` se interpola sobre la superficie precalculada de la
+    finca; si no existe o el punto queda fuera de la malla se usa el
+    solver exacto.
+    """
+    solver = _validar_solicitud(request)
 
-        # Verificar si se alcanzó el valor deseado
-        if abs(animales_m - aniM_inicial) <= margen_error:
-            break
+    if approx:
+        resultado = _prediccion_aproximada(request)
+        if resultado is not None:
+            return resultado
 
-        # Ajustar el valor de AnimalesM para la próxima iteración
-        aniM -= (animales_m - aniM_inicial) * \
-            0.1  # Factor de ajuste dinámico
+    # Cargar la cadena scaler → modelo compilada para la finca especificada
+    inferencia = cargar_inferencia(request.finca)
 
-    # Resultado de la predicción
-    resultado = {
-        "Consumo": consumo_predicho,
-        "Gramos": gramos_predicho,
-        "KGXHA": kg_x_ha_predicho,
-        "LibrasTotal": libras_total_predicho,
-        "LibrasXHA": libras_x_ha_predicho,
-        "Error2": error2_predicho,
-        "AnimalesM": animales_m
-    }
+    # Las evaluaciones se comparten con otras solicitudes concurrentes
+    # de la misma finca a través del despachador de micro-lotes
+    def predecir(X):
+        return despachador_inferencia.predecir(
+            request.finca, inferencia.predecir, X)
+
+    with despachador_inferencia.sesion(request.finca):
+        resultado, metadatos = SOLVERS[solver](
+            predecir, request.AnimalesM, request.Hectareas, request.Piscinas)
+    resultado["metadatos"] = metadatos
 
     return resultado
+
+
+def procesar_prediccion_animal_lote(requests: List[PredictionRequest]):
+    """Procesa muchas predicciones agrupándolas por finca.
+
+    Las filas con solver de relajación de una misma finca se resuelven en
+    paso sincronizado (una llamada al modelo por iteración para todo el
+    grupo); las que piden otro solver se resuelven una a una. Los errores
+    de validación se informan por fila sin detener el lote.
+    """
+    resultados: List[Dict[str, Any]] = [None] * len(requests)
+    # finca → [(índice de la fila, solver resuelto)]
+    grupos: Dict[str, List[Tuple[int, str]]] = {}
+    resumen_fincas: Dict[str, Dict[str, int]] = {}
+
+    for i, request in enumerate(requests):
+        try:
+            solver = _validar_solicitud(request)
+        except HTTPException as e:
+            resultados[i] = {"status": "error", "error": e.detail}
+            continue
+        grupos.setdefault(request.finca, []).append((i, solver))
+
+    for finca, filas in grupos.items():
+        try:
+            inferencia = cargar_inferencia(finca)
+        except Exception as e:
+            for i, _ in filas:
+                resultados[i] = {"status": "error", "error": str(e)}
+            continue
+
+        sincronizadas = [i for i, solver in filas if solver == "relajacion"]
+        individuales = [(i, solver) for i, solver in filas
+                        if solver != "relajacion"]
+        llamadas = 0
+
+        if sincronizadas:
+            salida, llamadas = resolver_relajacion_lote(
+                inferencia.predecir,
+                [requests[i].AnimalesM for i in sincronizadas],
+                [requests[i].Hectareas for i in sincronizadas],
+                [requests[i].Piscinas for i in sincronizadas])
+            for i, (resultado, metadatos) in zip(sincronizadas, salida):
+                resultado["metadatos"] = metadatos
+                resultados[i] = resultado
+
+        for i, solver in individuales:
+            request = requests[i]
+            resultado, metadatos = SOLVERS[solver](
+                inferencia.predecir, request.AnimalesM, request.Hectareas,
+                request.Piscinas)
+            resultado["metadatos"] = metadatos
+            resultados[i] = resultado
+            llamadas += metadatos["llamadas_modelo"]
+
+        resumen_fincas[finca] = {
+            "filas": len(filas),
+            "llamadas_modelo": llamadas
+        }
+
+    return {
+        "resultados": resultados,
+        "metadatos": {
+            "total": len(requests),
+            "errores": sum(1 for r in resultados if r.get("status") == "error"),
+            "fincas": resumen_fincas
+        }
+    }
@@ -0,0 +1,135 @@
+"""
+Almacén local de artefactos sincronizado por generación de GCS
+"""
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+
+from app.gcs import gcs
+
+
+class ArtifactStore:
+    """Sincroniza blobs de GCS con copias locales.
+
+    Junto a cada archivo descargado se guarda `<archivo>.meta.json` con la
+    generación, el md5 y el tamaño del blob. Solo se vuelve a descargar
+    cuando el objeto remoto cambió o la copia local no coincide.
+    """
+
+    SUFIJO_META = ".meta.json"
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._descargas = 0
+        self._reutilizados = 0
+        self._bytes_descargados = 0
+
+    def _ruta_meta(self, destino: str) -> str:
+        return destino + self.SUFIJO_META
+
+    def leer_meta(self, destino: str) -> Optional[Dict[str, Any]]:
+        """Lee los metadatos guardados junto a un artefacto local"""
+        try:
+            with open(self._ruta_meta(destino), 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _ruta_temporal(self, destino: str) -> str:
+        """Crea un archivo temporal junto a `destino` (mismo sistema de archivos)"""
+        directorio = os.path.dirname(destino) or "."
+        fd, ruta = tempfile.mkstemp(
+            dir=directorio, prefix=os.path.basename(destino) + ".",
+            suffix=".tmp")
+        os.close(fd)
+        return ruta
+
+    def _escribir_meta(self, destino: str, meta: Dict[str, Any]):
+        temporal = self._ruta_temporal(self._ruta_meta(destino))
+        with open(temporal, 'w') as f:
+            json.dump(meta, f)
+        os.replace(temporal, self._ruta_meta(destino))
+
+    def _copia_vigente(self, destino: str, meta_remota: Dict[str, Any]) -> bool:
+        """Indica si la copia local corresponde al blob remoto"""
+        if not os.path.exists(destino):
+            return False
+        meta_local = self.leer_meta(destino)
+        if not meta_local:
+            return False
+        return (meta_local.get("generation") == meta_remota["generation"] and
+                meta_local.get("md5_hash") == meta_remota["md5_hash"] and
+                os.path.getsize(destino) == meta_remota["size"])
+
+    def _obtener(self, bucket_name: str, source_blob_name: str):
+        # Solo metadatos: una petición ligera en lugar de la descarga completa
+        blob = gcs.obtener_blob(bucket_name, source_blob_name)
+        if blob is None:
+            raise FileNotFoundError(
+                f"No existe gs://{bucket_name}/{source_blob_name}")
+
+        return blob, {
+            "bucket": bucket_name,
+            "blob": source_blob_name,
+            "generation": blob.generation,
+            "md5_hash": blob.md5_hash,
+            "size": blob.size
+        }
+
+    def meta_remota(self, bucket_name: str,
+                    source_blob_name: str) -> Dict[str, Any]:
+        """Generación, md5 y tamaño del blob vigente, sin descargarlo"""
+        return self._obtener(bucket_name, source_blob_name)[1]
+
+    def eliminar(self, destino: str):
+        """Borra una copia local y sus metadatos"""
+        for ruta in (destino, self._ruta_meta(destino)):
+            if os.path.exists(ruta):
+                os.remove(ruta)
+
+    def sincronizar(self, bucket_name: str, source_blob_name: str,
+                    destination_file_name: str) -> bool:
+        """Deja en `destination_file_name` la versión vigente del blob.
+
+        Returns:
+            bool: True si hubo descarga, False si se reutilizó la copia local
+        """
+        blob, meta_remota = self._obtener(bucket_name, source_blob_name)
+
+        if self._copia_vigente(destination_file_name, meta_remota):
+            with self.lock:
+                self._reutilizados += 1
+            return False
+
+        # Se descarga a un nombre temporal y se renombra de forma atómica:
+        # quien lea `destination_file_name` nunca ve un archivo a medias.
+        # Fijar la generación evita mezclar contenido de dos versiones.
+        temporal = self._ruta_temporal(destination_file_name)
+        try:
+            gcs.descargar_archivo(blob, temporal)
+            os.replace(temporal, destination_file_name)
+        except BaseException:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            raise
+        self._escribir_meta(destination_file_name, meta_remota)
+
+        with self.lock:
+            self._descargas += 1
+            self._bytes_descargados += blob.size or 0
+        return True
+
+    def get_stats(self) -> Dict[str, int]:
+        """Obtener contadores de sincronización"""
+        with self.lock:
+            return {
+                "descargas": self._descargas,
+                "reutilizados": self._reutilizados,
+                "bytes_descargados": self._bytes_descargados
+            }
+
+
+# Instancia global del almacén de artefactos
+artifact_store = ArtifactStore()
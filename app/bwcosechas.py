@@ -0,0 +1,159 @@
+"""
+Tabla BWCosechas (referenciaTabla3) compilada para el BUSCARV aproximado
+
+`calcular_densidad_consumo`, `calcular_lunes_dia1` y `_calcular_logic`
+buscan el mayor peso ≤ consulta en `pesos_alimento_data['rows']`. La tabla
+se compila una vez por instantánea de datos: pesos float64 ordenados
+(ante pesos repetidos gana la primera fila, como en el recorrido
+original) y BWCosechas ya convertido a fracción decimal.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+
+def _parsear_bw(valor: Any) -> float:
+    """'9.15%' → 9.15 (porcentaje)"""
+    return float(str(valor).replace('%', '').strip())
+
+
+class TablaBWCosechas:
+    """Pesos ordenados y fracciones BWCosechas para búsquedas con searchsorted"""
+
+    def __init__(self, pesos_alimento_data: Dict[str, Any]):
+        self.hay_datos = bool(pesos_alimento_data) and \
+            'rows' in pesos_alimento_data
+        filas = pesos_alimento_data['rows'] if self.hay_datos else []
+        self.formato_valido = isinstance(filas, list)
+        # Solo las filas dict participan en la búsqueda
+        self.filas_validas = [fila for fila in filas if isinstance(fila, dict)] \
+            if self.formato_valido else []
+
+        # Primer error al convertir "Pesos" (los cálculos de días lo propagan)
+        self.error_pesos: Optional[str] = None
+        pesos, fracciones, crudos = [], [], []
+        for fila in self.filas_validas:
+            if "Pesos" not in fila or "BWCosechas" not in fila:
+                continue
+            try:
+                peso = float(str(fila["Pesos"]))
+            except (ValueError, TypeError) as e:
+                if self.error_pesos is None:
+                    self.error_pesos = str(e)
+                continue
+            try:
+                fraccion = _parsear_bw(fila["BWCosechas"]) / 100
+            except (ValueError, TypeError):
+                fraccion = np.nan
+            pesos.append(peso)
+            fracciones.append(fraccion)
+            crudos.append(fila["BWCosechas"])
+
+        pesos = np.asarray(pesos, dtype=np.float64)
+        orden = np.argsort(pesos, kind="stable")
+        # Con pesos repetidos se conserva la primera fila del JSON
+        if len(orden):
+            primero = np.r_[True, np.diff(pesos[orden]) != 0]
+            orden = orden[primero]
+        self.pesos = pesos[orden]
+        self.fracciones = np.asarray(fracciones, dtype=np.float64)[orden]
+        self._crudos = [crudos[i] for i in orden]
+        self._pesos_lista = self.pesos.tolist()
+        self._fracciones_lista = self.fracciones.tolist()
+
+        # Diccionario peso → BWCosechas (%) que guarda fetch_data_tabla3
+        self.referencia: Dict[float, float] = {}
+        self.error_referencia: Optional[str] = None
+        if self.formato_valido:
+            try:
+                for fila in filas:
+                    if 'Pesos' in fila and 'BWCosechas' in fila:
+                        self.referencia[float(fila['Pesos'])] = _parsear_bw(
+                            fila['BWCosechas'])
+            except Exception as e:
+                self.referencia = {}
+                self.error_referencia = str(e)
+
+    def __len__(self) -> int:
+        return len(self._pesos_lista)
+
+    def indice(self, peso: float, solo_positivos: bool = False) -> int:
+        """Posición del mayor peso ≤ `peso` o -1 si no hay.
+
+        Con `solo_positivos` se ignoran los pesos ≤ 0, como el recorrido
+        que arranca con `peso_encontrado = 0.0`.
+        """
+        if peso != peso:
+            return -1
+        i = int(np.searchsorted(self.pesos, peso, side="right")) - 1
+        if i >= 0 and solo_positivos and self._pesos_lista[i] <= 0:
+            return -1
+        return i
+
+    def buscar(self, peso: float, solo_positivos: bool = False
+               ) -> Optional[Tuple[float, float]]:
+        """(peso encontrado, fracción BWCosechas) o None.
+
+        Lanza ValueError si el BWCosechas de la fila encontrada no es numérico.
+        """
+        i = self.indice(peso, solo_positivos)
+        if i < 0:
+            return None
+        fraccion = self._fracciones_lista[i]
+        if fraccion != fraccion:
+            _parsear_bw(self._crudos[i])
+        return self._pesos_lista[i], fraccion
+
+    def indices_vector(self, pesos, solo_positivos: bool = False
+                       ) -> np.ndarray:
+        """Versión vectorizada de `indice`: posiciones, -1 si no hay"""
+        pesos = np.asarray(pesos, dtype=np.float64)
+        if not len(self):
+            return np.full(pesos.shape, -1, dtype=np.intp)
+
+        i = np.searchsorted(self.pesos, pesos, side="right") - 1
+        valido = (i >= 0) & ~np.isnan(pesos)
+        if solo_positivos:
+            valido &= self.pesos[np.maximum(i, 0)] > 0
+        return np.where(valido, i, -1)
+
+    def buscar_vector(self, pesos, solo_positivos: bool = False
+                      ) -> Tuple[np.ndarray, np.ndarray]:
+        """Versión vectorizada: (pesos encontrados, fracciones), NaN si no hay"""
+        i = self.indices_vector(pesos, solo_positivos)
+        if not len(self):
+            return np.full(i.shape, np.nan), np.full(i.shape, np.nan)
+
+        valido = i >= 0
+        i = np.maximum(i, 0)
+        return (np.where(valido, self.pesos[i], np.nan),
+                np.where(valido, self.fracciones[i], np.nan))
+
+
+_lock = threading.Lock()
+_tablas: "OrderedDict[int, Tuple[Any, TablaBWCosechas]]" = OrderedDict()
+_MAX_TABLAS = 4
+
+
+def tabla_bwcosechas(pesos_alimento_data: Dict[str, Any]) -> TablaBWCosechas:
+    """Tabla compilada para estos datos, compartida mientras sean los mismos.
+
+    Todas las calculadoras reciben la misma instantánea de pesos_alimento,
+    así que la tabla se compila una vez por versión de los datos.
+    """
+    clave = id(pesos_alimento_data)
+    with _lock:
+        entrada = _tablas.get(clave)
+        if entrada is not None and entrada[0] is pesos_alimento_data:
+            _tablas.move_to_end(clave)
+            return entrada[1]
+
+    tabla = TablaBWCosechas(pesos_alimento_data)
+    with _lock:
+        # Se guarda la referencia a los datos para que su id no se reutilice
+        _tablas[clave] = (pesos_alimento_data, tabla)
+        while len(_tablas) > _MAX_TABLAS:
+            _tablas.popitem(last=False)
+    return tabla
@@ -0,0 +1,113 @@
+"""
+Motor de cálculo por grafo de dependencias
+
+Cada fórmula del calculador se declara como un `Nodo` con los campos que
+lee y los que escribe. `GrafoCalculo` los ordena topológicamente una sola
+vez y evalúa solo los nodos pendientes: al cambiar un campo se marcan
+como pendientes los nodos que dependen de él, directa o indirectamente,
+y una evaluación sin cambios no recalcula nada.
+"""
+from typing import Any, Dict, FrozenSet, Iterable, List, Set, Tuple
+
+
+class Nodo:
+    """Fórmula: método del calculador con sus entradas y salidas"""
+
+    __slots__ = ("metodo", "entradas", "salidas")
+
+    def __init__(self, metodo: str, entradas: Iterable[str],
+                 salidas: Iterable[str]):
+        self.metodo = metodo
+        self.entradas: Tuple[str, ...] = tuple(entradas)
+        self.salidas: Tuple[str, ...] = tuple(salidas)
+
+    def __repr__(self):
+        return f"Nodo({self.metodo!r})"
+
+
+class GrafoCalculo:
+    """Nodos en orden topológico y dependientes transitivos por campo"""
+
+    def __init__(self, nodos: Iterable[Nodo]):
+        nodos = list(nodos)
+        metodos = [nodo.metodo for nodo in nodos]
+        if len(set(metodos)) != len(metodos):
+            raise ValueError("Cada método del grafo debe declararse una vez")
+
+        productor: Dict[str, Nodo] = {}
+        for nodo in nodos:
+            for salida in nodo.salidas:
+                if salida in productor:
+                    raise ValueError(
+                        f"'{salida}' lo escriben {productor[salida].metodo} "
+                        f"y {nodo.metodo}")
+                productor[salida] = nodo
+
+        # Aristas productor → consumidor (un nodo puede leer su propia
+        # salida, p. ej. la edad del cultivo ya informada, sin ser un ciclo)
+        previos: Dict[str, Set[str]] = {m: set() for m in metodos}
+        for nodo in nodos:
+            for entrada in nodo.entradas:
+                origen = productor.get(entrada)
+                if origen is not None and origen is not nodo:
+                    previos[nodo.metodo].add(origen.metodo)
+
+        self.orden: List[Nodo] = self._ordenar(nodos, previos)
+
+        # Campo → métodos a recalcular cuando cambia
+        consumidores: Dict[str, Set[str]] = {}
+        for nodo in nodos:
+            for entrada in nodo.entradas:
+                consumidores.setdefault(entrada, set()).add(nodo.metodo)
+        salidas = {nodo.metodo: nodo.salidas for nodo in nodos}
+
+        self._afectados: Dict[str, FrozenSet[str]] = {}
+        for campo in consumidores:
+            afectados: Set[str] = set()
+            frontera = [campo]
+            while frontera:
+                for metodo in consumidores.get(frontera.pop(), ()):
+                    if metodo not in afectados:
+                        afectados.add(metodo)
+                        frontera.extend(salidas[metodo])
+            self._afectados[campo] = frozenset(afectados)
+
+        self.metodos: FrozenSet[str] = frozenset(metodos)
+        self.campos = frozenset(consumidores) | frozenset(productor)
+
+    @staticmethod
+    def _ordenar(nodos: List[Nodo],
+                 previos: Dict[str, Set[str]]) -> List[Nodo]:
+        """Orden topológico estable (respeta el orden de declaración)"""
+        orden: List[Nodo] = []
+        hechos: Set[str] = set()
+        restantes = list(nodos)
+        while restantes:
+            listos = [n for n in restantes if previos[n.metodo] <= hechos]
+            if not listos:
+                raise ValueError(
+                    f"Ciclo en el grafo de cálculo: {restantes}")
+            siguiente = listos[0]
+            orden.append(siguiente)
+            hechos.add(siguiente.metodo)
+            restantes.remove(siguiente)
+        return orden
+
+    def afectados(self, campo: str) -> FrozenSet[str]:
+        """Métodos que dependen (directa o indirectamente) de `campo`"""
+        return self._afectados.get(campo, frozenset())
+
+    def evaluar(self, objeto: Any, pendientes: Set[str]) -> int:
+        """Ejecuta en orden los métodos pendientes de `objeto`.
+
+        Cada método se quita de `pendientes` al terminar; si uno lanza una
+        excepción, él y los que siguen quedan pendientes. Devuelve cuántos
+        nodos se evaluaron.
+        """
+        evaluados = 0
+        for nodo in self.orden:
+            if nodo.metodo in pendientes:
+                getattr(objeto, nodo.metodo)()
+                pendientes.discard(nodo.metodo)
+                evaluados += 1
+        return evaluados
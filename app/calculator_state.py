@@ -0,0 +1,171 @@
+"""
+Estado numérico tipado de AquacultureCalculator
+
+Los valores intermedios del cálculo de alimentación se guardan como float
+en slots en lugar de cadenas formateadas. Al escribir un resultado se
+aplica el mismo redondeo que tenía su texto en Flutter (2 decimales,
+miles con coma o entero), de modo que leer el float equivale a volver a
+parsear el texto. El texto solo se genera cuando se pide (respuesta,
+`get_controller_value`).
+"""
+import math
+import re
+from typing import Any, Dict
+
+_NO_NUMERICO = re.compile(r'[^\d.,-]')
+
+# Formato de presentación de cada campo numérico
+DECIMAL = '.2f'
+MILES = ',.2f'
+ENTERO = 'd'
+
+FORMATOS: Dict[str, str] = {
+    # Datos de entrada (llegan como texto y se conservan tal cual)
+    'hectareas': DECIMAL,
+    'piscinas': ENTERO,
+    'edad_cultivo': ENTERO,
+    'peso_anterior': DECIMAL,
+    'peso_actual_gdia': DECIMAL,
+    'peso_siembra': DECIMAL,
+    'densidad_biologo_indm2': DECIMAL,
+    'densidad_atarraya': DECIMAL,
+    'acumulado_actual_lbs': DECIMAL,
+    'numero_aa': ENTERO,
+    'h_aireadores_mecanicos': ENTERO,
+    'alimento_actual_kg': DECIMAL,
+    # Crecimiento y densidad
+    'incremento_gr': DECIMAL,
+    'crecim_actual_gdia': DECIMAL,
+    'peso_proyectado_gdia': DECIMAL,
+    'crecimiento_esperado_sem': DECIMAL,
+    'densidad_consumo_im2': DECIMAL,
+    'diferencia_campo_biologo': ENTERO,
+    'kg_100mil': DECIMAL,
+    'sacos_actuales': DECIMAL,
+    # Días de la semana (múltiplos de 25)
+    'lunes_dia1': ENTERO,
+    'martes_dia2': ENTERO,
+    'miercoles_dia3': ENTERO,
+    'jueves_dia4': ENTERO,
+    'viernes_dia5': ENTERO,
+    'sabado_dia6': ENTERO,
+    'domingo_dia7': ENTERO,
+    'recomendation_semana': DECIMAL,
+    'acumulado_semanal': DECIMAL,
+    # Aireación, libras y conversión
+    'aireadores_diesel': DECIMAL,
+    'capacidad_carga_aireaccion': DECIMAL,
+    'lbs_ha_actual_campo': DECIMAL,
+    'lbs_ha_consumo': DECIMAL,
+    'lbs_tolva_actual_campo': DECIMAL,
+    'lbs_tolva_segun_consumo': DECIMAL,
+    'libras_totales_campo': MILES,
+    'libras_totales_consumo': MILES,
+    'libras_totales_por_aireador': MILES,
+    'recomendacion_lbs_ha': MILES,
+    'hp_ha': DECIMAL,
+    'fca_campo': DECIMAL,
+    'fca_consumo': DECIMAL,
+    'rendimiento_lbs_saco': DECIMAL,
+}
+
+CAMPOS = tuple(FORMATOS)
+_SIN_TEXTO = dict.fromkeys(CAMPOS, '')
+
+
+def convertir_numero(valor: Any) -> float:
+    """
+    Convierte una cadena formateada a float (formato Flutter).
+
+    "." es decimal y "," separador de miles; cualquier otro carácter se
+    descarta. Lanza ValueError si no queda un número.
+    """
+    if valor is None or not valor:
+        return 0.0
+    if isinstance(valor, (int, float)):
+        return float(valor)
+
+    valor = str(valor).strip()
+    if not valor:
+        return 0.0
+    return float(_NO_NUMERICO.sub('', valor).replace(',', ''))
+
+
+def convertir_o_cero(valor: Any) -> float:
+    """`convertir_numero` que devuelve 0.0 (y lo avisa) si no hay número"""
+    try:
+        return convertir_numero(valor)
+    except (ValueError, TypeError):
+        print(f"Error al convertir '{str(valor).strip()}' a número, "
+              f"retornando 0.0")
+        return 0.0
+
+
+class EstadoCalculadora:
+    """
+    Valores del calculador: un float por campo y texto solo donde hace falta.
+
+    Cada campo de `CAMPOS` es un atributo float que los cálculos leen
+    directamente (0.0 si nunca se asignó). `_textos` guarda el texto de
+    los campos escritos como cadena (datos de entrada, "Error", "") y de
+    los resultados no finitos; los demás se formatean al leerlos. Las
+    claves fuera de `CAMPOS` (fechas, alias en minúsculas) se guardan como
+    texto en `_otros`.
+    """
+
+    __slots__ = CAMPOS + ('_textos', '_otros')
+
+    def __init__(self):
+        for campo in CAMPOS:
+            setattr(self, campo, 0.0)
+        self._textos: Dict[str, Any] = dict(_SIN_TEXTO)
+        self._otros: Dict[str, Any] = {}
+
+    def fijar(self, campo: str, valor: float):
+        """Guarda un resultado numérico con el redondeo de su texto"""
+        formato = FORMATOS[campo]
+        if formato == ENTERO:
+            setattr(self, campo, float(valor))
+        elif math.isfinite(valor):
+            # round(x, 2) == float(f"{x:.2f}") para todo float finito
+            setattr(self, campo, round(float(valor), 2))
+        else:
+            # "inf"/"nan" no se pueden volver a parsear: se leen como 0.0
+            texto = format(valor, formato)
+            self._textos[campo] = texto
+            setattr(self, campo, convertir_o_cero(texto))
+            return
+        self._textos.pop(campo, None)
+
+    def fijar_texto(self, campo: str, texto: Any):
+        """Guarda un valor textual; su número se calcula una sola vez"""
+        if campo in FORMATOS:
+            self._textos[campo] = texto
+            setattr(self, campo, convertir_o_cero(texto))
+        else:
+            self._otros[campo] = texto
+
+    def numero(self, campo: str) -> float:
+        if campo in FORMATOS:
+            return getattr(self, campo)
+        return convertir_o_cero(self._otros.get(campo, ''))
+
+    def texto(self, campo: str) -> Any:
+        """Texto del campo tal como lo mostraba el controlador de Flutter"""
+        if campo not in FORMATOS:
+            return self._otros.get(campo, '')
+        texto = self._textos.get(campo)
+        if texto is not None:
+            return texto
+        valor = getattr(self, campo)
+        formato = FORMATOS[campo]
+        if formato == ENTERO:
+            return str(int(valor))
+        return format(valor, formato)
+
+    def como_dict(self) -> Dict[str, Any]:
+        """Vista de solo lectura con el texto de cada campo asignado"""
+        textos = {campo: self.texto(campo) for campo in CAMPOS
+                  if self._textos.get(campo) != ''}
+        textos.update(self._otros)
+        return textos
@@ -0,0 +1,172 @@
+"""
+Despachador de micro-lotes para la inferencia de /predict
+
+Las solicitudes concurrentes de una misma finca dejan sus filas en un lote
+abierto; la primera en llegar (líder) espera una ventana corta o hasta que
+el lote se llene, evalúa todas las filas con una sola llamada vectorizada
+y reparte a cada solicitud su parte del resultado.
+
+Cada solicitud se registra con `sesion(clave)` mientras resuelve. Si todas
+las sesiones activas de la finca ya tienen filas en el lote, no tiene
+sentido seguir esperando y el lote se cierra de inmediato; por eso una
+solicitud sola no paga la ventana.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List
+
+import numpy as np
+from decouple import config
+
+PREDICT_MICROBATCH = config('PREDICT_MICROBATCH', default=True, cast=bool)
+PREDICT_BATCH_WINDOW_MS = config(
+    'PREDICT_BATCH_WINDOW_MS', default=2.0, cast=float)
+PREDICT_MAX_BATCH = config('PREDICT_MAX_BATCH', default=64, cast=int)
+
+
+class _Lote:
+    """Filas pendientes de una finca que se evaluarán juntas"""
+
+    def __init__(self):
+        self.filas: List[np.ndarray] = []
+        self.encolado: List[float] = []
+        self.n_filas = 0
+        self.cerrado = False
+        self.listo = threading.Event()
+        self.resultado = None
+        self.error = None
+
+
+class DespachadorInferencia:
+    """Agrupa llamadas concurrentes a `predecir` por finca"""
+
+    def __init__(self, ventana_ms: float = PREDICT_BATCH_WINDOW_MS,
+                 max_lote: int = PREDICT_MAX_BATCH,
+                 habilitado: bool = PREDICT_MICROBATCH):
+        self.ventana_s = max(0.0, ventana_ms) / 1000.0
+        self.max_lote = max(1, max_lote)
+        self.habilitado = habilitado
+        self._cond = threading.Condition()
+        self._abiertos: Dict[str, _Lote] = {}
+        self._activos: Dict[str, int] = {}
+
+        # Métricas
+        self.lotes = 0
+        self.llamadas = 0
+        self.filas = 0
+        self.max_llamadas_lote = 0
+        self.espera_total_s = 0.0
+        self.espera_max_s = 0.0
+        self.histograma_llamadas: Dict[int, int] = {}
+
+    @contextmanager
+    def sesion(self, clave: str):
+        """Marca una solicitud activa de `clave` mientras dura el bloque"""
+        with self._cond:
+            self._activos[clave] = self._activos.get(clave, 0) + 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._activos[clave] -= 1
+                if self._activos[clave] <= 0:
+                    del self._activos[clave]
+                # Un lote abierto puede estar esperando a esta sesión
+                self._cond.notify_all()
+
+    def _completo(self, clave: str, lote: _Lote) -> bool:
+        activos = max(1, self._activos.get(clave, 0))
+        return len(lote.filas) >= activos or lote.n_filas >= self.max_lote
+
+    def predecir(self, clave: str, funcion: Callable[[np.ndarray], np.ndarray],
+                 X: np.ndarray) -> np.ndarray:
+        """Evalúa `funcion(X)` compartiendo la llamada con otras solicitudes"""
+        if not self.habilitado:
+            return funcion(X)
+
+        X = np.asarray(X, dtype=np.float64)
+        with self._cond:
+            lote = self._abiertos.get(clave)
+            lider = lote is None
+            if lider:
+                lote = _Lote()
+                self._abiertos[clave] = lote
+            inicio = lote.n_filas
+            lote.filas.append(X)
+            lote.encolado.append(time.perf_counter())
+            lote.n_filas += len(X)
+            if self._completo(clave, lote):
+                self._cerrar(clave, lote)
+                self._cond.notify_all()
+
+            if lider:
+                limite = time.perf_counter() + self.ventana_s
+                while not lote.cerrado:
+                    restante = limite - time.perf_counter()
+                    if restante <= 0 or self._completo(clave, lote):
+                        self._cerrar(clave, lote)
+                        break
+                    self._cond.wait(restante)
+
+        if lider:
+            self._ejecutar(lote, funcion)
+        else:
+            lote.listo.wait()
+
+        if lote.error is not None:
+            raise lote.error
+        return lote.resultado[inicio:inicio + len(X)]
+
+    def _cerrar(self, clave: str, lote: _Lote):
+        lote.cerrado = True
+        if self._abiertos.get(clave) is lote:
+            del self._abiertos[clave]
+
+    def _ejecutar(self, lote: _Lote, funcion):
+        ahora = time.perf_counter()
+        try:
+            datos = lote.filas[0] if len(lote.filas) == 1 else \
+                np.vstack(lote.filas)
+            lote.resultado = funcion(datos)
+        except Exception as e:
+            lote.error = e
+        finally:
+            lote.listo.set()
+
+        esperas = [ahora - t for t in lote.encolado]
+        with self._cond:
+            n = len(lote.filas)
+            self.lotes += 1
+            self.llamadas += n
+            self.filas += lote.n_filas
+            self.max_llamadas_lote = max(self.max_llamadas_lote, n)
+            self.histograma_llamadas[n] = self.histograma_llamadas.get(n, 0) + 1
+            self.espera_total_s += sum(esperas)
+            self.espera_max_s = max(self.espera_max_s, max(esperas))
+
+    def get_stats(self) -> dict:
+        with self._cond:
+            return {
+                "habilitado": self.habilitado,
+                "ventana_ms": self.ventana_s * 1000.0,
+                "max_lote": self.max_lote,
+                "lotes": self.lotes,
+                "llamadas": self.llamadas,
+                "filas": self.filas,
+                "llamadas_por_lote": round(
+                    self.llamadas / self.lotes, 2) if self.lotes else 0.0,
+                "max_llamadas_lote": self.max_llamadas_lote,
+                "histograma_llamadas": {
+                    str(k): v for k, v in sorted(
+                        self.histograma_llamadas.items())},
+                "espera_media_ms": round(
+                    self.espera_total_s / self.llamadas * 1000.0, 3)
+                if self.llamadas else 0.0,
+                "espera_max_ms": round(self.espera_max_s * 1000.0, 3),
+                "sesiones_activas": sum(self._activos.values())
+            }
+
+
+# Instancia global
+despachador_inferencia = DespachadorInferencia()
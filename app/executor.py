@@ -0,0 +1,178 @@
+"""
+Ejecución acotada del trabajo bloqueante fuera del event loop
+
+Los handlers `async def` de /predict, /alimentation y /send-invoice llaman
+código bloqueante (descargas de GCS, joblib.load, inferencia, smtplib).
+Cada endpoint tiene su propio carril: un pool de hilos de tamaño fijo y
+una cola máxima de solicitudes esperando hilo. Con la cola llena la
+solicitud se rechaza de inmediato con 503 y Retry-After, en lugar de
+acumular latencia sin límite. Las métricas de cada carril se publican en
+/stats.
+"""
+import asyncio
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from decouple import config
+from fastapi import HTTPException
+
+EJECUTOR_HILOS = {
+    'predict': config('EJECUTOR_HILOS_PREDICT', default=16, cast=int),
+    'alimentation': config('EJECUTOR_HILOS_ALIMENTATION', default=8, cast=int),
+    'send-invoice': config('EJECUTOR_HILOS_INVOICE', default=4, cast=int),
+}
+EJECUTOR_HILOS_DEFECTO = config('EJECUTOR_HILOS_DEFECTO', default=4, cast=int)
+# Solicitudes que pueden esperar hilo en cada carril antes de rechazar
+EJECUTOR_COLA_MAX = config('EJECUTOR_COLA_MAX', default=64, cast=int)
+
+
+class ColaSaturada(HTTPException):
+    """503 con Retry-After cuando el carril de un endpoint está lleno"""
+
+    def __init__(self, carril: str, retry_after: int):
+        super().__init__(
+            status_code=503,
+            detail=f"Servidor ocupado ({carril}), reintentar en "
+                   f"{retry_after} s",
+            headers={"Retry-After": str(retry_after)})
+
+
+class _Carril:
+    """Pool de hilos y contadores de un endpoint"""
+
+    def __init__(self, nombre: str, hilos: int, cola_max: int):
+        self.nombre = nombre
+        self.hilos = max(1, hilos)
+        self.cola_max = max(0, cola_max)
+        self.pool = ThreadPoolExecutor(
+            max_workers=self.hilos, thread_name_prefix=f"ejecutor-{nombre}")
+
+        # Admitidas = en ejecución + esperando hilo
+        self.admitidas = 0
+        self.en_ejecucion = 0
+        self.max_cola = 0
+        self.completadas = 0
+        self.rechazadas = 0
+        self.espera_total_s = 0.0
+        self.espera_max_s = 0.0
+        self.duracion_total_s = 0.0
+        # Media móvil de la duración, para estimar Retry-After
+        self.duracion_media_s = 0.0
+
+    @property
+    def en_cola(self) -> int:
+        return max(0, self.admitidas - self.hilos)
+
+    def retry_after(self) -> int:
+        """Segundos estimados hasta que se libere un puesto en la cola"""
+        rondas = (self.en_cola + 1) / self.hilos
+        return max(1, math.ceil(rondas * self.duracion_media_s))
+
+
+class EjecutorAcotado:
+    """Carriles por endpoint con concurrencia y cola acotadas"""
+
+    def __init__(self, hilos: Dict[str, int] = None,
+                 cola_max: int = EJECUTOR_COLA_MAX,
+                 hilos_defecto: int = EJECUTOR_HILOS_DEFECTO):
+        self.hilos = dict(EJECUTOR_HILOS if hilos is None else hilos)
+        self.cola_max = cola_max
+        self.hilos_defecto = hilos_defecto
+        self._lock = threading.Lock()
+        self._carriles: Dict[str, _Carril] = {}
+
+    def _carril(self, nombre: str) -> _Carril:
+        carril = self._carriles.get(nombre)
+        if carril is None:
+            carril = _Carril(nombre, self.hilos.get(
+                nombre, self.hilos_defecto), self.cola_max)
+            self._carriles[nombre] = carril
+        return carril
+
+    def comprobar(self, nombre: str):
+        """Lanza ColaSaturada si `ejecutar` rechazaría ahora en `nombre`"""
+        with self._lock:
+            self._admitir(self._carril(nombre), reservar=False)
+
+    def _admitir(self, carril: _Carril, reservar: bool = True,
+                 rechazar: bool = True):
+        if rechazar and carril.en_cola >= carril.cola_max and \
+                carril.admitidas >= carril.hilos:
+            carril.rechazadas += 1
+            raise ColaSaturada(carril.nombre, carril.retry_after())
+        if reservar:
+            carril.admitidas += 1
+            carril.max_cola = max(carril.max_cola, carril.en_cola)
+
+    async def ejecutar(self, nombre: str, funcion: Callable[..., Any],
+                       *args, rechazar: bool = True) -> Any:
+        """Ejecuta `funcion(*args)` en el carril `nombre` y espera el resultado.
+
+        Lanza ColaSaturada si el carril ya tiene `cola_max` solicitudes
+        esperando hilo. Con `rechazar=False` la llamada espera en la cola
+        aunque esté llena (para lotes de una respuesta ya iniciada).
+        """
+        with self._lock:
+            carril = self._carril(nombre)
+            self._admitir(carril, rechazar=rechazar)
+        encolada = time.monotonic()
+
+        def tarea():
+            inicio = time.monotonic()
+            with self._lock:
+                carril.en_ejecucion += 1
+                espera = inicio - encolada
+                carril.espera_total_s += espera
+                carril.espera_max_s = max(carril.espera_max_s, espera)
+            try:
+                return funcion(*args)
+            finally:
+                duracion = time.monotonic() - inicio
+                with self._lock:
+                    carril.en_ejecucion -= 1
+                    carril.admitidas -= 1
+                    carril.completadas += 1
+                    carril.duracion_total_s += duracion
+                    carril.duracion_media_s = duracion if \
+                        carril.completadas == 1 else \
+                        0.8 * carril.duracion_media_s + 0.2 * duracion
+
+        futuro = carril.pool.submit(tarea)
+        try:
+            return await asyncio.wrap_future(futuro)
+        except asyncio.CancelledError:
+            # Cliente desconectado: si aún no empezó, libera su puesto
+            if futuro.cancel():
+                with self._lock:
+                    carril.admitidas -= 1
+            raise
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            carriles = {}
+            for nombre, c in self._carriles.items():
+                iniciadas = c.completadas + c.en_ejecucion
+                carriles[nombre] = {
+                    "hilos": c.hilos,
+                    "cola_max": c.cola_max,
+                    "en_ejecucion": c.en_ejecucion,
+                    "en_cola": c.en_cola,
+                    "max_cola": c.max_cola,
+                    "completadas": c.completadas,
+                    "rechazadas": c.rechazadas,
+                    "espera_media_ms": round(
+                        1000 * c.espera_total_s / iniciadas, 3)
+                    if iniciadas else 0.0,
+                    "espera_max_ms": round(1000 * c.espera_max_s, 3),
+                    "duracion_media_ms": round(
+                        1000 * c.duracion_total_s / c.completadas, 3)
+                    if c.completadas else 0.0,
+                }
+            return {"carriles": carriles}
+
+
+# Instancia global
+ejecutor = EjecutorAcotado()
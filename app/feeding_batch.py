@@ -0,0 +1,415 @@
+"""
+Motor vectorizado de alimentación: N piscinas en una pasada
+
+Reproduce con NumPy, columna a columna, las fórmulas de
+`AquacultureCalculator` (GRAFO_ALIMENTACION) con el mismo flujo que
+`procesar_prediccion_alimentation`. Los resultados coinciden exactamente
+con el cálculo escalar: cada valor intermedio se redondea como su texto
+de Flutter (`round(x, 2)` exacto, ver `redondear_2`), los días usan el
+mismo redondeo a múltiplos de 25 (half-even / floor) y los casos que en
+el escalar terminan en "Error", "" o "Datos inválidos" producen el mismo
+texto.
+"""
+import math
+from datetime import datetime
+from typing import Any, Dict, Mapping, Optional
+
+import numpy as np
+
+from app.bwcosechas import TablaBWCosechas
+from app.calculator_state import ENTERO, FORMATOS, convertir_o_cero
+
+# Por encima de este valor x*100 puede no ser exacto en entero: round()
+_LIMITE_EXACTO = 2.0 ** 52 / 100
+_DIVISOR_DEKKER = 134217729.0  # 2**27 + 1
+
+
+def redondear_2(x) -> np.ndarray:
+    """`round(x, 2)` de Python elemento a elemento, bit a bit.
+
+    `np.round` multiplica por 100 y redondea el producto ya redondeado,
+    lo que difiere de Python en algunos empates. Aquí se obtiene el error
+    exacto de x*100 (producto de Dekker) y se redondea half-even sobre el
+    valor exacto. Los no finitos se devuelven tal cual.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    with np.errstate(all='ignore'):
+        p = x * 100.0
+        c = _DIVISOR_DEKKER * x
+        alto = c - (c - x)
+        bajo = x - alto
+        # x*100 == p + error exactamente
+        error = (alto * 100.0 - p) + bajo * 100.0
+
+        k = np.rint(p)
+        f = p - k
+        arriba = error > 0.5 - f
+        abajo = error < -0.5 - f
+        empate_arriba = error == 0.5 - f
+        empate_abajo = error == -0.5 - f
+        impar = np.fmod(k, 2.0) != 0
+        k = np.where(arriba | (empate_arriba & impar), k + 1.0, k)
+        k = np.where(abajo | (empate_abajo & impar), k - 1.0, k)
+        resultado = np.copysign(np.abs(k) / 100.0, x)
+
+    resultado = np.where(np.isfinite(x), resultado, x)
+    fuera = np.isfinite(x) & (np.abs(x) >= _LIMITE_EXACTO)
+    if fuera.any():
+        resultado[fuera] = [round(float(v), 2) for v in x[fuera]]
+    return resultado
+
+
+def _redondear_25(x: np.ndarray) -> np.ndarray:
+    """round(x / 25) * 25 (half-even como `round` de Python)"""
+    return np.rint(x / 25) * 25
+
+
+def _leer_decimal(columna) -> np.ndarray:
+    """Valor que obtiene el calculador al parsear `str(x)` de un float.
+
+    `str()` usa notación científica fuera de [1e-4, 1e16) y el parser de
+    Flutter descarta la "e" y el signo "+" ("1e+17" → 117.0, "1e-05" →
+    0.0); esos valores y los no finitos se parsean uno a uno.
+    """
+    x = np.asarray(columna)
+    if np.issubdtype(x.dtype, np.integer):
+        return x.astype(np.float64)
+    x = x.astype(np.float64)
+    magnitud = np.abs(x)
+    fijo = np.isfinite(x) & ((x == 0) | ((magnitud >= 1e-4) &
+                                         (magnitud < 1e16)))
+    valores = x.copy()
+    for fila in np.flatnonzero(~fijo):
+        valores[fila] = convertir_o_cero(str(float(x[fila])))
+    return valores
+
+
+def _opcional(entradas: Mapping[str, Any], nombre: str, n: int,
+              defecto: str) -> list:
+    """Columna opcional como lista de textos (None/NaN → `defecto`)"""
+    if nombre not in entradas:
+        return [defecto] * n
+    textos = []
+    for valor in entradas[nombre]:
+        ausente = valor is None or (isinstance(valor, float) and
+                                    math.isnan(valor))
+        textos.append(defecto if ausente else str(float(valor)))
+    return textos
+
+
+def _edad_desde_fechas(fecha_siembra: Any,
+                       fecha_muestreo: Any) -> Optional[int]:
+    """Edad del cultivo como `calcular_edad_cultivo` (None si no aplica)"""
+    siembra = str(fecha_siembra if fecha_siembra is not None else "").strip()
+    muestreo = str(fecha_muestreo if fecha_muestreo is not None else "").strip()
+    if not siembra or not muestreo:
+        return None
+    try:
+        dias = (datetime.strptime(muestreo, '%d/%m/%Y') -
+                datetime.strptime(siembra, '%d/%m/%Y')).days
+    except ValueError:
+        return None
+    return dias + 1 if dias >= 0 else None
+
+
+class ResultadoLote:
+    """Columnas de resultados: un float por fila y textos solo donde hacen falta"""
+
+    def __init__(self, n: int):
+        self.n = n
+        self.valores: Dict[str, np.ndarray] = {}
+        # campo → {fila: texto} para "Error", "", "inf", valores por defecto
+        self.textos: Dict[str, Dict[int, str]] = {}
+        # Textos de entrada tal como los recibió el calculador
+        self.entradas: Dict[str, list] = {}
+        # fila → mensaje, para filas en que el cálculo escalar lanza excepción
+        self.errores: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return self.n
+
+    def guardar(self, campo: str, valores: np.ndarray):
+        """Guarda una columna con el redondeo del texto de `campo`"""
+        valores = np.asarray(valores, dtype=np.float64)
+        if FORMATOS[campo] == ENTERO:
+            # El escalar guarda float(int(x)): sin -0.0
+            self.valores[campo] = valores + 0.0
+            return
+        finitos = np.isfinite(valores)
+        self.valores[campo] = np.where(finitos, redondear_2(valores), 0.0)
+        if not finitos.all():
+            formato = FORMATOS[campo]
+            textos = self.textos.setdefault(campo, {})
+            for fila in np.flatnonzero(~finitos):
+                textos[int(fila)] = format(valores[fila], formato)
+
+    def marcar(self, campo: str, mascara: np.ndarray, texto: str):
+        """Fija `texto` (y su valor parseado) en las filas de `mascara`"""
+        filas = np.flatnonzero(mascara)
+        if not len(filas):
+            return
+        self.valores[campo][filas] = convertir_o_cero(texto)
+        textos = self.textos.setdefault(campo, {})
+        for fila in filas:
+            textos[int(fila)] = texto
+
+    def numero(self, campo: str, fila: int) -> float:
+        return float(self.valores[campo][fila])
+
+    def texto(self, campo: str, fila: int) -> str:
+        """Texto que devolvería `get_controller_value(campo)` en esa fila"""
+        if campo in self.entradas:
+            return self.entradas[campo][fila]
+        texto = self.textos.get(campo, {}).get(fila)
+        if texto is not None:
+            return texto
+        valor = self.valores[campo][fila]
+        if FORMATOS[campo] == ENTERO:
+            return str(int(valor))
+        return format(valor, FORMATOS[campo])
+
+    def fila(self, fila: int) -> Dict[str, str]:
+        """Textos de todos los campos de una fila"""
+        return {campo: self.texto(campo, fila) for campo in self.valores}
+
+
+# Campo del calculador, columna de entrada y tipo en la solicitud
+_ENTRADAS = (
+    ('hectareas', 'Hectareas', float),
+    ('piscinas', 'Piscinas', int),
+    ('peso_anterior', 'Pesoanterior', float),
+    ('peso_actual_gdia', 'Pesoactualgdia', float),
+    ('densidad_biologo_indm2', 'Densidadbiologoindm2', float),
+    ('acumulado_actual_lbs', 'AcumuladoactualLBS', float),
+    ('numero_aa', 'numeroAA', int),
+    ('h_aireadores_mecanicos', 'Aireadores', int),
+    ('alimento_actual_kg', 'Alimentoactualkg', float),
+)
+
+
+def calcular_lote_alimentacion(entradas: Mapping[str, Any],
+                               tabla: TablaBWCosechas) -> ResultadoLote:
+    """Calcula todas las salidas del calculador para un lote de piscinas.
+
+    `entradas` es un mapeo (dict de columnas o DataFrame) con los campos
+    de PredictionRequestAlimentation: Hectareas, Piscinas, Fechadesiembra,
+    Fechademuestreo, Edaddelcultivo, Pesoanterior, Pesoactualgdia,
+    Densidadbiologoindm2, AcumuladoactualLBS, numeroAA, Aireadores,
+    Alimentoactualkg y, opcionales, Pesosiembra y Densidadatarraya.
+    """
+    hect_bruta = np.asarray(entradas['Hectareas'])
+    n = len(hect_bruta)
+    res = ResultadoLote(n)
+
+    # --- Entradas, leídas como el calculador lee sus textos ---
+    for campo, nombre, tipo in _ENTRADAS:
+        columna = [tipo(v) for v in np.asarray(entradas[nombre]).tolist()]
+        res.entradas[campo] = [str(v) for v in columna]
+        res.valores[campo] = _leer_decimal(
+            np.asarray(columna, dtype=np.int64 if tipo is int else None))
+    for campo, nombre, defecto in (('peso_siembra', 'Pesosiembra', '1.0'),
+                                   ('densidad_atarraya', 'Densidadatarraya',
+                                    '10.0')):
+        textos = _opcional(entradas, nombre, n, defecto)
+        res.entradas[campo] = textos
+        res.valores[campo] = np.array(
+            [convertir_o_cero(t) for t in textos], dtype=np.float64)
+
+    h = res.valores['hectareas']
+    pa = res.valores['peso_actual_gdia']
+    pan = res.valores['peso_anterior']
+    ps = res.valores['peso_siembra']
+    db = res.valores['densidad_biologo_indm2']
+    acum = res.valores['acumulado_actual_lbs']
+    aa = res.valores['numero_aa']
+    air = res.valores['h_aireadores_mecanicos']
+    alim = res.valores['alimento_actual_kg']
+
+    with np.errstate(all='ignore'):
+        # --- Edad del cultivo: se recalcula desde las fechas solo si es 0 ---
+        edad = np.asarray(entradas['Edaddelcultivo']).astype(np.int64)
+        siembras = list(entradas['Fechadesiembra'])
+        muestreos = list(entradas['Fechademuestreo'])
+        for fila in np.flatnonzero(edad == 0):
+            calculada = _edad_desde_fechas(siembras[fila], muestreos[fila])
+            if calculada is not None:
+                edad[fila] = calculada
+        res.guardar('edad_cultivo', edad.astype(np.float64))
+        edad_f = edad.astype(np.float64)
+
+        res.guardar('incremento_gr', np.where(pan == 0, 0.0, pa - pan))
+
+        # --- Crecimiento, peso proyectado y crecimiento esperado ---
+        con_edad = edad != 0
+        res.guardar('crecim_actual_gdia', np.where(
+            con_edad, (pa - ps) / np.where(con_edad, edad_f, 1.0), 0.0))
+        incremento = np.select(
+            [(0.001 < pa) & (pa < 7), (7 <= pa) & (pa < 11), pa >= 11],
+            [2.5, 3.0, 3.0], 0.0)
+        res.guardar('peso_proyectado_gdia', pa + incremento)
+        pp = res.valores['peso_proyectado_gdia']
+        res.guardar('crecimiento_esperado_sem', np.where(
+            (pp != 0) & (pa != 0), pp - pa, 0.0))
+        # Sin edad el escalar conserva los valores por defecto ('0.0')
+        res.marcar('peso_proyectado_gdia', ~con_edad, '0.0')
+        res.marcar('crecimiento_esperado_sem', ~con_edad, '0.0')
+        pp = res.valores['peso_proyectado_gdia']
+
+        # --- Densidad de consumo (BUSCARV sobre la tabla 3) ---
+        alim_d = np.where(alim != 0, alim, 0.0)
+        hect_d = np.where(h != 0, h, 1.0)
+        peso_d = np.where(pa != 0, pa, 1.0)
+        i = tabla.indices_vector(peso_d)
+        fraccion = _fracciones(tabla, i)
+        divisor = peso_d * fraccion
+        res.guardar('densidad_consumo_im2',
+                    (alim_d / hect_d) * 10 / divisor / 100.0)
+        # Sin peso en la tabla, BWCosechas no numérico o división por cero
+        res.marcar('densidad_consumo_im2',
+                   (i < 0) | np.isnan(fraccion) | (divisor == 0), '')
+        dens = res.valores['densidad_consumo_im2']
+        dens_textos = res.textos.get('densidad_consumo_im2', {})
+
+        res.guardar('kg_100mil', np.where(
+            (h == 0) | (dens == 0), 0.0, (alim / h) / dens * 10))
+        res.guardar('sacos_actuales', alim / 25)
+
+        # --- Lunes (round) y domingo (floor) ---
+        _calcular_lunes(res, tabla, pa, h, db)
+        _calcular_domingo(res, tabla, pp, h, db)
+
+        lunes = res.valores['lunes_dia1']
+        domingo = res.valores['domingo_dia7']
+        lunes_1 = np.where(lunes == 0, 1.0, lunes)
+        domingo_1 = np.where(domingo == 0, 1.0, domingo)
+        res.guardar('martes_dia2', _redondear_25(
+            lunes_1 + (domingo_1 - lunes_1) / 6))
+        for campo, paso in (('miercoles_dia3', 2), ('jueves_dia4', 3),
+                            ('viernes_dia5', 4), ('sabado_dia6', 5)):
+            res.guardar(campo, _redondear_25(
+                lunes_1 + (domingo_1 - lunes_1) / 6 * paso))
+
+        # --- Semanales ---
+        dias = [res.valores[c] for c in (
+            'lunes_dia1', 'martes_dia2', 'miercoles_dia3', 'jueves_dia4',
+            'viernes_dia5', 'sabado_dia6', 'domingo_dia7')]
+        suma = np.where(dias[0] == 0, 1.0, dias[0])
+        for dia in dias[1:]:
+            suma = suma + np.where(dia == 0, 1.0, dia)
+        res.guardar('recomendation_semana', suma / 7)
+        recomendation = res.valores['recomendation_semana']
+        res.guardar('acumulado_semanal', np.where(
+            recomendation == 0, 1.0, recomendation) * 7)
+
+        # --- Aireación ---
+        res.guardar('aireadores_diesel', (air * 3) / h)
+        res.marcar('aireadores_diesel', h == 0, "Error")
+        res.guardar('capacidad_carga_aireaccion',
+                    (res.valores['aireadores_diesel'] * 3000) + (7500 * h))
+
+        # --- Libras y peso ---
+        res.guardar('lbs_ha_actual_campo', db * pa * 22)
+        res.guardar('lbs_ha_consumo', dens * pa * 22)
+        lbs_campo = res.valores['lbs_ha_actual_campo']
+        lbs_consumo = res.valores['lbs_ha_consumo']
+        res.guardar('libras_totales_campo', lbs_campo * h)
+        res.guardar('libras_totales_consumo', lbs_consumo * h)
+        res.guardar('lbs_tolva_actual_campo', np.where(
+            aa == 0, 0.0, (lbs_campo * h) / aa))
+        res.guardar('lbs_tolva_segun_consumo', np.where(
+            aa == 0, 0.0, (lbs_consumo * h) / aa))
+
+        # --- Cálculos finales ---
+        res.guardar('hp_ha', np.where(h == 0, 0.0, (air * 16.0) / (h * 1)))
+        res.guardar('rendimiento_lbs_saco', np.where(
+            alim == 0, 0.0, (lbs_campo * h) / (alim / 25)))
+        res.guardar('recomendacion_lbs_ha', 7000 * h)
+        totales_campo = res.valores['libras_totales_campo']
+        totales_consumo = res.valores['libras_totales_consumo']
+        res.guardar('libras_totales_por_aireador', np.where(
+            air == 0, 0.0, totales_campo / air))
+        res.guardar('fca_campo', np.where(
+            (totales_campo == 0) | (acum == 0), 0.0, acum / totales_campo))
+        res.guardar('fca_consumo', np.where(
+            (totales_consumo == 0) | (acum == 0), 0.0,
+            acum / totales_consumo))
+
+        # --- Diferencia campo/biólogo (sobre los textos, como el escalar) ---
+        consumo = dens.copy()
+        for fila, texto in dens_textos.items():
+            consumo[fila] = float(texto) if texto else np.nan
+        biologo = np.array([float(t) for t in
+                            res.entradas['densidad_biologo_indm2']])
+        diferencia = ((consumo / biologo) - 1) * 100
+        res.guardar('diferencia_campo_biologo', np.where(
+            (biologo != 0) & ~np.isnan(diferencia), np.rint(diferencia), 0.0))
+
+    # round(±inf) lanza OverflowError: el escalar falla la solicitud
+    for fila in np.flatnonzero(np.isinf(diferencia) & (biologo != 0)):
+        res.errores[int(fila)] = "cannot convert float infinity to integer"
+    return res
+
+
+def _fracciones(tabla: TablaBWCosechas, indices: np.ndarray) -> np.ndarray:
+    """Fracción BWCosechas de cada índice (NaN donde no hay fila)"""
+    if not len(tabla):
+        return np.full(indices.shape, np.nan)
+    return np.where(indices >= 0, tabla.fracciones[np.maximum(indices, 0)],
+                    np.nan)
+
+
+def _calcular_lunes(res: ResultadoLote, tabla: TablaBWCosechas,
+                    pa: np.ndarray, h: np.ndarray, db: np.ndarray):
+    """calcular_lunes_dia1: ceros → 1.0, BWCosechas y round a 25"""
+    n = res.n
+    peso = np.where(pa == 0, 1.0, pa)
+    hect = np.where(h == 0, 1.0, h)
+    dens = np.where(db == 0, 1.0, db)
+    res.valores['lunes_dia1'] = np.zeros(n)
+    todas = np.ones(n, dtype=bool)
+    if not tabla.hay_datos:
+        res.marcar('lunes_dia1', todas, "No hay datos")
+        return
+    if not tabla.formato_valido:
+        res.marcar('lunes_dia1', todas, "Formato de datos inválido")
+        return
+    if tabla.error_pesos:
+        res.marcar('lunes_dia1', todas, "Error")
+        return
+
+    i = tabla.indices_vector(peso, solo_positivos=True)
+    fraccion = _fracciones(tabla, i)
+    bw = np.where(i >= 0, fraccion, 0.0)
+    lunes = ((peso / 1000) * ((dens * 10000) * hect)) * bw
+    res.guardar('lunes_dia1', np.where(
+        np.isfinite(lunes), _redondear_25(lunes), 0.0))
+    res.marcar('lunes_dia1', bw == 0, "BWCosechas inválido")
+    # BWCosechas no numérico o resultado no finito: round() lanza → "Error"
+    res.marcar('lunes_dia1', np.isnan(bw) | (~np.isfinite(lunes) & (bw != 0)),
+               "Error")
+
+
+def _calcular_domingo(res: ResultadoLote, tabla: TablaBWCosechas,
+                      pp: np.ndarray, h: np.ndarray, db: np.ndarray):
+    """calcular_domingo_dia7 con _calcular_logic: floor a 25"""
+    n = res.n
+    res.valores['domingo_dia7'] = np.zeros(n)
+    invalidos = (pp <= 0) | (h <= 0) | (db <= 0)
+    validos = ~invalidos
+    if not tabla.hay_datos:
+        res.marcar('domingo_dia7', validos, "No hay datos")
+    elif not tabla.formato_valido or not tabla.filas_validas:
+        res.marcar('domingo_dia7', validos, "Formato de datos inválido")
+    elif tabla.error_pesos:
+        res.marcar('domingo_dia7', validos, "Error")
+    else:
+        i = tabla.indices_vector(pp, solo_positivos=True)
+        bw = _fracciones(tabla, i)
+        resultado = ((pp / 1000) * ((db * 10000) * h)) * bw
+        finito = np.isfinite(resultado)
+        res.guardar('domingo_dia7', np.where(
+            finito, np.floor(resultado / 25) * 25, 0.0))
+        # Sin peso, BWCosechas nulo/no numérico o floor de no finito
+        res.marcar('domingo_dia7', validos & (
+            (i < 0) | np.isnan(bw) | (bw == 0) | ~finito), "Error")
+    res.marcar('domingo_dia7', invalidos, "Datos inválidos")
@@ -0,0 +1,172 @@
+"""
+Acceso compartido a Google Cloud Storage
+
+Un solo `storage.Client` por proceso, montado sobre una `AuthorizedSession`
+con un pool de conexiones keep-alive dimensionado para la concurrencia del
+servicio. Las credenciales se resuelven una vez y las conexiones TLS se
+reutilizan entre solicitudes. Cada operación lleva su propio timeout.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from decouple import config
+from google.cloud import storage
+
+logger = logging.getLogger(__name__)
+
+GCS_POOL_SIZE = config('GCS_POOL_SIZE', default=32, cast=int)
+GCS_TIMEOUT_METADATOS_S = config(
+    'GCS_TIMEOUT_METADATOS_S', default=10.0, cast=float)
+GCS_TIMEOUT_DESCARGA_S = config(
+    'GCS_TIMEOUT_DESCARGA_S', default=120.0, cast=float)
+# Tras un fallo de credenciales no se reintenta crear el cliente antes de esto
+GCS_REINTENTO_CLIENTE_S = config(
+    'GCS_REINTENTO_CLIENTE_S', default=30.0, cast=float)
+
+
+class ClienteGCS:
+    """Cliente de GCS perezoso, compartido y con pool de conexiones"""
+
+    def __init__(self, pool_size: int = GCS_POOL_SIZE,
+                 timeout_metadatos: float = GCS_TIMEOUT_METADATOS_S,
+                 timeout_descarga: float = GCS_TIMEOUT_DESCARGA_S,
+                 reintento_cliente_s: float = GCS_REINTENTO_CLIENTE_S,
+                 project: Optional[str] = None):
+        self.pool_size = pool_size
+        self.timeout_metadatos = timeout_metadatos
+        self.timeout_descarga = timeout_descarga
+        self.reintento_cliente_s = reintento_cliente_s
+        self.project = project or config(
+            'GOOGLE_CLOUD_PROJECT_ID', default=None)
+
+        self.lock = threading.Lock()
+        self._cliente: Optional[storage.Client] = None
+        self._buckets: Dict[str, storage.Bucket] = {}
+        self._error: Optional[Exception] = None
+        self._error_en = 0.0
+
+        self.clientes_creados = 0
+        self.fallos_cliente = 0
+        self.metadatos = 0
+        self.descargas = 0
+        self.bytes_descargados = 0
+
+    def _crear_cliente(self) -> storage.Client:
+        import google.auth
+        import google.auth.credentials
+        from google.auth.transport.requests import AuthorizedSession
+        from requests.adapters import HTTPAdapter
+
+        # Con _http propio storage.Client no aplica sus scopes: sin ellos
+        # las credenciales de cuenta de servicio fallan con invalid_scope
+        credentials, proyecto = google.auth.default(
+            scopes=storage.Client.SCOPE)
+        credentials = google.auth.credentials.with_scopes_if_required(
+            credentials, storage.Client.SCOPE)
+        session = AuthorizedSession(credentials)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size)
+        session.mount("https://", adapter)
+        return storage.Client(project=self.project or proyecto,
+                              credentials=credentials, _http=session)
+
+    def cliente(self) -> storage.Client:
+        """Devuelve el cliente compartido, creándolo la primera vez.
+
+        Si la creación falla (p. ej. sin credenciales) el error se repite
+        durante `reintento_cliente_s` sin volver a resolver credenciales.
+        """
+        if self._cliente is not None:
+            return self._cliente
+        with self.lock:
+            if self._cliente is not None:
+                return self._cliente
+            if (self._error is not None and
+                    time.monotonic() - self._error_en < self.reintento_cliente_s):
+                raise self._error
+            try:
+                self._cliente = self._crear_cliente()
+            except Exception as e:
+                self._error = e
+                self._error_en = time.monotonic()
+                self.fallos_cliente += 1
+                raise
+            self._error = None
+            self.clientes_creados += 1
+            logger.info(f"☁️ Cliente GCS creado (pool de {self.pool_size} "
+                        f"conexiones)")
+            return self._cliente
+
+    def bucket(self, bucket_name: str) -> storage.Bucket:
+        bucket = self._buckets.get(bucket_name)
+        if bucket is None:
+            bucket = self.cliente().bucket(bucket_name)
+            self._buckets[bucket_name] = bucket
+        return bucket
+
+    def obtener_blob(self, bucket_name: str,
+                     blob_name: str) -> Optional[storage.Blob]:
+        """Metadatos del blob (generación, md5, tamaño) o None si no existe"""
+        blob = self.bucket(bucket_name).get_blob(
+            blob_name, timeout=self.timeout_metadatos)
+        with self.lock:
+            self.metadatos += 1
+        return blob
+
+    def descargar_bytes(self, blob: storage.Blob) -> bytes:
+        """Contenido del blob fijado a la generación de sus metadatos"""
+        contenido = blob.download_as_bytes(
+            timeout=self.timeout_descarga, if_generation_match=blob.generation)
+        self._contar_descarga(len(contenido))
+        return contenido
+
+    def descargar_archivo(self, blob: storage.Blob, destino: str):
+        """Descarga el blob a `destino` fijado a la generación de sus metadatos"""
+        blob.download_to_filename(
+            destino, timeout=self.timeout_descarga,
+            if_generation_match=blob.generation)
+        self._contar_descarga(blob.size or 0)
+
+    def subir_archivo(self, bucket_name: str, blob_name: str, origen: str):
+        """Sube el archivo local `origen` a gs://bucket_name/blob_name"""
+        self.bucket(bucket_name).blob(blob_name).upload_from_filename(
+            origen, timeout=self.timeout_descarga)
+
+    def _contar_descarga(self, tamano: int):
+        with self.lock:
+            self.descargas += 1
+            self.bytes_descargados += tamano
+
+    def reiniciar_tras_fork(self):
+        """En el proceso hijo: no compartir las conexiones TLS del padre"""
+        self.lock = threading.Lock()
+        self._cliente = None
+        self._buckets = {}
+        self._error = None
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {
+                "cliente_listo": self._cliente is not None,
+                "clientes_creados": self.clientes_creados,
+                "fallos_cliente": self.fallos_cliente,
+                "pool_size": self.pool_size,
+                "metadatos": self.metadatos,
+                "descargas": self.descargas,
+                "bytes_descargados": self.bytes_descargados,
+                "buckets": list(self._buckets)
+            }
+
+
+# Instancia global del cliente de GCS
+gcs = ClienteGCS()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=gcs.reiniciar_tras_fork)
+
+
+def separar_ruta_gcs(ruta: str):
+    """'gs://bucket/a/b.json' → ('bucket', 'a/b.json')"""
+    bucket_name, blob_name = ruta.replace("gs://", "").split("/", 1)
+    return bucket_name, blob_name
@@ -0,0 +1,290 @@
+"""
+Inferencia compilada: scaler y modelo evaluados con NumPy puro
+
+Extrae los parámetros del scaler y, cuando el tipo de estimador lo permite,
+los pesos o árboles del modelo a arreglos NumPy. Así cada evaluación evita
+la validación de entrada y el despacho de sklearn, que dominan el costo
+cuando se predice una sola fila dentro de un bucle.
+"""
+import logging
+from typing import Callable, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _compilar_scaler(scaler) -> Optional[Callable[[np.ndarray], np.ndarray]]:
+    """Devuelve una función equivalente a `scaler.transform` o None"""
+    nombre = type(scaler).__name__
+
+    if nombre == "StandardScaler":
+        media = getattr(scaler, "mean_", None)
+        escala = getattr(scaler, "scale_", None)
+        media = 0.0 if media is None or not scaler.with_mean else \
+            np.asarray(media, dtype=np.float64)
+        escala = 1.0 if escala is None or not scaler.with_std else \
+            np.asarray(escala, dtype=np.float64)
+        return lambda X: (X - media) / escala
+
+    if nombre == "MinMaxScaler":
+        escala = np.asarray(scaler.scale_, dtype=np.float64)
+        minimo = np.asarray(scaler.min_, dtype=np.float64)
+        if getattr(scaler, "clip", False):
+            inferior, superior = scaler.feature_range
+            return lambda X: np.clip(X * escala + minimo, inferior, superior)
+        return lambda X: X * escala + minimo
+
+    if nombre == "RobustScaler":
+        centro = getattr(scaler, "center_", None)
+        escala = getattr(scaler, "scale_", None)
+        centro = 0.0 if centro is None else np.asarray(centro, np.float64)
+        escala = 1.0 if escala is None else np.asarray(escala, np.float64)
+        return lambda X: (X - centro) / escala
+
+    return None
+
+
+class _BosqueCompilado:
+    """Árboles de regresión de sklearn aplanados en arreglos contiguos.
+
+    Todos los árboles se recorren a la vez: en cada paso se avanza un nivel
+    en todos ellos para todas las filas, así que el costo es de
+    `profundidad_maxima` operaciones vectorizadas por predicción.
+    """
+
+    def __init__(self, arboles, n_outputs: int, salida_1d: bool):
+        izquierdo, derecho, caracteristica, umbral, valor = [], [], [], [], []
+        raices = []
+        desplazamiento = 0
+        profundidad = 0
+
+        for arbol in arboles:
+            tree = arbol.tree_
+            n_nodos = tree.node_count
+            indices = np.arange(n_nodos)
+            hoja = tree.children_left == -1
+
+            # Las hojas apuntan a sí mismas para quedarse quietas en el recorrido
+            izquierdo.append(np.where(hoja, indices, tree.children_left)
+                             + desplazamiento)
+            derecho.append(np.where(hoja, indices, tree.children_right)
+                           + desplazamiento)
+            caracteristica.append(np.where(hoja, 0, tree.feature))
+            umbral.append(tree.threshold)
+            valor.append(tree.value[:, :n_outputs, 0])
+            raices.append(desplazamiento)
+
+            desplazamiento += n_nodos
+            profundidad = max(profundidad, tree.max_depth)
+
+        self.izquierdo = np.concatenate(izquierdo).astype(np.intp)
+        self.derecho = np.concatenate(derecho).astype(np.intp)
+        self.caracteristica = np.concatenate(caracteristica).astype(np.intp)
+        self.umbral = np.concatenate(umbral).astype(np.float64)
+        self.valor = np.concatenate(valor).astype(np.float64)
+        self.raices = np.asarray(raices, dtype=np.intp)
+        self.profundidad = profundidad
+        self.salida_1d = salida_1d
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.izquierdo, self.derecho,
+                                      self.caracteristica, self.umbral,
+                                      self.valor))
+
+    def predecir(self, X: np.ndarray) -> np.ndarray:
+        # sklearn compara en float32, igual que DTYPE de sus árboles
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        n = X.shape[0]
+        filas = np.arange(n)[None, :]
+        nodos = np.repeat(self.raices[:, None], n, axis=1)
+
+        for _ in range(self.profundidad):
+            x = X[filas, self.caracteristica[nodos]]
+            nodos = np.where(x <= self.umbral[nodos],
+                             self.izquierdo[nodos], self.derecho[nodos])
+
+        prediccion = self.valor[nodos].mean(axis=0)
+        return prediccion[:, 0] if self.salida_1d else prediccion
+
+
+class _LinealCompilado:
+    """Modelo lineal de sklearn como producto matricial"""
+
+    def __init__(self, modelo):
+        self.coef = np.asarray(modelo.coef_, dtype=np.float64)
+        self.intercepto = np.asarray(modelo.intercept_, dtype=np.float64)
+
+    @property
+    def nbytes(self) -> int:
+        return self.coef.nbytes + self.intercepto.nbytes
+
+    def predecir(self, X: np.ndarray) -> np.ndarray:
+        return X @ self.coef.T + self.intercepto
+
+
+class _MultiSalidaCompilado:
+    """MultiOutputRegressor con un núcleo compilado por columna"""
+
+    def __init__(self, nucleos):
+        self.nucleos = nucleos
+
+    @property
+    def nbytes(self) -> int:
+        return sum(n.nbytes for n in self.nucleos)
+
+    def predecir(self, X: np.ndarray) -> np.ndarray:
+        return np.column_stack([n.predecir(X) for n in self.nucleos])
+
+
+def _compilar_modelo(modelo):
+    """Devuelve un núcleo con `predecir(X)` o None si el tipo no se soporta"""
+    nombre = type(modelo).__name__
+    modulo = type(modelo).__module__
+
+    if nombre == "DecisionTreeRegressor":
+        return _BosqueCompilado([modelo], modelo.n_outputs_,
+                                salida_1d=modelo.n_outputs_ == 1)
+
+    if nombre in ("RandomForestRegressor", "ExtraTreesRegressor"):
+        return _BosqueCompilado(modelo.estimators_, modelo.n_outputs_,
+                                salida_1d=modelo.n_outputs_ == 1)
+
+    if modulo.startswith("sklearn.linear_model") and \
+            hasattr(modelo, "coef_") and hasattr(modelo, "intercept_"):
+        return _LinealCompilado(modelo)
+
+    if nombre == "MultiOutputRegressor":
+        nucleos = [_compilar_modelo(e) for e in modelo.estimators_]
+        if all(n is not None for n in nucleos):
+            return _MultiSalidaCompilado(nucleos)
+
+    return None
+
+
+def _muestras_verificacion(scaler, n: int) -> Optional[np.ndarray]:
+    """Genera filas representativas del dominio del scaler"""
+    rng = np.random.default_rng(0)
+    n_features = getattr(scaler, "n_features_in_", None)
+    if n_features is None:
+        return None
+
+    if getattr(scaler, "mean_", None) is not None and \
+            getattr(scaler, "scale_", None) is not None:
+        return scaler.mean_ + scaler.scale_ * rng.standard_normal(
+            (n, n_features))
+    if getattr(scaler, "data_min_", None) is not None:
+        return scaler.data_min_ + scaler.data_range_ * rng.uniform(
+            -0.1, 1.1, (n, n_features))
+    if getattr(scaler, "center_", None) is not None:
+        escala = getattr(scaler, "scale_", None)
+        escala = 1.0 if escala is None else escala
+        return scaler.center_ + escala * rng.standard_normal((n, n_features))
+    return None
+
+
+class InferenciaCompilada:
+    """Cadena scaler → modelo evaluada con NumPy cuando es posible.
+
+    Si el scaler o el modelo no se pueden compilar, o la verificación de
+    paridad falla, esa parte usa el objeto de sklearn original.
+    """
+
+    def __init__(self, modelo, scaler, compilar: bool = True,
+                 verificar: bool = True, muestras: int = 64,
+                 tolerancia: float = 1e-9, nucleo=None):
+        self.modelo = modelo
+        self.nombre_modelo = type(modelo).__name__
+        self.scaler = scaler
+        self._transformar = _compilar_scaler(scaler) if compilar else None
+        # `nucleo` permite reutilizar uno ya compilado (p. ej. mapeado)
+        if compilar and nucleo is None:
+            nucleo = _compilar_modelo(modelo)
+        self._nucleo = nucleo if compilar else None
+        self.paridad_verificada = False
+
+        if verificar and (self._transformar or self._nucleo):
+            X = _muestras_verificacion(scaler, muestras)
+            if X is not None:
+                self.paridad_verificada = self._verificar_paridad(
+                    X, tolerancia)
+                if not self.paridad_verificada:
+                    logger.warning(
+                        f"⚠️ Inferencia compilada difiere de sklearn para "
+                        f"{type(modelo).__name__}; se usa sklearn")
+                    self._transformar = None
+                    self._nucleo = None
+
+    @property
+    def scaler_compilado(self) -> bool:
+        return self._transformar is not None
+
+    @property
+    def modelo_compilado(self) -> bool:
+        return self._nucleo is not None
+
+    @property
+    def nbytes(self) -> int:
+        return self._nucleo.nbytes if self._nucleo is not None else 0
+
+    def liberar_modelo(self) -> bool:
+        """Suelta el estimador de sklearn si el núcleo verificado lo sustituye.
+
+        Un bosque deserializado vive entero en el heap de cada proceso; una
+        vez comprobada la paridad el núcleo compilado basta para predecir.
+        """
+        if self._nucleo is None or not self.paridad_verificada:
+            return False
+        self.modelo = None
+        return True
+
+    def transformar(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        if self._transformar is not None:
+            return self._transformar(X)
+        return self.scaler.transform(X)
+
+    def predecir(self, X: np.ndarray) -> np.ndarray:
+        """Equivalente a `modelo.predict(scaler.transform(X))`"""
+        X_scaled = self.transformar(X)
+        if self._nucleo is not None:
+            return self._nucleo.predecir(X_scaled)
+        return self.modelo.predict(X_scaled)
+
+    def _verificar_paridad(self, X: np.ndarray, tolerancia: float) -> bool:
+        try:
+            esperado = self.modelo.predict(self.scaler.transform(X))
+            obtenido = self.predecir(X)
+        except Exception as e:
+            logger.warning(f"⚠️ Error verificando inferencia compilada: {e}")
+            return False
+        return (esperado.shape == obtenido.shape and
+                np.allclose(esperado, obtenido, rtol=tolerancia,
+                            atol=tolerancia))
+
+    def describir(self) -> dict:
+        return {
+            "modelo": self.nombre_modelo,
+            "modelo_liberado": self.modelo is None,
+            "scaler": type(self.scaler).__name__,
+            "modelo_compilado": self.modelo_compilado,
+            "scaler_compilado": self.scaler_compilado,
+            "paridad_verificada": self.paridad_verificada
+        }
+
+
+def compilar_nucleo(modelo):
+    """Núcleo NumPy del modelo o None si el tipo no se soporta"""
+    return _compilar_modelo(modelo)
+
+
+def compilar_inferencia(modelo, scaler, compilar: bool = True,
+                        verificar: bool = True,
+                        nucleo=None) -> InferenciaCompilada:
+    """Compila la cadena scaler → modelo de una finca.
+
+    Con `compilar=False` se obtiene la misma interfaz usando sklearn.
+    """
+    return InferenciaCompilada(modelo, scaler, compilar=compilar,
+                               verificar=verificar, nucleo=nucleo)
@@ -0,0 +1,236 @@
+"""
+Artefactos de modelo mapeados en memoria y compartidos entre procesos
+
+`joblib.load` sobre el .pkl descargado materializa cada arreglo en el
+heap de cada proceso. Con ARTEFACTOS_MMAP=True el .pkl se reescribe una
+vez, sin compresión, en `<archivo>.mmap` (los arreglos NumPy quedan como
+buffers alineados) y se abre con `mmap_mode='r'`: trabajadores pre-fork y
+miembros del pool de procesos mapean las mismas páginas del page cache.
+
+Los árboles de sklearn copian sus nodos al deserializarse, así que para
+los bosques lo que se comparte es el núcleo de inferencia compilado, que
+se guarda aparte en `<modelo>.nucleo.mmap`.
+
+Las copias van a ARTEFACTOS_MMAP_DIR (vacío = junto al original). En
+Cloud Run /tmp vive en memoria: conviene apuntarlo a un volumen en disco
+y, con ARTEFACTOS_MMAP_ELIMINAR_ORIGEN, no conservar además el .pkl
+descargado.
+
+Junto a cada copia se guarda `<copia>.meta.json` con la firma del
+origen: generación y md5 del blob de GCS, o tamaño y mtime del archivo
+local. Si el origen cambia la copia se regenera.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import joblib
+from decouple import config
+
+from app.artifact_store import artifact_store
+
+logger = logging.getLogger(__name__)
+
+ARTEFACTOS_MMAP = config('ARTEFACTOS_MMAP', default=True, cast=bool)
+ARTEFACTOS_MMAP_DIR = config('ARTEFACTOS_MMAP_DIR', default='')
+# Borrar el .pkl descargado una vez convertido (solo si la firma es del blob)
+ARTEFACTOS_MMAP_ELIMINAR_ORIGEN = config(
+    'ARTEFACTOS_MMAP_ELIMINAR_ORIGEN', default=True, cast=bool)
+
+SUFIJO_MMAP = ".mmap"
+SUFIJO_NUCLEO = ".nucleo.mmap"
+SUFIJO_META = ".meta.json"
+# Se incrementa si cambia la estructura de los núcleos compilados
+FORMATO_NUCLEO = 1
+
+
+def _firma_origen(ruta: str) -> Dict[str, Any]:
+    estado = os.stat(ruta)
+    return {"tamano": estado.st_size, "mtime_ns": estado.st_mtime_ns}
+
+
+def firma_blob(meta: Dict[str, Any]) -> Dict[str, Any]:
+    """Firma de una copia a partir de los metadatos del blob de GCS"""
+    return {campo: meta[campo] for campo in
+            ("bucket", "blob", "generation", "md5_hash", "size")}
+
+
+class ArtefactosMapeados:
+    """Convierte artefactos joblib a copias mapeables y las abre con mmap"""
+
+    def __init__(self, activo: bool = ARTEFACTOS_MMAP,
+                 directorio: str = ARTEFACTOS_MMAP_DIR,
+                 eliminar_origen: bool = ARTEFACTOS_MMAP_ELIMINAR_ORIGEN):
+        self.activo = activo
+        self.directorio = directorio
+        self.eliminar_origen = eliminar_origen
+        self.lock = threading.Lock()
+        self._conversiones = 0
+        self._mapeados = 0
+        self._fallos = 0
+        self._origenes_eliminados = 0
+        self._tiempo_conversion = 0.0
+
+    def ruta_copia(self, ruta: str, sufijo: str = SUFIJO_MMAP) -> str:
+        if not self.directorio:
+            return ruta + sufijo
+        os.makedirs(self.directorio, exist_ok=True)
+        return os.path.join(self.directorio, os.path.basename(ruta) + sufijo)
+
+    def vigente(self, ruta: str, firma: Dict[str, Any],
+                sufijo: str = SUFIJO_MMAP) -> bool:
+        """Indica si la copia de `ruta` corresponde a `firma`"""
+        copia = self.ruta_copia(ruta, sufijo)
+        try:
+            with open(copia + SUFIJO_META) as f:
+                return os.path.exists(copia) and json.load(f) == firma
+        except (OSError, json.JSONDecodeError):
+            return False
+
+    def tamano(self, ruta: str, sufijo: str = SUFIJO_MMAP) -> int:
+        """Tamaño en disco del artefacto: el original o, si ya no está, su copia"""
+        for candidata in (ruta, self.ruta_copia(ruta, sufijo)):
+            if os.path.exists(candidata):
+                return os.path.getsize(candidata)
+        return 0
+
+    def _escribir(self, copia: str, firma: Dict[str, Any], valor: Any):
+        """Guarda `valor` sin comprimir y su firma, de forma atómica"""
+        directorio = os.path.dirname(copia) or "."
+        temporales = []
+        try:
+            for destino in (copia, copia + SUFIJO_META):
+                fd, temporal = tempfile.mkstemp(
+                    dir=directorio, prefix=os.path.basename(destino) + ".",
+                    suffix=".tmp")
+                os.close(fd)
+                temporales.append(temporal)
+            joblib.dump(valor, temporales[0], compress=0)
+            with open(temporales[1], 'w') as f:
+                json.dump(firma, f)
+            os.replace(temporales[0], copia)
+            os.replace(temporales[1], copia + SUFIJO_META)
+        finally:
+            for temporal in temporales:
+                if os.path.exists(temporal):
+                    os.remove(temporal)
+
+    def _mapear(self, copia: str) -> Any:
+        valor = joblib.load(copia, mmap_mode='r')
+        with self.lock:
+            self._mapeados += 1
+        return valor
+
+    def _eliminar_origen(self, ruta: str):
+        artifact_store.eliminar(ruta)
+        with self.lock:
+            self._origenes_eliminados += 1
+
+    def cargar(self, ruta: str, firma: Optional[Dict[str, Any]] = None) -> Any:
+        """Carga un artefacto joblib, mapeado en memoria si está activo.
+
+        Sin `firma` la copia se valida con el tamaño y mtime de `ruta`. Con
+        una firma externa (la del blob, la del manifiesto de un bundle) la
+        copia vigente se usa aunque `ruta` ya no exista, y `ruta` se borra
+        tras convertirla si ARTEFACTOS_MMAP_ELIMINAR_ORIGEN.
+
+        Ante cualquier error al convertir o mapear se carga el original.
+        """
+        if not self.activo:
+            return joblib.load(ruta)
+
+        copia = self.ruta_copia(ruta)
+        externa = firma is not None
+        try:
+            firma = firma if externa else _firma_origen(ruta)
+            if not self.vigente(ruta, firma):
+                inicio = time.perf_counter()
+                self._escribir(copia, firma, joblib.load(ruta))
+                with self.lock:
+                    self._conversiones += 1
+                    self._tiempo_conversion += time.perf_counter() - inicio
+                logger.info(f"🗺️ Copia mapeable creada: {copia}")
+            valor = self._mapear(copia)
+        except Exception as e:
+            with self.lock:
+                self._fallos += 1
+            logger.warning(f"⚠️ No se pudo mapear {ruta} ({e}); "
+                           f"se carga en memoria")
+            return joblib.load(ruta)
+
+        if externa and self.eliminar_origen and os.path.exists(ruta):
+            self._eliminar_origen(ruta)
+        return valor
+
+    def sincronizar_y_cargar(self, bucket_name: str, blob_name: str,
+                             destino: str) -> Tuple[Any, Dict[str, Any]]:
+        """Carga el blob de GCS; solo lo descarga si la copia no está vigente.
+
+        Returns:
+            tuple: (valor, firma del blob)
+        """
+        firma = firma_blob(artifact_store.meta_remota(bucket_name, blob_name))
+        if self.activo and self.vigente(destino, firma):
+            try:
+                return self._mapear(self.ruta_copia(destino)), firma
+            except Exception as e:
+                logger.warning(f"⚠️ Copia mapeada de {destino} ilegible: {e}")
+        artifact_store.sincronizar(bucket_name, blob_name, destino)
+        return self.cargar(destino, firma), firma
+
+    def cargar_nucleo(self, ruta_modelo: str, compilar: Callable[[], Any],
+                      firma: Optional[Dict[str, Any]] = None) -> Optional[Any]:
+        """Núcleo de inferencia del modelo en `ruta_modelo`, mapeado.
+
+        `compilar` construye el núcleo desde el modelo cuando no hay copia
+        vigente (devuelve None si el tipo de modelo no se soporta). `firma`
+        es la misma que se usó para cargar el modelo.
+        """
+        if not self.activo:
+            return compilar()
+
+        copia = self.ruta_copia(ruta_modelo, SUFIJO_NUCLEO)
+        try:
+            firma = dict(firma or _firma_origen(ruta_modelo),
+                         formato=FORMATO_NUCLEO)
+            if not self.vigente(ruta_modelo, firma, SUFIJO_NUCLEO):
+                inicio = time.perf_counter()
+                nucleo = compilar()
+                if nucleo is None:
+                    return None
+                self._escribir(copia, firma, nucleo)
+                with self.lock:
+                    self._conversiones += 1
+                    self._tiempo_conversion += time.perf_counter() - inicio
+            return self._mapear(copia)
+        except Exception as e:
+            with self.lock:
+                self._fallos += 1
+            logger.warning(f"⚠️ No se pudo mapear el núcleo de "
+                           f"{ruta_modelo} ({e}); se compila en memoria")
+            return compilar()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "activo": self.activo,
+                "directorio": self.directorio or None,
+                "conversiones": self._conversiones,
+                "mapeados": self._mapeados,
+                "fallos": self._fallos,
+                "origenes_eliminados": self._origenes_eliminados,
+                "tiempo_conversion_s": round(self._tiempo_conversion, 3),
+            }
+
+
+# Instancia global
+artefactos_mapeados = ArtefactosMapeados()
+
+
+def cargar_artefacto(ruta: str, firma: Optional[Dict[str, Any]] = None) -> Any:
+    """Equivalente a `joblib.load(ruta)` con los arreglos mapeados"""
+    return artefactos_mapeados.cargar(ruta, firma)
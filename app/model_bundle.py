@@ -0,0 +1,247 @@
+"""
+Bundles versionados de modelo: un solo archivo por finca
+
+Un bundle es un tar sin comprimir con `manifest.json` como primer
+miembro y un archivo por componente (modelo, scaler, selector,
+yscalers). El manifiesto lleva la versión del modelo y el sha256 y
+tamaño de cada componente; al extraer se verifica cada checksum y un
+bundle alterado o incompleto se rechaza.
+
+    python -m app.model_bundle empaquetar CAMANOVILLO [--version V] [--subir]
+    python -m app.model_bundle empaquetar todas --subir
+    python -m app.model_bundle inspeccionar /tmp/CAMANOVILLO_alimentation.tar
+
+`empaquetar` toma los cuatro blobs actuales de la finca (las variables
+*_ALIMENTATION_PATH_*) o archivos locales con --modelo/--scaler/...,
+y con --subir publica el bundle en BUNDLE_ALIMENTATION_PATH.
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+import tarfile
+import tempfile
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+FORMATO_BUNDLE = 1
+MANIFIESTO = "manifest.json"
+COMPONENTES_ALIMENTATION = ("modelo", "scaler", "selector", "yscalers")
+
+_BLOQUE = 1 << 20
+
+
+class BundleInvalido(ValueError):
+    """El bundle no tiene manifiesto válido o un checksum no coincide"""
+
+
+def sha256_archivo(ruta: str) -> str:
+    huella = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(_BLOQUE), b""):
+            huella.update(bloque)
+    return huella.hexdigest()
+
+
+def _version_por_defecto(componentes: Dict[str, Dict[str, Any]]) -> str:
+    """Fecha y huella del contenido: mismos artefactos, misma huella"""
+    huella = hashlib.sha256("".join(
+        componentes[nombre]["sha256"] for nombre in sorted(componentes)
+    ).encode()).hexdigest()
+    return f"{datetime.now(timezone.utc):%Y%m%d}-{huella[:8]}"
+
+
+def empaquetar(componentes: Dict[str, str], destino: str, finca: str,
+               tipo: str = "alimentation",
+               version: Optional[str] = None) -> Dict[str, Any]:
+    """Escribe en `destino` un bundle con los archivos de `componentes`.
+
+    Args:
+        componentes: nombre del componente → ruta local del artefacto
+        version: versión del modelo; por defecto fecha + huella
+
+    Returns:
+        dict: el manifiesto escrito
+    """
+    entradas = {}
+    for nombre, ruta in componentes.items():
+        entradas[nombre] = {
+            "archivo": nombre + (os.path.splitext(ruta)[1] or ".pkl"),
+            "sha256": sha256_archivo(ruta),
+            "tamano": os.path.getsize(ruta),
+        }
+    manifiesto = {
+        "formato": FORMATO_BUNDLE,
+        "tipo": tipo,
+        "finca": finca,
+        "version": version or _version_por_defecto(entradas),
+        "creado": datetime.now(timezone.utc).isoformat(),
+        "componentes": entradas,
+    }
+
+    directorio = os.path.dirname(destino) or "."
+    fd, temporal = tempfile.mkstemp(
+        dir=directorio, prefix=os.path.basename(destino) + ".",
+        suffix=".tmp")
+    os.close(fd)
+    try:
+        with tarfile.open(temporal, 'w') as tar:
+            contenido = json.dumps(manifiesto, indent=2).encode()
+            info = tarfile.TarInfo(MANIFIESTO)
+            info.size = len(contenido)
+            tar.addfile(info, io.BytesIO(contenido))
+            for nombre, ruta in componentes.items():
+                tar.add(ruta, arcname=entradas[nombre]["archivo"])
+        os.replace(temporal, destino)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+    return manifiesto
+
+
+def _leer_manifiesto(tar: tarfile.TarFile) -> Dict[str, Any]:
+    try:
+        manifiesto = json.load(tar.extractfile(MANIFIESTO))
+    except (KeyError, TypeError, json.JSONDecodeError) as e:
+        raise BundleInvalido(f"Manifiesto ilegible: {e}")
+    if manifiesto.get("formato") != FORMATO_BUNDLE:
+        raise BundleInvalido(
+            f"Formato de bundle no soportado: {manifiesto.get('formato')}")
+    return manifiesto
+
+
+def leer_manifiesto(ruta: str) -> Dict[str, Any]:
+    """Manifiesto de un bundle local"""
+    with tarfile.open(ruta, 'r:') as tar:
+        return _leer_manifiesto(tar)
+
+
+def extraer(ruta: str, prefijo: str,
+            requeridos=()) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """Extrae y verifica los componentes de un bundle.
+
+    Cada componente queda en `<prefijo>_<archivo>`. Si ya existe con el
+    mismo sha256 no se reescribe.
+
+    Returns:
+        tuple: (manifiesto, nombre del componente → ruta local)
+    """
+    rutas = {}
+    with tarfile.open(ruta, 'r:') as tar:
+        manifiesto = _leer_manifiesto(tar)
+        componentes = manifiesto.get("componentes", {})
+        faltantes = [n for n in requeridos if n not in componentes]
+        if faltantes:
+            raise BundleInvalido(f"Faltan componentes: {faltantes}")
+
+        for nombre, entrada in componentes.items():
+            destino = f"{prefijo}_{os.path.basename(entrada['archivo'])}"
+            rutas[nombre] = destino
+            if os.path.exists(destino) and \
+                    os.path.getsize(destino) == entrada["tamano"] and \
+                    sha256_archivo(destino) == entrada["sha256"]:
+                continue
+
+            try:
+                origen = tar.extractfile(entrada["archivo"])
+            except KeyError:
+                origen = None
+            if origen is None:
+                raise BundleInvalido(f"Falta {entrada['archivo']}")
+
+            fd, temporal = tempfile.mkstemp(
+                dir=os.path.dirname(destino) or ".",
+                prefix=os.path.basename(destino) + ".", suffix=".tmp")
+            try:
+                huella = hashlib.sha256()
+                with os.fdopen(fd, 'wb') as f:
+                    for bloque in iter(lambda: origen.read(_BLOQUE), b""):
+                        huella.update(bloque)
+                        f.write(bloque)
+                if huella.hexdigest() != entrada["sha256"]:
+                    raise BundleInvalido(
+                        f"Checksum de {nombre} no coincide con el manifiesto")
+                os.replace(temporal, destino)
+            finally:
+                if os.path.exists(temporal):
+                    os.remove(temporal)
+    return manifiesto, rutas
+
+
+# --- Herramienta de línea de comandos ---
+
+def _empaquetar_finca(finca: str, args) -> Dict[str, Any]:
+    from app import alimentation
+    from app.gcs import separar_ruta_gcs
+
+    destino = args.salida or f"/tmp/{finca}_alimentation.tar"
+    locales = {n: getattr(args, n) for n in COMPONENTES_ALIMENTATION}
+    with tempfile.TemporaryDirectory() as directorio:
+        componentes = {}
+        for nombre in COMPONENTES_ALIMENTATION:
+            if locales[nombre]:
+                componentes[nombre] = locales[nombre]
+                continue
+            bucket_name, blob_name = separar_ruta_gcs(
+                alimentation.modelos[finca][nombre])
+            componentes[nombre] = os.path.join(directorio, f"{nombre}.pkl")
+            alimentation.descargar_modelo(
+                bucket_name, blob_name, componentes[nombre])
+        manifiesto = empaquetar(componentes, destino, finca,
+                                version=args.version)
+
+    print(f"📦 {destino}: {finca} versión {manifiesto['version']}")
+    if args.subir:
+        from app.gcs import gcs
+
+        ruta = alimentation.BUNDLE_ALIMENTATION_PATH.format(finca=finca)
+        gcs.subir_archivo(*separar_ruta_gcs(ruta), destino)
+        print(f"☁️ Publicado en {ruta}")
+    return manifiesto
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.model_bundle")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    emp = comandos.add_parser(
+        "empaquetar", help="Empaqueta los artefactos de una finca")
+    emp.add_argument("fincas", nargs="+", help="Fincas o 'todas'")
+    emp.add_argument("--version")
+    emp.add_argument("--salida", help="Ruta del bundle (una sola finca)")
+    emp.add_argument("--subir", action="store_true",
+                     help="Publicar en BUNDLE_ALIMENTATION_PATH")
+    for nombre in COMPONENTES_ALIMENTATION:
+        emp.add_argument(f"--{nombre}", help=f"Archivo local de {nombre}")
+
+    ins = comandos.add_parser(
+        "inspeccionar", help="Muestra el manifiesto y verifica checksums")
+    ins.add_argument("ruta")
+
+    args = parser.parse_args(argv)
+
+    if args.comando == "inspeccionar":
+        with tempfile.TemporaryDirectory() as directorio:
+            manifiesto, _ = extraer(
+                args.ruta, os.path.join(directorio, "bundle"))
+        print(json.dumps(manifiesto, indent=2))
+        print("✅ Checksums verificados")
+        return 0
+
+    from app.alimentation import modelos
+
+    fincas = list(modelos) if args.fincas == ["todas"] else args.fincas
+    desconocidas = [f for f in fincas if f not in modelos]
+    if desconocidas:
+        parser.error(f"Fincas desconocidas: {desconocidas}")
+    if args.salida and len(fincas) > 1:
+        parser.error("--salida solo aplica a una finca")
+    for finca in fincas:
+        _empaquetar_finca(finca, args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
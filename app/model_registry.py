@@ -0,0 +1,131 @@
+"""
+Registro residente de modelos por finca con presupuesto de memoria (LRU)
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Tuple
+
+from decouple import config
+
+from app.singleflight import SingleFlight
+
+
+class ModelRegistry:
+    """Mantiene en memoria los artefactos cargados de cada finca.
+
+    Cada entrada guarda el valor cargado y su tamaño estimado en bytes.
+    Cuando el total supera el presupuesto se expulsan las entradas usadas
+    hace más tiempo (LRU). Las cargas concurrentes de una misma clave se
+    agrupan: solo la primera ejecuta el cargador.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self._entradas: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._bytes_en_uso = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._cargas = 0
+        self._tiempo_carga_total = 0.0
+        self._tiempo_carga_ultimo: Dict[str, float] = {}
+        self._vuelos = SingleFlight()
+
+    def obtener(self, clave: str,
+                cargador: Callable[[], Tuple[Any, int]]) -> Any:
+        """Devuelve el valor de `clave`, cargándolo con `cargador` si falta.
+
+        `cargador` debe devolver una tupla (valor, tamaño_en_bytes).
+        """
+        with self.lock:
+            if clave in self._entradas:
+                self._entradas.move_to_end(clave)
+                self._hits += 1
+                return self._entradas[clave][0]
+            self._misses += 1
+
+        return self._vuelos.ejecutar(
+            clave, lambda: self._cargar(clave, cargador))
+
+    def _cargar(self, clave: str,
+                cargador: Callable[[], Tuple[Any, int]]) -> Any:
+        """Ejecuta el cargador (una sola vez por clave en vuelo) y guarda"""
+        # Otra carga pudo completarse entre la consulta y el vuelo
+        with self.lock:
+            if clave in self._entradas:
+                return self._entradas[clave][0]
+
+        inicio = time.perf_counter()
+        valor, tamano = cargador()
+        duracion = time.perf_counter() - inicio
+
+        with self.lock:
+            self._cargas += 1
+            self._tiempo_carga_total += duracion
+            self._tiempo_carga_ultimo[clave] = round(duracion, 4)
+            self._guardar(clave, valor, tamano)
+
+        return valor
+
+    def _guardar(self, clave: str, valor: Any, tamano: int):
+        """Inserta una entrada y expulsa las menos usadas (requiere lock)"""
+        if clave in self._entradas:
+            self._bytes_en_uso -= self._entradas.pop(clave)[1]
+
+        self._entradas[clave] = (valor, tamano)
+        self._bytes_en_uso += tamano
+
+        # Siempre se conserva al menos la entrada recién cargada
+        while self._bytes_en_uso > self.max_bytes and len(self._entradas) > 1:
+            _, (_, tamano_expulsado) = self._entradas.popitem(last=False)
+            self._bytes_en_uso -= tamano_expulsado
+            self._evictions += 1
+
+    def contiene(self, clave: str) -> bool:
+        """Indica si la clave está cargada sin alterar el orden LRU"""
+        with self.lock:
+            return clave in self._entradas
+
+    def invalidar(self, clave: str) -> bool:
+        """Elimina una entrada del registro"""
+        with self.lock:
+            if clave not in self._entradas:
+                return False
+            self._bytes_en_uso -= self._entradas.pop(clave)[1]
+            return True
+
+    def limpiar(self):
+        """Vacía el registro sin reiniciar los contadores"""
+        with self.lock:
+            self._entradas.clear()
+            self._bytes_en_uso = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Obtener contadores del registro"""
+        with self.lock:
+            total = self._hits + self._misses
+            return {
+                "entradas": list(self._entradas.keys()),
+                "bytes_en_uso": self._bytes_en_uso,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / total * 100, 1) if total else 0.0,
+                "evictions": self._evictions,
+                "cargas": self._cargas,
+                "tiempo_carga_total_s": round(self._tiempo_carga_total, 4),
+                "tiempo_carga_promedio_s": round(
+                    self._tiempo_carga_total / self._cargas, 4
+                ) if self._cargas else 0.0,
+                "tiempo_carga_ultimo_s": dict(self._tiempo_carga_ultimo),
+                "cargas_compartidas": self._vuelos.get_stats()["compartidas"]
+            }
+
+
+# Instancia global del registro de modelos
+model_registry = ModelRegistry(
+    max_bytes=config('MODEL_REGISTRY_MAX_MB', default=256, cast=int)
+    * 1024 * 1024
+)
@@ -0,0 +1,121 @@
+"""
+Lectura incremental de NDJSON y procesamiento por lotes acotados
+
+Las sincronizaciones de fin de semana de Flutter suben cientos de
+muestreos en un solo cuerpo NDJSON (un objeto JSON por línea). El cuerpo
+se consume a medida que llega: se separa en líneas sin cargarlo entero,
+se agrupan hasta NDJSON_LOTE registros y cada lote se procesa y se
+devuelve antes de leer el siguiente, de modo que la memoria depende del
+tamaño del lote y no del de la subida.
+"""
+import json
+from typing import (Any, AsyncIterable, AsyncIterator, Dict, List,
+                    Tuple, Union)
+
+from decouple import config
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+
+# Registros por lote procesado
+NDJSON_LOTE = config('NDJSON_LOTE', default=32, cast=int)
+# Tamaño máximo de una línea; las más largas se descartan con error
+NDJSON_MAX_LINEA_KB = config('NDJSON_MAX_LINEA_KB', default=256, cast=int)
+
+# (número de línea, objeto JSON o mensaje de error)
+Registro = Tuple[int, Union[Dict[str, Any], str]]
+
+
+async def lineas_ndjson(fragmentos: AsyncIterable[bytes],
+                        max_bytes: int = None) -> AsyncIterator[Registro]:
+    """Separa un flujo de bytes en registros NDJSON.
+
+    Las líneas vacías se ignoran. Una línea que no es un objeto JSON o que
+    supera `max_bytes` produce un mensaje de error en lugar del objeto, y
+    la lectura sigue con la siguiente.
+    """
+    max_bytes = max_bytes or NDJSON_MAX_LINEA_KB * 1024
+    pendiente = bytearray()
+    numero = 0
+    descartando = False
+
+    def decodificar(linea: bytes) -> Union[Dict[str, Any], str]:
+        try:
+            objeto = json.loads(linea)
+        except (ValueError, UnicodeDecodeError) as e:
+            return f"JSON inválido: {e}"
+        if not isinstance(objeto, dict):
+            return "Cada línea debe ser un objeto JSON"
+        return objeto
+
+    async for fragmento in fragmentos:
+        pendiente += fragmento
+        inicio = 0
+        while True:
+            fin = pendiente.find(b"\n", inicio)
+            if fin < 0:
+                break
+            linea = bytes(pendiente[inicio:fin]).strip()
+            inicio = fin + 1
+            if descartando:
+                # Resto de una línea demasiado larga, ya informada
+                descartando = False
+                continue
+            if linea:
+                numero += 1
+                if len(linea) > max_bytes:
+                    yield numero, f"Línea de más de {max_bytes} bytes"
+                else:
+                    yield numero, decodificar(linea)
+        del pendiente[:inicio]
+
+        if len(pendiente) > max_bytes and not descartando:
+            numero += 1
+            yield numero, f"Línea de más de {max_bytes} bytes"
+            descartando = True
+        if descartando:
+            pendiente.clear()
+
+    linea = bytes(pendiente).strip()
+    if linea and not descartando:
+        numero += 1
+        yield numero, decodificar(linea)
+
+
+async def en_lotes(registros: AsyncIterable[Registro],
+                   tamano: int = None) -> AsyncIterator[List[Registro]]:
+    """Agrupa los registros en listas de hasta `tamano` elementos"""
+    tamano = max(1, tamano or NDJSON_LOTE)
+    lote: List[Registro] = []
+    async for registro in registros:
+        lote.append(registro)
+        if len(lote) >= tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def linea_json(objeto: Any) -> bytes:
+    """Serializa un resultado como una línea NDJSON"""
+    return json.dumps(objeto, ensure_ascii=False,
+                      default=str).encode("utf-8") + b"\n"
+
+
+class RespuestaNDJSON(StreamingResponse):
+    """StreamingResponse que lee el cuerpo de la solicitud mientras responde.
+
+    StreamingResponse, con servidores ASGI < 2.4, escucha la desconexión
+    del cliente en paralelo consumiendo `receive`, lo que se come los
+    fragmentos del cuerpo que el generador aún no ha leído. Aquí solo se
+    envía; una desconexión aparece al leer el cuerpo o al enviar.
+    """
+
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
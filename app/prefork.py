@@ -0,0 +1,290 @@
+"""
+Modo pre-fork: un maestro precarga todo y forkea N trabajadores uvicorn
+
+    python -m app.prefork
+
+El maestro importa la aplicación, precarga modelos y datos de referencia
+(el mismo warmup del arranque normal, esperando a que termine, más la
+tabla de Rendimiento de /predict) con el GC deshabilitado, llama a
+`gc.freeze()` y forkea PREFORK_WORKERS procesos que comparten el socket
+de escucha. Los objetos grandes (modelos sklearn, arreglos NumPy,
+índices) quedan en páginas compartidas copy-on-write en lugar de
+duplicarse en cada trabajador; `gc.freeze()` evita que las pasadas del
+GC de los hijos toquen esas páginas. Si un trabajador muere, el maestro
+forkea otro desde la misma imagen precargada.
+
+`estado_memoria()` lee /proc/<pid>/smaps_rollup de cada proceso (RSS,
+PSS, compartida, privada) y estima cuántos trabajadores caben en el
+límite de memoria del contenedor; se publica en /stats.
+"""
+import gc
+import logging
+import math
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from decouple import config
+
+from app.process_pool import cpus_disponibles
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 0 = uno por CPU de la cuota del contenedor
+PREFORK_WORKERS = config('PREFORK_WORKERS', default=0, cast=int)
+PREFORK_HOST = config('HOST', default='0.0.0.0')
+PREFORK_PORT = config('PORT', default=8080, cast=int)
+PREFORK_APP = config('PREFORK_APP', default='main:app')
+# Cada cuánto registra el maestro la memoria de los trabajadores (0 = nunca)
+PREFORK_REPORTE_S = config('PREFORK_REPORTE_S', default=300.0, cast=float)
+
+# Variable de entorno con el pid del maestro, visible en los trabajadores
+_ENV_MAESTRO = "PREFORK_MAESTRO"
+
+_CAMPOS_SMAPS = {
+    "Rss": "rss",
+    "Pss": "pss",
+    "Shared_Clean": "compartida_limpia",
+    "Shared_Dirty": "compartida_sucia",
+    "Private_Clean": "privada_limpia",
+    "Private_Dirty": "privada_sucia",
+    "Swap": "swap",
+}
+
+
+# --- Memoria por proceso ---
+
+def parsear_smaps(texto: str) -> Dict[str, int]:
+    """Suma en bytes los campos de smaps / smaps_rollup"""
+    memoria = dict.fromkeys(_CAMPOS_SMAPS.values(), 0)
+    for linea in texto.splitlines():
+        partes = linea.split()
+        if len(partes) == 3 and partes[2] == "kB":
+            campo = _CAMPOS_SMAPS.get(partes[0].rstrip(":"))
+            if campo is not None:
+                memoria[campo] += int(partes[1]) * 1024
+    memoria["compartida"] = (memoria["compartida_limpia"] +
+                             memoria["compartida_sucia"])
+    memoria["privada"] = memoria["privada_limpia"] + memoria["privada_sucia"]
+    return memoria
+
+
+def memoria_proceso(pid: Any = "self") -> Optional[Dict[str, int]]:
+    """RSS, PSS, compartida y privada de un proceso (None si no se puede leer)"""
+    for archivo in ("smaps_rollup", "smaps"):
+        try:
+            with open(f"/proc/{pid}/{archivo}") as f:
+                return parsear_smaps(f.read())
+        except OSError:
+            continue
+    return None
+
+
+def limite_memoria(raiz_cgroup: str = "/sys/fs/cgroup") -> Optional[int]:
+    """Límite de memoria del contenedor en bytes (cgroup v2 o v1)"""
+    for ruta in ("memory.max", os.path.join("memory",
+                                            "memory.limit_in_bytes")):
+        try:
+            with open(os.path.join(raiz_cgroup, ruta)) as f:
+                valor = f.read().strip()
+        except OSError:
+            continue
+        if valor == "max":
+            return None
+        try:
+            limite = int(valor)
+        except ValueError:
+            continue
+        # cgroup v1 sin límite reporta un valor cercano a 2**63
+        return limite if limite < 2 ** 60 else None
+    return None
+
+
+def trabajadores_que_caben(limite: Optional[int], pss_total: int,
+                           privada_media: float, actuales: int
+                           ) -> Optional[int]:
+    """Trabajadores que caben si cada uno nuevo añade su memoria privada.
+
+    La suma de PSS reparte las páginas compartidas entre quienes las usan,
+    así que es el uso real del grupo; un trabajador más solo suma lo que
+    no comparte.
+    """
+    if not limite or privada_media <= 0:
+        return None
+    libre = limite - pss_total
+    return max(0, actuales + math.floor(libre / privada_media))
+
+
+def _hijos(pid: int) -> List[int]:
+    hijos = []
+    for entrada in os.listdir("/proc"):
+        if not entrada.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entrada}/stat") as f:
+                # El nombre va entre paréntesis y puede tener espacios
+                campos = f.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if int(campos[1]) == pid:
+            hijos.append(int(entrada))
+    return sorted(hijos)
+
+
+def estado_memoria() -> Dict[str, Any]:
+    """Memoria de este proceso y, en modo pre-fork, de maestro y trabajadores"""
+    maestro = os.environ.get(_ENV_MAESTRO)
+    estado: Dict[str, Any] = {
+        "modo": "prefork" if maestro else "proceso_unico",
+        "pid": os.getpid(),
+        "proceso": memoria_proceso(),
+        "limite_contenedor": limite_memoria(),
+        "gc_congelados": gc.get_freeze_count(),
+    }
+    if not maestro:
+        return estado
+
+    maestro = int(maestro)
+    trabajadores = {pid: memoria_proceso(pid) for pid in _hijos(maestro)}
+    trabajadores = {pid: m for pid, m in trabajadores.items() if m}
+    memoria_maestro = memoria_proceso(maestro)
+    estado["maestro"] = memoria_maestro
+    estado["trabajadores"] = trabajadores
+
+    if trabajadores and memoria_maestro:
+        pss_total = memoria_maestro["pss"] + sum(
+            m["pss"] for m in trabajadores.values())
+        privada_media = sum(
+            m["privada"] for m in trabajadores.values()) / len(trabajadores)
+        estado["pss_total"] = pss_total
+        estado["privada_media_trabajador"] = round(privada_media)
+        estado["trabajadores_que_caben"] = trabajadores_que_caben(
+            estado["limite_contenedor"], pss_total, privada_media,
+            len(trabajadores))
+    return estado
+
+
+# --- Servidor pre-fork ---
+
+def _precargar(ruta_app: str):
+    """Importa la aplicación y precarga todo antes de forkear"""
+    from uvicorn.importer import import_from_string
+
+    from app.warmup import ejecutar_warmup
+
+    app = import_from_string(ruta_app)
+    # Sin timeout: forkear con hilos de precarga vivos dejaría en los hijos
+    # locks (registro, singleflight, GCS) tomados para siempre. Incluye la
+    # tabla de Rendimiento de /predict (cargador_rendimiento.refrescar), que
+    # así también se comparte; cada hijo solo arranca su hilo de refresco
+    # (lifespan) después del fork y no repite la precarga.
+    ejecutar_warmup(timeout=None)
+    return app
+
+
+def _trabajador(app, sock: socket.socket, maestro: int):
+    """Cuerpo de un proceso hijo: sirve la aplicación hasta recibir SIGTERM"""
+    import uvicorn
+
+    os.environ[_ENV_MAESTRO] = str(maestro)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    gc.enable()
+    servidor = uvicorn.Server(uvicorn.Config(app, lifespan="on"))
+    servidor.run(sockets=[sock])
+
+
+def _registrar_memoria(pids: List[int]):
+    for pid in pids:
+        memoria = memoria_proceso(pid)
+        if memoria:
+            logger.info(
+                f"📊 Trabajador {pid}: RSS {memoria['rss'] >> 20} MiB, "
+                f"PSS {memoria['pss'] >> 20} MiB, compartida "
+                f"{memoria['compartida'] >> 20} MiB, privada "
+                f"{memoria['privada'] >> 20} MiB")
+
+
+def servir(ruta_app: str = PREFORK_APP, host: str = PREFORK_HOST,
+           puerto: int = PREFORK_PORT, trabajadores: int = PREFORK_WORKERS):
+    """Precarga, congela el heap y supervisa N trabajadores forkeados"""
+    trabajadores = trabajadores or cpus_disponibles()
+
+    # Sin GC durante la precarga: los objetos nacen juntos y no se mueven
+    # entre generaciones antes de congelarse
+    gc.disable()
+    app = _precargar(ruta_app)
+    vivos = [h.name for h in threading.enumerate()
+             if h is not threading.main_thread() and not h.daemon]
+    if vivos:
+        raise RuntimeError(f"No se puede forkear con hilos activos: {vivos}")
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, puerto))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    gc.collect()
+    gc.freeze()
+    logger.info(f"🧊 Heap congelado ({gc.get_freeze_count()} objetos); "
+                f"forkeando {trabajadores} trabajadores en "
+                f"{host}:{puerto}")
+
+    maestro = os.getpid()
+    hijos: Dict[int, int] = {}
+    deteniendo = False
+
+    def forkear(indice: int):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _trabajador(app, sock, maestro)
+            finally:
+                os._exit(0)
+        hijos[pid] = indice
+
+    def detener(signum, _frame):
+        nonlocal deteniendo
+        deteniendo = True
+        for pid in list(hijos):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, detener)
+    signal.signal(signal.SIGINT, detener)
+
+    for indice in range(trabajadores):
+        forkear(indice)
+
+    ultimo_reporte = time.monotonic()
+    while hijos:
+        pid, estado = os.waitpid(-1, os.WNOHANG)
+        if pid == 0:
+            time.sleep(1.0)
+            if PREFORK_REPORTE_S and \
+                    time.monotonic() - ultimo_reporte >= PREFORK_REPORTE_S:
+                _registrar_memoria(list(hijos))
+                ultimo_reporte = time.monotonic()
+            continue
+        indice = hijos.pop(pid, None)
+        if indice is None or deteniendo:
+            continue
+        logger.warning(f"⚠️ Trabajador {pid} terminó "
+                       f"(estado {estado}); forkeando otro")
+        time.sleep(1.0)
+        forkear(indice)
+
+    sock.close()
+    logger.info("👋 Maestro pre-fork detenido")
+
+
+if __name__ == "__main__":
+    sys.exit(servir())
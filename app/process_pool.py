@@ -0,0 +1,218 @@
+"""
+Pool de procesos opcional para la inferencia y el cálculo de alimentación
+
+La inferencia y la aritmética de AquacultureCalculator son Python ligado
+a CPU y dentro de un solo proceso se serializan en el GIL. Con
+PROCESS_POOL=True las tareas se envían a un pool de procesos: cada
+trabajador precarga una vez los modelos de las fincas y las tablas de
+referencia (el mismo warmup) y recibe solo la solicitud, que es pequeña
+y serializable. El proceso principal no precarga nada: no usa los
+modelos. Cada trabajador atiende una tarea a la vez, así que el
+despachador de micro-lotes de /predict no agrupa solicitudes en este
+modo. El tamaño del pool sigue la
+cuota de CPU del contenedor (cgroup) salvo que se fije
+PROCESS_POOL_WORKERS.
+"""
+import importlib
+import logging
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+from decouple import config
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+PROCESS_POOL = config('PROCESS_POOL', default=False, cast=bool)
+# 0 = según la cuota de CPU del contenedor
+PROCESS_POOL_WORKERS = config('PROCESS_POOL_WORKERS', default=0, cast=int)
+# spawn evita heredar los hilos del proceso principal a medio estado
+PROCESS_POOL_START = config('PROCESS_POOL_START', default='spawn')
+
+# Tarea → (módulo, función) que se resuelve dentro del trabajador
+TAREAS = {
+    'predict': ('app.animal', 'procesar_prediccion_animal'),
+    'predict_lote': ('app.animal', 'procesar_prediccion_animal_lote'),
+    'alimentation': ('app.alimentation', 'procesar_prediccion_alimentation'),
+    'alimentation_finca': ('app.alimentation', 'procesar_alimentacion_finca'),
+    'alimentation_ndjson': ('app.alimentation', 'procesar_lote_ndjson'),
+}
+
+
+def cpus_disponibles(raiz_cgroup: str = "/sys/fs/cgroup") -> int:
+    """CPUs que puede usar el contenedor.
+
+    Se toma la cuota de cgroup v2 (cpu.max) o v1 (cpu.cfs_quota_us /
+    cpu.cfs_period_us), redondeada hacia arriba, y nunca más que las CPUs
+    asignadas al proceso.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        cpus = os.cpu_count() or 1
+
+    cuota = None
+    try:
+        with open(os.path.join(raiz_cgroup, "cpu.max")) as f:
+            limite, periodo = f.read().split()[:2]
+        if limite != "max":
+            cuota = int(limite) / int(periodo)
+    except (OSError, ValueError):
+        try:
+            with open(os.path.join(raiz_cgroup, "cpu",
+                                   "cpu.cfs_quota_us")) as f:
+                limite = int(f.read())
+            with open(os.path.join(raiz_cgroup, "cpu",
+                                   "cpu.cfs_period_us")) as f:
+                periodo = int(f.read())
+            if limite > 0 and periodo > 0:
+                cuota = limite / periodo
+        except (OSError, ValueError):
+            pass
+
+    if cuota is not None and cuota > 0:
+        cpus = min(cpus, math.ceil(cuota))
+    return max(1, cpus)
+
+
+def _iniciar_trabajador():
+    """Precarga de cada proceso trabajador (una vez, al arrancar)"""
+    from app import warmup
+    from app.animal import cargador_rendimiento
+
+    cargador_rendimiento.iniciar()
+    if warmup.WARMUP_ENABLED:
+        warmup.ejecutar_warmup()
+    logger.info(f"🧩 Trabajador {os.getpid()} listo")
+
+
+def _llamar(tarea: str, args: tuple):
+    """Ejecuta la tarea en el trabajador.
+
+    HTTPException no se puede deserializar en el proceso principal, así
+    que viaja como tupla y se reconstruye allí.
+    """
+    modulo, funcion = TAREAS[tarea]
+    try:
+        resultado = getattr(importlib.import_module(modulo), funcion)(*args)
+    except HTTPException as e:
+        return ("http", e.status_code, e.detail, e.headers)
+    return ("ok", resultado)
+
+
+def _pid() -> int:
+    return os.getpid()
+
+
+class PoolProcesos:
+    """ProcessPoolExecutor perezoso que se recrea si un trabajador muere"""
+
+    def __init__(self, activo: bool = PROCESS_POOL,
+                 trabajadores: int = PROCESS_POOL_WORKERS,
+                 metodo_inicio: str = PROCESS_POOL_START,
+                 inicializador=_iniciar_trabajador):
+        self.activo = activo
+        self.trabajadores = trabajadores or cpus_disponibles()
+        self.metodo_inicio = metodo_inicio
+        self.inicializador = inicializador
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+        # Métricas
+        self.enviadas = 0
+        self.completadas = 0
+        self.errores = 0
+        self.reinicios = 0
+
+    def _obtener_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.trabajadores,
+                    mp_context=multiprocessing.get_context(
+                        self.metodo_inicio),
+                    initializer=self.inicializador)
+            return self._pool
+
+    def iniciar(self, al_listo: Optional[Callable[[], None]] = None):
+        """Arranca todos los trabajadores para que precarguen de inmediato.
+
+        `al_listo` se llama cuando cada arranque respondió, es decir, tras
+        la precarga del trabajador que lo atendió.
+        """
+        if not self.activo:
+            return
+        pool = self._obtener_pool()
+        futuros = [pool.submit(_pid) for _ in range(self.trabajadores)]
+        if al_listo is not None:
+            def esperar():
+                wait(futuros)
+                al_listo()
+
+            threading.Thread(target=esperar, name="pool-listo",
+                             daemon=True).start()
+
+    def ejecutar(self, tarea: str, *args) -> Any:
+        """Ejecuta `tarea` en un trabajador y espera el resultado"""
+        pool = self._obtener_pool()
+        with self._lock:
+            self.enviadas += 1
+        try:
+            respuesta = pool.submit(_llamar, tarea, args).result()
+        except BrokenProcessPool:
+            # Un trabajador murió: el pool queda inservible y se recrea
+            with self._lock:
+                self.errores += 1
+                if self._pool is pool:
+                    self._pool = None
+                    self.reinicios += 1
+            pool.shutdown(wait=False)
+            raise
+        except Exception:
+            with self._lock:
+                self.errores += 1
+            raise
+
+        with self._lock:
+            self.completadas += 1
+        if respuesta[0] == "http":
+            _, status_code, detail, headers = respuesta
+            raise HTTPException(status_code=status_code, detail=detail,
+                                headers=headers)
+        return respuesta[1]
+
+    def cerrar(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "activo": self.activo,
+                "trabajadores": self.trabajadores,
+                "metodo_inicio": self.metodo_inicio,
+                "enviadas": self.enviadas,
+                "completadas": self.completadas,
+                "en_curso": self.enviadas - self.completadas - self.errores,
+                "errores": self.errores,
+                "reinicios": self.reinicios,
+            }
+
+
+# Instancia global
+pool_procesos = PoolProcesos()
+
+
+def despachar(tarea: str, *args) -> Any:
+    """Ejecuta `tarea` en el pool de procesos si está activo, si no aquí"""
+    if pool_procesos.activo:
+        return pool_procesos.ejecutar(tarea, *args)
+    modulo, funcion = TAREAS[tarea]
+    return getattr(importlib.import_module(modulo), funcion)(*args)
@@ -0,0 +1,249 @@
+"""
+Datos de referencia (pesos_alimento, Terrain, Rendimiento) compartidos por el proceso
+
+Cada JSON se descarga una vez y se entrega a todos los calculadores como
+una instantánea inmutable. Pasado `REFERENCE_TTL_S` se revalida contra la
+generación del objeto en GCS (o la fecha de modificación del archivo
+local) y solo se vuelve a descargar si cambió. Si la revalidación falla se
+sigue sirviendo la última copia buena.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from decouple import config
+
+from app.gcs import gcs, separar_ruta_gcs
+from app.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_TTL_S = config('REFERENCE_TTL_S', default=300.0, cast=float)
+
+
+class _DictCongelado(dict):
+    """dict de solo lectura: sigue siendo `isinstance(x, dict)`"""
+
+    def _inmutable(self, *args, **kwargs):
+        raise TypeError("Los datos de referencia son de solo lectura")
+
+    __setitem__ = __delitem__ = _inmutable
+    clear = pop = popitem = setdefault = update = _inmutable
+    __ior__ = _inmutable
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (_DictCongelado, (dict(self),))
+
+
+class _ListaCongelada(list):
+    """list de solo lectura: sigue siendo `isinstance(x, list)`"""
+
+    def _inmutable(self, *args, **kwargs):
+        raise TypeError("Los datos de referencia son de solo lectura")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _inmutable
+    append = extend = insert = pop = remove = clear = _inmutable
+    sort = reverse = _inmutable
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (_ListaCongelada, (list(self),))
+
+
+def congelar(valor: Any) -> Any:
+    """Copia profunda de un JSON con dicts y listas de solo lectura"""
+    if isinstance(valor, dict):
+        return _DictCongelado((k, congelar(v)) for k, v in valor.items())
+    if isinstance(valor, list):
+        return _ListaCongelada(congelar(v) for v in valor)
+    return valor
+
+
+class _Entrada:
+    __slots__ = ("data", "generacion", "verificado", "cargado", "derivados")
+
+    def __init__(self, data: Any, generacion: Optional[str]):
+        self.data = data
+        self.generacion = generacion
+        self.verificado = time.monotonic()
+        self.cargado = time.time()
+        # Estructuras construidas a partir de esta instantánea (índices)
+        self.derivados: Dict[str, Any] = {}
+
+
+_lock = threading.Lock()
+_datos: Dict[str, _Entrada] = {}
+_vuelos = SingleFlight()
+_contadores = {
+    "hits": 0,
+    "misses": 0,
+    "revalidaciones": 0,
+    "sin_cambios": 0,
+    "recargas": 0,
+    "recargas_vacias": 0,
+    "errores_revalidacion": 0,
+    "derivados_construidos": 0
+}
+
+
+def _contar(nombre: str):
+    with _lock:
+        _contadores[nombre] += 1
+
+
+def _generacion(ruta: str) -> Optional[str]:
+    """Versión actual del objeto sin descargar su contenido"""
+    if ruta.startswith("gs://"):
+        blob = gcs.obtener_blob(*separar_ruta_gcs(ruta))
+        if blob is None:
+            raise FileNotFoundError(ruta)
+        return str(blob.generation)
+
+    estado = os.stat(ruta)
+    return f"{estado.st_mtime_ns}-{estado.st_size}"
+
+
+def _descargar_json(ruta: str) -> Tuple[Any, Optional[str]]:
+    """Descarga un JSON desde `gs://bucket/blob` o lo lee de un archivo local.
+
+    Devuelve (data, generación).
+    """
+    if ruta.startswith("gs://"):
+        blob = gcs.obtener_blob(*separar_ruta_gcs(ruta))
+        if blob is None:
+            raise FileNotFoundError(ruta)
+        contenido = gcs.descargar_bytes(blob)
+        return json.loads(contenido), str(blob.generation)
+
+    generacion = _generacion(ruta)
+    with open(ruta, 'r', encoding='utf-8') as f:
+        return json.load(f), generacion
+
+
+def _cargar(ruta: str) -> Any:
+    data, generacion = _descargar_json(ruta)
+    data = congelar(data)
+    if data:
+        with _lock:
+            _datos[ruta] = _Entrada(data, generacion)
+    return data
+
+
+def _revalidar(ruta: str, entrada: _Entrada) -> Any:
+    """Compara la generación vigente y recarga solo si cambió"""
+    _contar("revalidaciones")
+    try:
+        generacion = _generacion(ruta)
+        if generacion == entrada.generacion:
+            _contar("sin_cambios")
+            entrada.verificado = time.monotonic()
+            return entrada.data
+
+        data = _cargar(ruta)
+        if not data:
+            # Se sigue sirviendo la copia anterior hasta el próximo TTL
+            _contar("recargas_vacias")
+            entrada.verificado = time.monotonic()
+            logger.warning(f"⚠️ {ruta} cambió pero llegó vacío; "
+                           f"se conserva la copia anterior")
+            return entrada.data
+        _contar("recargas")
+        return data
+    except Exception as e:
+        # Se sigue sirviendo la última copia buena hasta el próximo TTL
+        _contar("errores_revalidacion")
+        entrada.verificado = time.monotonic()
+        logger.warning(f"⚠️ No se pudo revalidar {ruta}: {e}")
+        return entrada.data
+
+
+def obtener_json_referencia(ruta: str, ttl_s: float = None) -> Any:
+    """Devuelve el JSON de `ruta` como instantánea inmutable compartida.
+
+    La primera llamada lo descarga; las siguientes lo sirven desde memoria
+    y, vencido el TTL, lo revalidan contra la generación del objeto. Los
+    errores de la primera descarga se propagan y los resultados vacíos no
+    se guardan, para que la siguiente llamada vuelva a intentarlo.
+    """
+    ttl_s = REFERENCE_TTL_S if ttl_s is None else ttl_s
+    with _lock:
+        entrada = _datos.get(ruta)
+
+    if entrada is not None:
+        if time.monotonic() - entrada.verificado < ttl_s:
+            _contar("hits")
+            return entrada.data
+        # Revalidaciones concurrentes de la misma ruta comparten una petición
+        return _vuelos.ejecutar(ruta, lambda: _revalidar(ruta, entrada))
+
+    _contar("misses")
+    # Descargas concurrentes de la misma ruta comparten una sola petición
+    return _vuelos.ejecutar(ruta, lambda: _cargar(ruta))
+
+
+def derivar(ruta: str, nombre: str, funcion: Callable[[Any], Any],
+            ttl_s: float = None) -> Any:
+    """Devuelve `funcion(data)` construido una vez por instantánea de `ruta`.
+
+    El resultado se guarda junto a la instantánea, así que solo se vuelve
+    a construir cuando el objeto cambia y se recarga.
+    """
+    data = obtener_json_referencia(ruta, ttl_s)
+    with _lock:
+        entrada = _datos.get(ruta)
+        if entrada is None or entrada.data is not data:
+            entrada = None
+        elif nombre in entrada.derivados:
+            return entrada.derivados[nombre]
+
+    def construir():
+        if entrada is not None and nombre in entrada.derivados:
+            return entrada.derivados[nombre]
+        valor = funcion(data)
+        _contar("derivados_construidos")
+        if entrada is not None:
+            with _lock:
+                entrada.derivados[nombre] = valor
+        return valor
+
+    return _vuelos.ejecutar(f"{ruta}#{nombre}", construir)
+
+
+def rutas_cargadas() -> List[str]:
+    """Lista las rutas de referencia que ya están en memoria"""
+    with _lock:
+        return list(_datos.keys())
+
+
+def get_stats() -> dict:
+    with _lock:
+        consultas = _contadores["hits"] + _contadores["misses"]
+        ahora = time.time()
+        return {
+            **_contadores,
+            "hit_rate": round(_contadores["hits"] / consultas * 100, 2)
+            if consultas else 0.0,
+            "ttl_s": REFERENCE_TTL_S,
+            "rutas": {
+                ruta: {
+                    "generacion": entrada.generacion,
+                    "edad_s": round(ahora - entrada.cargado, 1),
+                    "derivados": list(entrada.derivados)
+                }
+                for ruta, entrada in _datos.items()
+            }
+        }
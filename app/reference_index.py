@@ -0,0 +1,97 @@
+"""
+Índices en memoria sobre Terrain.json y Rendimiento.json
+
+Se construyen una vez por instantánea de datos de referencia (ver
+`reference_data.derivar`) y responden en O(1) las consultas que
+`AquacultureCalculator.fetch_data` resolvía recorriendo el JSON en cada
+solicitud: filas de una finca, piscina → hectáreas y filas de rendimiento
+de una finca.
+"""
+from typing import Any, Dict, List, Optional
+
+
+def _filas_finca(finca_info: Any) -> Optional[List[Dict[str, Any]]]:
+    """Filas de una finca en formato {"rows": [...]} o lista directa"""
+    if isinstance(finca_info, dict) and 'rows' in finca_info:
+        return finca_info['rows']
+    if isinstance(finca_info, list):
+        return finca_info
+    return None
+
+
+class FilasFinca:
+    """Filas de terreno de una finca con búsqueda directa por piscina"""
+
+    __slots__ = ("filas", "opciones", "por_piscina")
+
+    def __init__(self, filas: List[Dict[str, Any]]):
+        self.filas = filas
+        self.opciones = [str(item.get('Piscinas', '')) for item in filas]
+        self.por_piscina: Dict[str, Dict[str, Any]] = {}
+        for opcion, item in zip(self.opciones, filas):
+            # Como el recorrido original, gana la primera coincidencia
+            self.por_piscina.setdefault(opcion, item)
+
+
+_SIN_FILAS = FilasFinca([])
+
+
+class IndiceTerrain:
+    """finca → piscina → fila de Terrain.json.
+
+    Respeta el orden de búsqueda de `fetch_data`: clave de la finca en
+    mayúsculas, luego en minúsculas, luego la lista `data` filtrada por
+    finca y por último el diccionario `fincas`.
+    """
+
+    def __init__(self, terrain_data: Dict[str, Any]):
+        terrain_data = terrain_data or {}
+        self._claves = set(terrain_data)
+        self._por_clave: Dict[str, FilasFinca] = {}
+        for clave, finca_info in terrain_data.items():
+            filas = _filas_finca(finca_info)
+            if filas is not None:
+                self._por_clave[clave] = FilasFinca(filas)
+
+        self._por_data: Dict[str, FilasFinca] = {}
+        if 'data' in terrain_data:
+            agrupadas: Dict[str, List[Dict[str, Any]]] = {}
+            for item in terrain_data['data']:
+                finca = str(item.get('finca', '') or '').upper()
+                agrupadas.setdefault(finca, []).append(item)
+            self._por_data = {f: FilasFinca(filas)
+                              for f, filas in agrupadas.items()}
+
+        self._por_fincas: Dict[str, FilasFinca] = {}
+        if 'fincas' in terrain_data:
+            self._por_fincas = {
+                f: FilasFinca(filas)
+                for f, filas in terrain_data['fincas'].items()}
+
+    def finca(self, finca_nombre: str) -> FilasFinca:
+        finca_upper = finca_nombre.upper()
+        if finca_upper in self._claves:
+            return self._por_clave.get(finca_upper, _SIN_FILAS)
+        if finca_nombre.lower() in self._claves:
+            return self._por_clave.get(finca_nombre.lower(), _SIN_FILAS)
+        if 'data' in self._claves:
+            return self._por_data.get(finca_upper, _SIN_FILAS)
+        if 'fincas' in self._claves:
+            return self._por_fincas.get(finca_upper, _SIN_FILAS)
+        return _SIN_FILAS
+
+
+class IndiceRendimiento:
+    """finca → filas de Rendimiento.json (todas si la finca no tiene propias)"""
+
+    def __init__(self, rendimiento_json: Dict[str, Any]):
+        self.filas: List[Dict[str, Any]] = (rendimiento_json or {}).get(
+            'rows', [])
+        self._por_finca: Dict[str, List[Dict[str, Any]]] = {}
+        for item in self.filas:
+            if 'finca' in item:
+                self._por_finca.setdefault(
+                    str(item['finca']).upper(), []).append(item)
+
+    def finca(self, finca_nombre: str) -> List[Dict[str, Any]]:
+        return self._por_finca.get(finca_nombre.upper(), self.filas)
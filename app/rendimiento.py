@@ -0,0 +1,279 @@
+"""
+Tabla de rendimiento (Gramos → Rendimiento) compilada a arreglos ordenados
+
+`obtener_rendimiento` se llama en cada iteración de la inversión de
+AnimalesM. En lugar de recorrer todas las claves para buscar la más
+cercana, la tabla se ordena una vez y cada búsqueda es un `searchsorted`,
+escalar o vectorizado sobre un arreglo de gramos.
+
+`CargadorRendimiento` mantiene la tabla vigente: arranca con la última
+copia buena guardada en disco (o los datos de respaldo), la descarga en
+segundo plano con un timeout acotado y la refresca periódicamente, sin
+que el arranque del proceso espere a la red.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, Optional
+
+import numpy as np
+import requests
+from decouple import config
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.gcs import gcs, separar_ruta_gcs
+
+logger = logging.getLogger(__name__)
+
+RENDIMIENTO_TIMEOUT_S = config('RENDIMIENTO_TIMEOUT_S', default=5.0, cast=float)
+RENDIMIENTO_REFRESH_S = config(
+    'RENDIMIENTO_REFRESH_S', default=3600.0, cast=float)
+RENDIMIENTO_CACHE_FILE = config(
+    'RENDIMIENTO_CACHE_FILE', default='/tmp/rendimiento_cache.json')
+
+# Datos de respaldo si no hay copia local ni se puede descargar la tabla
+RENDIMIENTO_RESPALDO = {
+    10: 85, 15: 88, 20: 90, 25: 92, 30: 94, 35: 96, 40: 98, 45: 100
+}
+
+
+class TablaRendimiento:
+    """Búsqueda del vecino más cercano sobre las claves de Gramos.
+
+    Igual que `min(dict.keys(), key=lambda x: abs(x - g))`: ante un empate
+    de distancia gana la clave que aparece primero en el diccionario.
+    """
+
+    def __init__(self, tabla: Dict[int, int]):
+        if not tabla:
+            raise ValueError("La tabla de rendimiento está vacía")
+
+        claves = list(tabla.keys())
+        orden = np.argsort(claves, kind="stable")
+        self.gramos = np.asarray(claves, dtype=np.float64)[orden]
+        self.rendimientos = np.asarray(
+            [tabla[c] for c in claves])[orden]
+        # Posición de cada clave en el diccionario original (desempates)
+        self.posiciones = orden
+        self._gramos_lista = self.gramos.tolist()
+        self._rendimientos_lista = self.rendimientos.tolist()
+
+    def __len__(self) -> int:
+        return len(self._gramos_lista)
+
+    def _vecino(self, gramos: float) -> int:
+        gramos_lista = self._gramos_lista
+        i = bisect_left(gramos_lista, gramos)
+        if i == 0:
+            return 0
+        if i == len(gramos_lista):
+            return i - 1
+
+        izquierda = gramos - gramos_lista[i - 1]
+        derecha = gramos_lista[i] - gramos
+        if izquierda < derecha:
+            return i - 1
+        if derecha < izquierda:
+            return i
+        return i - 1 if self.posiciones[i - 1] < self.posiciones[i] else i
+
+    def obtener(self, gramos: float):
+        """Rendimiento de la clave de Gramos más cercana"""
+        return self._rendimientos_lista[self._vecino(gramos)]
+
+    def obtener_vector(self, gramos) -> np.ndarray:
+        """Versión vectorizada de `obtener` para un arreglo de gramos"""
+        gramos = np.asarray(gramos, dtype=np.float64)
+        n = len(self.gramos)
+        derecha = np.clip(np.searchsorted(self.gramos, gramos), 0, n - 1)
+        izquierda = np.clip(derecha - 1, 0, n - 1)
+
+        dist_izq = np.abs(gramos - self.gramos[izquierda])
+        dist_der = np.abs(self.gramos[derecha] - gramos)
+        usar_izq = (dist_izq < dist_der) | (
+            (dist_izq == dist_der) &
+            (self.posiciones[izquierda] < self.posiciones[derecha]))
+
+        return self.rendimientos[np.where(usar_izq, izquierda, derecha)]
+
+
+def _parsear_tabla(data: Any) -> Dict[int, int]:
+    """Convierte el JSON {"rows": [{"Gramos", "Rendimiento"}]} en dict"""
+    if not data or "rows" not in data:
+        raise ValueError("JSON de rendimiento sin 'rows'")
+    tabla = {int(row["Gramos"]): int(row["Rendimiento"])
+             for row in data["rows"]}
+    if not tabla:
+        raise ValueError("JSON de rendimiento sin filas")
+    return tabla
+
+
+class CargadorRendimiento:
+    """Tabla de rendimiento refrescada en segundo plano.
+
+    `tabla()` nunca hace I/O: devuelve la última tabla buena. La primera
+    llamada arranca el hilo de refresco si nadie lo inició antes.
+    """
+
+    def __init__(self, ruta: str, timeout_s: float = RENDIMIENTO_TIMEOUT_S,
+                 intervalo_s: float = RENDIMIENTO_REFRESH_S,
+                 archivo_cache: Optional[str] = RENDIMIENTO_CACHE_FILE):
+        self.ruta = ruta
+        self.timeout_s = timeout_s
+        self.intervalo_s = intervalo_s
+        self.archivo_cache = archivo_cache
+
+        self.lock = threading.Lock()
+        self._hilo: Optional[threading.Thread] = None
+        self._detener = threading.Event()
+        self._session: Optional[requests.Session] = None
+
+        self.version: Optional[str] = None
+        self.origen = "respaldo"
+        self.actualizado: Optional[float] = None
+        self.actualizaciones = 0
+        self.sin_cambios = 0
+        self.errores = 0
+        self.ultimo_error: Optional[str] = None
+
+        self._tabla = TablaRendimiento(RENDIMIENTO_RESPALDO)
+        self._cargar_cache()
+
+    def _cargar_cache(self):
+        """Usa la última copia buena guardada en disco, si existe"""
+        if not self.archivo_cache or not os.path.exists(self.archivo_cache):
+            return
+        try:
+            with open(self.archivo_cache, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            self._tabla = TablaRendimiento(_parsear_tabla(cache["data"]))
+            self.version = cache.get("version")
+            self.actualizado = cache.get("actualizado")
+            self.origen = "cache"
+        except Exception as e:
+            logger.warning(f"⚠️ Cache de rendimiento inválida: {e}")
+
+    def _guardar_cache(self, data: Any):
+        if not self.archivo_cache:
+            return
+        directorio = os.path.dirname(self.archivo_cache) or "."
+        temporal = None
+        try:
+            fd, temporal = tempfile.mkstemp(dir=directorio, suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({"version": self.version,
+                           "actualizado": self.actualizado,
+                           "data": data}, f)
+            os.replace(temporal, self.archivo_cache)
+        except Exception as e:
+            if temporal and os.path.exists(temporal):
+                os.remove(temporal)
+            logger.warning(f"⚠️ No se pudo guardar la cache de rendimiento: {e}")
+
+    def _sesion(self) -> requests.Session:
+        if self._session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2,
+                                  max_retries=Retry(total=2, backoff_factor=0.5))
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._session = session
+        return self._session
+
+    def _descargar(self):
+        """Devuelve (version, data) o (version, None) si no cambió"""
+        if self.ruta.startswith("gs://"):
+            bucket_name, blob_name = separar_ruta_gcs(self.ruta)
+            blob = gcs.obtener_blob(bucket_name, blob_name)
+            if blob is None:
+                raise FileNotFoundError(self.ruta)
+            version = f"gen-{blob.generation}"
+            if version == self.version:
+                return version, None
+            contenido = gcs.descargar_bytes(blob)
+        else:
+            response = self._sesion().get(self.ruta, timeout=self.timeout_s)
+            response.raise_for_status()
+            contenido = response.content
+            version = f"sha-{hashlib.sha256(contenido).hexdigest()[:12]}"
+            if version == self.version:
+                return version, None
+
+        return version, json.loads(contenido)
+
+    def refrescar(self) -> bool:
+        """Descarga la tabla; devuelve True si se reemplazó la vigente"""
+        try:
+            version, data = self._descargar()
+            tabla = TablaRendimiento(_parsear_tabla(data)) \
+                if data is not None else None
+        except Exception as e:
+            with self.lock:
+                self.errores += 1
+                self.ultimo_error = str(e)
+            logger.warning(f"⚠️ No se pudo refrescar rendimiento: {e}")
+            return False
+
+        with self.lock:
+            self.actualizado = time.time()
+            self.ultimo_error = None
+            if tabla is None:
+                self.sin_cambios += 1
+                return False
+            self._tabla = tabla
+            self.version = version
+            self.origen = "remoto"
+            self.actualizaciones += 1
+
+        logger.info(f"📈 Rendimiento actualizado ({version}, "
+                    f"{len(tabla)} filas)")
+        self._guardar_cache(data)
+        return True
+
+    def _bucle(self):
+        # Si la precarga ya trajo la tabla remota se espera al siguiente ciclo
+        if self.origen == "remoto" and self._detener.wait(self.intervalo_s):
+            return
+        while not self._detener.is_set():
+            self.refrescar()
+            if self._detener.wait(self.intervalo_s):
+                break
+
+    def iniciar(self):
+        """Arranca el hilo de refresco (idempotente)"""
+        with self.lock:
+            if self._hilo is not None:
+                return
+            self._hilo = threading.Thread(
+                target=self._bucle, name="rendimiento", daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        self._detener.set()
+
+    def tabla(self) -> TablaRendimiento:
+        if self._hilo is None:
+            self.iniciar()
+        return self._tabla
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {
+                "ruta": self.ruta,
+                "version": self.version,
+                "origen": self.origen,
+                "filas": len(self._tabla),
+                "edad_s": round(time.time() - self.actualizado, 1)
+                if self.actualizado else None,
+                "actualizaciones": self.actualizaciones,
+                "sin_cambios": self.sin_cambios,
+                "errores": self.errores,
+                "ultimo_error": self.ultimo_error,
+                "intervalo_s": self.intervalo_s
+            }
@@ -10,6 +10,8 @@ from email.mime.application import MIMEApplication
 from email.mime.text import MIMEText
 import re
 
+from app.executor import ejecutor
+
 # Cargar .env si aún no lo ha hecho main.py (opcional si ya cargaste antes)
 load_dotenv()
 
@@ -31,6 +33,11 @@ def is_valid_email(email: str) -> bool:
 
 @router.post("/send-invoice")
 async def send_invoice(request: InvoiceRequest):
+    # smtplib bloquea: el envío corre en el carril de hilos del endpoint
+    return await ejecutor.ejecutar("send-invoice", enviar_factura, request)
+
+
+def enviar_factura(request: InvoiceRequest):
     try:
         # 1. Validar el correo manualmente
         if not is_valid_email(request.recipient):
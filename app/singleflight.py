@@ -0,0 +1,55 @@
+"""
+Ejecución única por clave: las llamadas concurrentes comparten un resultado
+"""
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict
+
+
+class SingleFlight:
+    """Agrupa llamadas concurrentes con la misma clave.
+
+    La primera llamada ejecuta la función; las que llegan mientras sigue en
+    curso esperan y reciben el mismo resultado (o la misma excepción).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._en_vuelo: Dict[str, Future] = {}
+        self._ejecuciones = 0
+        self._compartidas = 0
+
+    def ejecutar(self, clave: str, funcion: Callable[[], Any]) -> Any:
+        with self.lock:
+            future = self._en_vuelo.get(clave)
+            lider = future is None
+            if lider:
+                future = Future()
+                self._en_vuelo[clave] = future
+                self._ejecuciones += 1
+            else:
+                self._compartidas += 1
+
+        if not lider:
+            return future.result()
+
+        try:
+            resultado = funcion()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(resultado)
+            return resultado
+        finally:
+            with self.lock:
+                del self._en_vuelo[clave]
+
+    def get_stats(self) -> Dict[str, int]:
+        """Obtener contadores de ejecuciones y llamadas compartidas"""
+        with self.lock:
+            return {
+                "ejecuciones": self._ejecuciones,
+                "compartidas": self._compartidas,
+                "en_vuelo": len(self._en_vuelo)
+            }
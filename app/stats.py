@@ -4,7 +4,7 @@ Sistema de estadísticas y monitoreo de la aplicación
 import json
 import os
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List
 import threading
 
 
@@ -78,6 +78,25 @@ class StatsManager:
             self.stats["last_updated"] = datetime.now().isoformat()
             self._save_stats()
 
+    def increment_batch_requests(self, fincas_exitosas: List[str],
+                                 fallidas: int = 0):
+        """Registrar un lote de solicitudes guardando el archivo una sola vez"""
+        with self.lock:
+            total = len(fincas_exitosas) + fallidas
+            self.stats["total_requests"] += total
+            self.stats["successful_requests"] += len(fincas_exitosas)
+            self.stats["failed_requests"] += fallidas
+            for finca in fincas_exitosas:
+                if finca in self.stats["requests_by_finca"]:
+                    self.stats["requests_by_finca"][finca] += 1
+            for stat_type, cantidad in (("total", total),
+                                        ("successful", len(fincas_exitosas)),
+                                        ("failed", fallidas)):
+                for _ in range(cantidad):
+                    self._update_daily_stats(stat_type)
+            self.stats["last_updated"] = datetime.now().isoformat()
+            self._save_stats()
+
     def _update_daily_stats(self, stat_type: str):
         """Actualizar estadísticas diarias"""
         today = datetime.now().strftime("%Y-%m-%d")
@@ -1,10 +1,11 @@
-from google.cloud import storage
 import os
 import json
 import logging
 from dotenv import load_dotenv
 from typing import Dict, List
 
+from app.gcs import gcs
+
 load_dotenv()
 
 # Al inicio del archivo
@@ -29,10 +30,11 @@ def init_storage():
         if credentials_file and os.path.exists(credentials_file):
             logger.info(f"🔑 Usando credenciales desde: {credentials_file}")
 
-        client = storage.Client(project=PROJECT_ID)
-        bucket = client.bucket(BUCKET_NAME)
+        # Cliente compartido con el resto de la aplicación
+        client = gcs.cliente()
+        bucket = gcs.bucket(BUCKET_NAME)
 
-        bucket.exists()
+        bucket.exists(timeout=gcs.timeout_metadatos)
         logger.info(f"✅ Conectado exitosamente a bucket: {BUCKET_NAME}")
 
     except Exception as e:
@@ -61,11 +63,12 @@ try:
     if credentials_file and os.path.exists(credentials_file):
         logger.info(f"🔑 Usando credenciales desde: {credentials_file}")
 
-    client = storage.Client(project=PROJECT_ID)
-    bucket = client.bucket(BUCKET_NAME)
+    # Cliente compartido con el resto de la aplicación
+    client = gcs.cliente()
+    bucket = gcs.bucket(BUCKET_NAME)
 
     # Test de conectividad
-    bucket.exists()
+    bucket.exists(timeout=gcs.timeout_metadatos)
     logger.info(f"✅ Conectado exitosamente a bucket: {BUCKET_NAME}")
 
 except Exception as e:
@@ -112,13 +115,13 @@ def read_json_file(filename: str) -> Dict:
 
         blob = bucket.blob(filename)
 
-        if not blob.exists():
+        if not blob.exists(timeout=gcs.timeout_metadatos):
             logger.info(
                 f"📄 Archivo {filename} no existe, creando estructura vacía"
             )
             return {}
 
-        content = blob.download_as_text()
+        content = blob.download_as_text(timeout=gcs.timeout_descarga)
         data = json.loads(content)
         logger.info(f"✅ Archivo {filename} leído exitosamente")
         return data
@@ -154,7 +157,8 @@ def write_json_file(filename: str, data: Dict) -> bool:
 
         blob.upload_from_string(
             json_string,
-            content_type="application/json; charset=utf-8"
+            content_type="application/json; charset=utf-8",
+            timeout=gcs.timeout_descarga
         )
 
         logger.info(f"✅ Archivo {filename} guardado exitosamente")
@@ -174,7 +178,8 @@ def list_all_files() -> List[str]:
     """
     try:
         init_storage()
-        files = [blob.name for blob in bucket.list_blobs()]
+        files = [blob.name for blob in bucket.list_blobs(
+            timeout=gcs.timeout_metadatos)]
         logger.info(f"📋 Listados {len(files)} archivos en el bucket")
         return files
     except Exception as e:
@@ -196,7 +201,7 @@ def file_exists(filename: str) -> bool:
         if not filename.endswith('.json'):
             filename += '.json'
         blob = bucket.blob(filename)
-        exists = blob.exists()
+        exists = blob.exists(timeout=gcs.timeout_metadatos)
         status = 'existe' if exists else 'no existe'
         logger.info(f"🔍 Archivo {filename} {status}")
         return exists
@@ -221,11 +226,11 @@ def delete_file(filename: str) -> bool:
 
         blob = bucket.blob(filename)
 
-        if not blob.exists():
+        if not blob.exists(timeout=gcs.timeout_metadatos):
             logger.warning(f"⚠️ Archivo {filename} no existe para eliminar")
             return False
 
-        blob.delete()
+        blob.delete(timeout=gcs.timeout_metadatos)
         logger.info(f"🗑️ Archivo {filename} eliminado exitosamente")
         return True
 
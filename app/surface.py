@@ -0,0 +1,212 @@
+"""
+Superficie de respuesta precalculada para el modo aproximado de /predict
+
+La inversión de AnimalesM solo depende de la finca y de (AnimalesM,
+Hectareas, Piscinas). Este módulo resuelve la inversión exacta sobre una
+malla densa de esos tres ejes y guarda las salidas convergidas en un
+archivo .npz. En línea, una consulta se responde por interpolación
+trilineal sobre la celda que la contiene.
+
+El error de interpolación se estima al construir la malla: se resuelve la
+inversión exacta en el centro de cada celda y se guarda la diferencia con
+el valor interpolado. Las celdas con algún vértice que no convergió quedan
+marcadas con NaN y la consulta recurre al solver exacto.
+
+Uso offline:
+    python -m app.surface --finca CAMANOVILLO \\
+        --animales 1 40 79 --hectareas 0.5 30 60 --piscinas 1 60
+"""
+import argparse
+import os
+import time
+from typing import Callable, Dict, Optional, Sequence
+
+import numpy as np
+
+# Salidas de la inversión que se guardan en la malla
+SALIDAS = ("Consumo", "Gramos", "KGXHA", "LibrasXHA", "AnimalesM")
+
+
+def _resolver_malla(resolver_lote, predecir, puntos: np.ndarray) -> np.ndarray:
+    """Resuelve la inversión exacta para cada fila de `puntos` (n, 3).
+
+    Devuelve un arreglo (n, len(SALIDAS)) con NaN donde no hubo convergencia.
+    """
+    salida, _ = resolver_lote(
+        predecir, puntos[:, 0], puntos[:, 1], puntos[:, 2])
+    valores = np.full((len(puntos), len(SALIDAS)), np.nan)
+    for i, (resultado, metadatos) in enumerate(salida):
+        if metadatos["convergio"]:
+            valores[i] = [resultado[s] for s in SALIDAS]
+    return valores
+
+
+class Superficie:
+    """Malla (AnimalesM, Hectareas, Piscinas) → salidas convergidas"""
+
+    def __init__(self, ejes: Sequence[np.ndarray], valores: np.ndarray,
+                 errores: np.ndarray, finca: str = "",
+                 creado: float = 0.0):
+        self.ejes = [np.asarray(e, dtype=np.float64) for e in ejes]
+        self.valores = np.asarray(valores, dtype=np.float64)
+        self.errores = np.asarray(errores, dtype=np.float64)
+        self.finca = finca
+        self.creado = creado
+
+        if any(len(e) < 2 for e in self.ejes):
+            raise ValueError("Cada eje de la superficie necesita 2 puntos")
+
+    @property
+    def nbytes(self) -> int:
+        return (self.valores.nbytes + self.errores.nbytes +
+                sum(e.nbytes for e in self.ejes))
+
+    @classmethod
+    def construir(cls, predecir: Callable, resolver_lote: Callable,
+                  animales: np.ndarray, hectareas: np.ndarray,
+                  piscinas: np.ndarray, finca: str = "") -> "Superficie":
+        """Evalúa la inversión exacta en la malla y en los centros de celda"""
+        ejes = [np.unique(np.asarray(e, dtype=np.float64))
+                for e in (animales, hectareas, piscinas)]
+        forma = tuple(len(e) for e in ejes)
+
+        malla = np.stack(np.meshgrid(*ejes, indexing="ij"), axis=-1)
+        valores = _resolver_malla(
+            resolver_lote, predecir, malla.reshape(-1, 3))
+        valores = valores.reshape(forma + (len(SALIDAS),))
+
+        superficie = cls(ejes, valores, np.zeros(
+            tuple(n - 1 for n in forma) + (len(SALIDAS),)), finca,
+            time.time())
+
+        # Estimación del error: exacto vs interpolado en el centro de celda
+        centros = [(e[:-1] + e[1:]) / 2.0 for e in ejes]
+        puntos = np.stack(np.meshgrid(*centros, indexing="ij"),
+                          axis=-1).reshape(-1, 3)
+        exacto = _resolver_malla(resolver_lote, predecir, puntos)
+        interpolado = superficie._interpolar(puntos)
+        superficie.errores = np.abs(exacto - interpolado).reshape(
+            superficie.errores.shape)
+        return superficie
+
+    def _celdas(self, puntos: np.ndarray):
+        """Índice de celda y peso fraccional por eje; None si está fuera"""
+        indices, pesos = [], []
+        for d, eje in enumerate(self.ejes):
+            x = puntos[:, d]
+            if np.any((x < eje[0]) | (x > eje[-1])):
+                return None
+            i = np.clip(np.searchsorted(eje, x, side="right") - 1,
+                        0, len(eje) - 2)
+            indices.append(i)
+            pesos.append((x - eje[i]) / (eje[i + 1] - eje[i]))
+        return indices, pesos
+
+    def _interpolar(self, puntos: np.ndarray) -> np.ndarray:
+        (i, j, k), (ti, tj, tk) = self._celdas(puntos)
+        resultado = np.zeros((len(puntos), len(SALIDAS)))
+        for di in (0, 1):
+            wi = ti if di else 1.0 - ti
+            for dj in (0, 1):
+                wj = tj if dj else 1.0 - tj
+                for dk in (0, 1):
+                    wk = tk if dk else 1.0 - tk
+                    resultado += (wi * wj * wk)[:, None] * \
+                        self.valores[i + di, j + dj, k + dk]
+        return resultado
+
+    def consultar(self, animales_m: float, hectareas: float,
+                  piscinas: float) -> Optional[Dict[str, object]]:
+        """Interpola las salidas o devuelve None si el punto no está cubierto"""
+        punto = np.array([[animales_m, hectareas, piscinas]], dtype=np.float64)
+        celdas = self._celdas(punto)
+        if celdas is None:
+            return None
+
+        valores = self._interpolar(punto)[0]
+        (i, j, k), _ = celdas
+        errores = self.errores[i[0], j[0], k[0]]
+        if not (np.all(np.isfinite(valores)) and np.all(np.isfinite(errores))):
+            return None
+
+        return {
+            "valores": dict(zip(SALIDAS, valores.tolist())),
+            "error_estimado": dict(zip(SALIDAS, errores.tolist()))
+        }
+
+    def guardar(self, ruta: str):
+        """Guarda la superficie en un .npz comprimido"""
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        with open(ruta, "wb") as f:
+            np.savez_compressed(
+                f, animales=self.ejes[0], hectareas=self.ejes[1],
+                piscinas=self.ejes[2], valores=self.valores,
+                errores=self.errores, salidas=np.array(SALIDAS),
+                finca=np.array(self.finca), creado=np.array(self.creado))
+
+    @classmethod
+    def cargar(cls, ruta: str) -> "Superficie":
+        with np.load(ruta, allow_pickle=False) as datos:
+            if tuple(datos["salidas"].tolist()) != SALIDAS:
+                raise ValueError(f"Salidas de la superficie no coinciden: "
+                                 f"{datos['salidas'].tolist()}")
+            return cls([datos["animales"], datos["hectareas"],
+                        datos["piscinas"]], datos["valores"],
+                       datos["errores"], str(datos["finca"]),
+                       float(datos["creado"]))
+
+    def describir(self) -> dict:
+        return {
+            "finca": self.finca,
+            "forma": [len(e) for e in self.ejes],
+            "rangos": [[float(e[0]), float(e[-1])] for e in self.ejes],
+            "celdas_validas": int(np.isfinite(
+                self.errores).all(axis=-1).sum()),
+            "error_max": dict(zip(SALIDAS, np.nanmax(
+                self.errores.reshape(-1, len(SALIDAS)), axis=0).tolist()))
+        }
+
+
+def _eje(valores: Sequence[float], entero: bool = False) -> np.ndarray:
+    """(inicio, fin, n) → linspace; (inicio, fin) en ejes enteros → arange"""
+    if len(valores) == 2 and entero:
+        return np.arange(int(valores[0]), int(valores[1]) + 1,
+                         dtype=np.float64)
+    inicio, fin, n = valores
+    return np.linspace(inicio, fin, int(n))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Construye la superficie de respuesta de una finca")
+    parser.add_argument("--finca", required=True)
+    parser.add_argument("--animales", type=float, nargs=3,
+                        default=[1.0, 40.0, 79], metavar=("INI", "FIN", "N"))
+    parser.add_argument("--hectareas", type=float, nargs=3,
+                        default=[0.5, 30.0, 60], metavar=("INI", "FIN", "N"))
+    parser.add_argument("--piscinas", type=float, nargs="+",
+                        default=[1, 60], help="INI FIN [N]")
+    parser.add_argument("--salida", default=None,
+                        help="Archivo .npz (por defecto superficie_<finca>.npz)")
+    args = parser.parse_args(argv)
+
+    from app.animal import cargar_inferencia, resolver_relajacion_lote
+
+    inferencia = cargar_inferencia(args.finca)
+    inicio = time.perf_counter()
+    superficie = Superficie.construir(
+        inferencia.predecir, resolver_relajacion_lote,
+        _eje(args.animales), _eje(args.hectareas),
+        _eje(args.piscinas, entero=True), finca=args.finca)
+    salida = args.salida or f"superficie_{args.finca}.npz"
+    superficie.guardar(salida)
+
+    print(f"✅ Superficie de {args.finca} guardada en {salida} "
+          f"({time.perf_counter() - inicio:.1f}s)")
+    print(superficie.describir())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Precarga concurrente de modelos y datos de referencia al iniciar el servidor
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+
+from decouple import config
+
+from app import alimentation, animal
+from app.reference_data import derivar, obtener_json_referencia
+from app.reference_index import IndiceRendimiento, IndiceTerrain
+
+# Configuración de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = config('WARMUP_ENABLED', default=True, cast=bool)
+WARMUP_TIMEOUT_S = config('WARMUP_TIMEOUT_S', default=120, cast=float)
+WARMUP_WORKERS = config('WARMUP_WORKERS', default=8, cast=int)
+
+
+class EstadoWarmup:
+    """Estado de la precarga consultado por el readiness probe"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.listo = False
+        self.timeout_alcanzado = False
+        self.inicio = None
+        self.fin = None
+        self.artefactos: Dict[str, Dict[str, Any]] = {}
+
+    def registrar(self, nombre: str, segundos: float, error: str = None):
+        with self.lock:
+            self.artefactos[nombre] = {
+                "ok": error is None,
+                "segundos": round(segundos, 3),
+                "error": error
+            }
+
+    def marcar_listo(self, timeout_alcanzado: bool = False):
+        with self.lock:
+            self.listo = True
+            self.timeout_alcanzado = timeout_alcanzado
+            self.fin = datetime.now().isoformat()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "listo": self.listo,
+                "timeout_alcanzado": self.timeout_alcanzado,
+                "inicio": self.inicio,
+                "fin": self.fin,
+                "artefactos": dict(self.artefactos)
+            }
+
+
+# Instancia global del estado de precarga
+estado_warmup = EstadoWarmup()
+
+
+def _precargar_rendimiento_animal():
+    """Carga la tabla remota de /predict antes de marcar el servicio listo.
+
+    Sin esto /predict podría responder con la tabla de respaldo y cambiar
+    a la de GCS más tarde, dando otra respuesta para la misma entrada.
+    """
+    cargador = animal.cargador_rendimiento
+    cargador.refrescar()
+    if cargador.origen != "remoto":
+        raise RuntimeError(f"Rendimiento servido desde {cargador.origen}: "
+                           f"{cargador.ultimo_error}")
+
+
+def _tareas_warmup() -> List[Tuple[str, Callable[[], Any]]]:
+    """Lista (nombre, función) de todo lo que se precarga"""
+    tareas = []
+    for finca in animal.modelos:
+        tareas.append((f"animal:{finca}",
+                       lambda f=finca: animal.cargar_modelo_y_scaler(f)))
+    for finca in alimentation.modelos:
+        tareas.append((f"alimentation:{finca}",
+                       lambda f=finca: alimentation.cargar_modelo_y_scaler(f)))
+    tareas.append(("pesos_alimento", lambda: obtener_json_referencia(
+        alimentation.pesos_alimento_path)))
+    # Terrain y Rendimiento se precargan junto con sus índices
+    tareas.append(("terrain", lambda: derivar(
+        alimentation.terrain_path, "indice_terrain", IndiceTerrain)))
+    tareas.append(("rendimiento", lambda: derivar(
+        alimentation.rendimiento_path, "indice_rendimiento",
+        IndiceRendimiento)))
+    tareas.append(("rendimiento_animal", _precargar_rendimiento_animal))
+    return tareas
+
+
+def _ejecutar_tarea(nombre: str, funcion: Callable[[], Any]):
+    inicio = time.perf_counter()
+    try:
+        funcion()
+    except Exception as e:
+        duracion = time.perf_counter() - inicio
+        estado_warmup.registrar(nombre, duracion, str(e))
+        logger.warning(f"⚠️ Precarga de {nombre} falló en {duracion:.2f}s: {e}")
+        return
+    duracion = time.perf_counter() - inicio
+    estado_warmup.registrar(nombre, duracion)
+    logger.info(f"🔥 Precarga de {nombre} completada en {duracion:.2f}s")
+
+
+def ejecutar_warmup(timeout: float = WARMUP_TIMEOUT_S,
+                    max_workers: int = WARMUP_WORKERS):
+    """Precarga todos los artefactos en paralelo y marca el servicio listo.
+
+    Si se agota `timeout` el servicio se marca listo igualmente; las cargas
+    pendientes terminan en segundo plano y las solicitudes que lleguen antes
+    las harán por su cuenta. Con `timeout=None` se espera a todas.
+    """
+    estado_warmup.inicio = datetime.now().isoformat()
+    inicio = time.perf_counter()
+
+    executor = ThreadPoolExecutor(max_workers=max_workers,
+                                  thread_name_prefix="warmup")
+    futures = [executor.submit(_ejecutar_tarea, nombre, funcion)
+               for nombre, funcion in _tareas_warmup()]
+    _, pendientes = wait(futures, timeout=timeout)
+    # Sin pendientes se esperan también los hilos: nadie queda con locks
+    executor.shutdown(wait=not pendientes)
+
+    duracion = time.perf_counter() - inicio
+    if pendientes:
+        logger.warning(f"⏱️ Precarga incompleta tras {duracion:.2f}s: "
+                       f"{len(pendientes)} tareas pendientes")
+    else:
+        logger.info(f"✅ Precarga completa en {duracion:.2f}s")
+    estado_warmup.marcar_listo(timeout_alcanzado=bool(pendientes))
+
+
+def iniciar_warmup():
+    """Lanza la precarga en un hilo para no bloquear el arranque de uvicorn"""
+    # En modo pre-fork el maestro ya precargó todo antes de forkear
+    if not WARMUP_ENABLED or estado_warmup.listo:
+        estado_warmup.marcar_listo()
+        return
+    threading.Thread(target=ejecutar_warmup, name="warmup",
+                     daemon=True).start()
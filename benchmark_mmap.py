@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark: carga de artefactos con joblib.load frente a copias mapeadas
+
+    python benchmark_mmap.py [arboles] [procesos]
+
+Entrena un RandomForest sintético con la forma del modelo de /predict,
+lo guarda como .pkl comprimido (formato actual) y mide en N procesos
+simultáneos el tiempo de carga hasta tener la inferencia lista y la
+memoria de cada uno (RSS, PSS, compartida y privada).
+"""
+
+import gc
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+
+from app.inference import compilar_inferencia, compilar_nucleo
+from app.mmap_artifacts import ArtefactosMapeados
+from app.prefork import memoria_proceso
+
+MIB = 2 ** 20
+
+
+def _entrenar(directorio: str, arboles: int):
+    rng = np.random.default_rng(0)
+    X = rng.uniform([5, 2, 1], [30, 10, 20], (20000, 3))
+    y = np.c_[X[:, 0] * X[:, 1] * 10, 20 + X[:, 0] * 0.3]
+    y += rng.normal(0, 1, y.shape)
+    scaler = StandardScaler().fit(X)
+    modelo = RandomForestRegressor(n_estimators=arboles, random_state=0,
+                                   n_jobs=-1).fit(scaler.transform(X), y)
+
+    modelo_local = os.path.join(directorio, "modelo.pkl")
+    scaler_local = os.path.join(directorio, "scaler.pkl")
+    joblib.dump(modelo, modelo_local, compress=3)
+    joblib.dump(scaler, scaler_local, compress=3)
+    return modelo_local, scaler_local
+
+
+def _cargar(formato, modelo_local, scaler_local, barrera, resultados):
+    """Proceso hijo: carga, predice una fila y reporta tiempos y memoria"""
+    antes = memoria_proceso()
+    inicio = time.perf_counter()
+    artefactos = ArtefactosMapeados(activo=formato == "mmap")
+    modelo = artefactos.cargar(modelo_local)
+    scaler = artefactos.cargar(scaler_local)
+    nucleo = artefactos.cargar_nucleo(
+        modelo_local, lambda: compilar_nucleo(modelo))
+    inferencia = compilar_inferencia(modelo, scaler, nucleo=nucleo)
+    if formato == "mmap":
+        # Como en animal: verificado el núcleo, el bosque no se conserva
+        inferencia.liberar_modelo()
+        del modelo
+        gc.collect()
+    inferencia.predecir(np.array([[12.0, 7.8, 5]]))
+    carga = time.perf_counter() - inicio
+
+    # Todos los procesos vivos a la vez para que el PSS reparta lo común
+    barrera.wait()
+    despues = memoria_proceso()
+    barrera.wait()
+    resultados.put({
+        "carga_s": carga,
+        "rss": despues["rss"] - antes["rss"],
+        "pss": despues["pss"] - antes["pss"],
+        "compartida": despues["compartida"] - antes["compartida"],
+        "privada": despues["privada"] - antes["privada"],
+    })
+
+
+def medir(formato: str, modelo_local: str, scaler_local: str,
+          procesos: int):
+    contexto = multiprocessing.get_context("spawn")
+    barrera = contexto.Barrier(procesos)
+    resultados = contexto.Queue()
+    hijos = [contexto.Process(target=_cargar, args=(
+        formato, modelo_local, scaler_local, barrera, resultados))
+        for _ in range(procesos)]
+    for hijo in hijos:
+        hijo.start()
+    filas = [resultados.get() for _ in hijos]
+    for hijo in hijos:
+        hijo.join()
+    return filas
+
+
+def main(arboles: int = 100, procesos: int = 3):
+    with tempfile.TemporaryDirectory() as directorio:
+        modelo_local, scaler_local = _entrenar(directorio, arboles)
+        print(f"🌲 RandomForest de {arboles} árboles: "
+              f"{os.path.getsize(modelo_local) / MIB:.1f} MiB en disco; "
+              f"{procesos} procesos por formato\n")
+
+        # Primera pasada mmap: convierte y deja las copias en page cache
+        ArtefactosMapeados(activo=True).cargar_nucleo(
+            modelo_local, lambda: compilar_nucleo(
+                ArtefactosMapeados(activo=True).cargar(modelo_local)))
+
+        print(f"{'formato':<8} {'carga':>8} {'RSS':>9} {'PSS':>9} "
+              f"{'compart.':>9} {'privada':>9}   (por proceso, MiB)")
+        for formato in ("pickle", "mmap"):
+            filas = medir(formato, modelo_local, scaler_local, procesos)
+            media = {clave: sum(f[clave] for f in filas) / len(filas)
+                     for clave in filas[0]}
+            print(f"{formato:<8} {media['carga_s'] * 1000:>6.0f}ms "
+                  f"{media['rss'] / MIB:>9.1f} {media['pss'] / MIB:>9.1f} "
+                  f"{media['compartida'] / MIB:>9.1f} "
+                  f"{media['privada'] / MIB:>9.1f}")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
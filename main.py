@@ -1,23 +1,54 @@
 from dotenv import load_dotenv
 import warnings
+from typing import List
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse
 from app.routes import router as main_router
 from app.stats import stats_manager
-from app.animal import PredictionRequest, procesar_prediccion_animal
-from app.alimentation import PredictionRequestAlimentation, procesar_prediccion_alimentation
+from app.model_registry import model_registry
+from app.artifact_store import artifact_store
+from app.mmap_artifacts import artefactos_mapeados
+from app import reference_data
+from app.gcs import gcs
+from app.dispatcher import despachador_inferencia
+from app.executor import ejecutor
+from app.process_pool import despachar, pool_procesos
+from app.prefork import estado_memoria
+from app.animal import PredictionRequest, cargador_rendimiento
+from app.alimentation import (PredictionRequestAlimentation,
+                              PredictionRequestAlimentationFinca)
+from app.ndjson_stream import (RespuestaNDJSON, en_lotes, linea_json,
+                               lineas_ndjson)
+from app.warmup import estado_warmup, iniciar_warmup
 
 warnings.filterwarnings(
     "ignore", message="Skipping variable loading for optimizer")
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if pool_procesos.activo:
+        # Los modelos solo se usan en los trabajadores, que hacen su propia
+        # precarga; el proceso principal no guarda otra copia
+        pool_procesos.iniciar(al_listo=estado_warmup.marcar_listo)
+    else:
+        # Precargar modelos y datos de referencia sin bloquear el arranque
+        cargador_rendimiento.iniciar()
+        iniciar_warmup()
+    yield
+    pool_procesos.cerrar()
+
+
 app = FastAPI(
     title="Azaktilza S.A",
     description="Sistema CRUD con Google Cloud Storage para "
                 "Alimentación del camarón",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 load_dotenv()
@@ -50,24 +81,46 @@ async def health_check():
 
 @app.get("/api/system/health")
 async def system_health_check():
-    """Endpoint de health check del sistema para contenedores"""
-    return {"status": "healthy", "message": "Sistema funcionando"}
+    """Endpoint de readiness: no listo hasta terminar la precarga"""
+    warmup = estado_warmup.get_stats()
+    if not warmup["listo"]:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "starting",
+                     "message": "Precargando modelos", "warmup": warmup}
+        )
+    return {"status": "healthy", "message": "Sistema funcionando",
+            "warmup": warmup}
 
 
 @app.get("/stats")
 async def get_stats():
     """Endpoint para obtener estadísticas de la aplicación"""
-    return stats_manager.get_all_stats()
+    stats = stats_manager.get_all_stats()
+    stats["model_registry"] = model_registry.get_stats()
+    stats["artefactos"] = artifact_store.get_stats()
+    stats["artefactos_mmap"] = artefactos_mapeados.get_stats()
+    stats["warmup"] = estado_warmup.get_stats()
+    stats["microbatch"] = despachador_inferencia.get_stats()
+    stats["rendimiento"] = cargador_rendimiento.get_stats()
+    stats["referencia"] = reference_data.get_stats()
+    stats["gcs"] = gcs.get_stats()
+    stats["ejecutor"] = ejecutor.get_stats()
+    stats["procesos"] = pool_procesos.get_stats()
+    stats["memoria"] = estado_memoria()
+    return stats
 
 
 @app.post("/predict")
-async def predict(request: PredictionRequest):
+async def predict(request: PredictionRequest, approx: bool = False):
     # Incrementar contador de solicitudes totales
     stats_manager.increment_total_requests()
 
     try:
-        # Procesar la predicción usando el módulo animal
-        resultado = procesar_prediccion_animal(request)
+        # Procesar la predicción en el carril de hilos de /predict para
+        # que las solicitudes concurrentes puedan compartir micro-lotes
+        resultado = await ejecutor.ejecutar(
+            "predict", despachar, "predict", request, approx)
 
         # Incrementar contador de solicitudes exitosas
         stats_manager.increment_successful_requests(request.finca)
@@ -84,6 +137,28 @@ async def predict(request: PredictionRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/predict/batch")
+async def predict_batch(requests: List[PredictionRequest]):
+    try:
+        # Resolver el lote agrupando las piscinas por finca
+        resultado = await ejecutor.ejecutar(
+            "predict", despachar, "predict_lote", requests)
+    except HTTPException:
+        stats_manager.increment_batch_requests([], len(requests))
+        raise
+    except Exception as e:
+        stats_manager.increment_batch_requests([], len(requests))
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # Registrar éxitos y fallos de cada fila con una sola escritura
+    exitosas = [r.finca for r, fila in zip(requests, resultado["resultados"])
+                if fila.get("status") != "error"]
+    stats_manager.increment_batch_requests(
+        exitosas, len(requests) - len(exitosas))
+
+    return resultado
+
+
 @app.post("/alimentation")
 async def alimentation(request: PredictionRequestAlimentation):
     # Incrementar contador de solicitudes totales
@@ -91,7 +166,8 @@ async def alimentation(request: PredictionRequestAlimentation):
 
     try:
         # Procesar la predicción usando el módulo alimentation
-        resultado = procesar_prediccion_alimentation(request)
+        resultado = await ejecutor.ejecutar(
+            "alimentation", despachar, "alimentation", request)
 
         # Incrementar contador de solicitudes exitosas
         stats_manager.increment_successful_requests(request.finca)
@@ -108,5 +184,55 @@ async def alimentation(request: PredictionRequestAlimentation):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/alimentation/finca/{finca}")
+async def alimentation_finca(finca: str,
+                             request: PredictionRequestAlimentationFinca):
+    stats_manager.increment_total_requests()
+
+    try:
+        # Todas las piscinas de la finca en una sola pasada vectorizada
+        resultado = await ejecutor.ejecutar(
+            "alimentation", despachar, "alimentation_finca", finca,
+            request)
+    except HTTPException:
+        stats_manager.increment_failed_requests()
+        raise
+    except Exception as e:
+        stats_manager.increment_failed_requests()
+        raise HTTPException(status_code=500, detail=str(e))
+
+    stats_manager.increment_successful_requests(finca)
+    return resultado
+
+
+@app.post("/alimentation/stream")
+async def alimentation_stream(request: Request):
+    """NDJSON de entrada y de salida: un resultado por línea recibida"""
+    # Una vez iniciada la respuesta ya no se puede contestar 503
+    ejecutor.comprobar("alimentation")
+
+    async def resultados():
+        total = fallidas = 0
+        # Se lee el cuerpo a medida que llega y se procesa por lotes
+        async for lote in en_lotes(lineas_ndjson(request.stream())):
+            filas = await ejecutor.ejecutar(
+                "alimentation", despachar, "alimentation_ndjson", lote,
+                rechazar=False)
+            exitosas = [fila.get("finca") for fila in filas
+                        if fila.get("status") == "success"]
+            total += len(filas)
+            fallidas += len(filas) - len(exitosas)
+            stats_manager.increment_batch_requests(
+                exitosas, len(filas) - len(exitosas))
+            for fila in filas:
+                yield linea_json(fila)
+        yield linea_json({"resumen": {"total": total,
+                                      "exitosas": total - fallidas,
+                                      "fallidas": fallidas},
+                          "status": "complete"})
+
+    return RespuestaNDJSON(resultados())
+
+
 # Incluir otras rutas
 app.include_router(main_router)
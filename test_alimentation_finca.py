@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Pruebas del cálculo de alimentación de todas las piscinas de una finca
+"""
+
+import json
+import os
+import tempfile
+
+from app import alimentation
+from app.alimentation import (PiscinaAlimentation, PredictionRequestAlimentation,
+                              PredictionRequestAlimentationFinca,
+                              procesar_alimentacion_finca,
+                              procesar_prediccion_alimentation)
+from app.calculator_state import convertir_numero
+
+TERRAIN = {"CAMANOVILLO": {"rows": [
+    {"Piscinas": 1, "Hectareas": "8.3"},
+    {"Piscinas": 2, "Hectareas": "6.49"},
+    {"Piscinas": 3, "Hectareas": "8.29"},
+    {"Piscinas": 4, "Hectareas": ""},
+    {"Piscinas": 5, "Hectareas": "s/d"},
+]}}
+
+
+def _piscina(numero, **extra):
+    datos = dict(Piscinas=numero, Fechadesiembra="10/10/2024",
+                 Fechademuestreo="10/12/2024", Edaddelcultivo=62,
+                 Pesoanterior=23.33, Pesoactualgdia=30.0 - numero,
+                 Densidadbiologoindm2=11.0, AcumuladoactualLBS=55042.0,
+                 numeroAA=4, Aireadores=8, Alimentoactualkg=614.0)
+    datos.update(extra)
+    return PiscinaAlimentation(**datos)
+
+
+def _con_terrain(funcion):
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "Terrain.json")
+        with open(ruta, "w") as f:
+            json.dump(TERRAIN, f)
+        original = alimentation.terrain_path
+        alimentation.terrain_path = ruta
+        try:
+            return funcion()
+        finally:
+            alimentation.terrain_path = original
+
+
+def test_finca_toma_hectareas_de_terrain_y_suma_totales():
+    """Hectáreas desde Terrain, respaldo del request y piscinas sin datos"""
+    request = PredictionRequestAlimentationFinca(piscinas=[
+        _piscina(1, Hectareas=99.0), _piscina(2),
+        _piscina(7, Hectareas=3.5), _piscina(8)])
+    resultado = _con_terrain(
+        lambda: procesar_alimentacion_finca("camanovillo", request))
+
+    uno, dos, siete, ocho = resultado["piscinas"]
+    assert uno["origen_hectareas"] == "terrain"
+    assert uno["resultados"]["hectareas"] == "8.3"
+    assert dos["resultados"]["hectareas"] == "6.49"
+    assert siete["origen_hectareas"] == "request"
+    assert siete["resultados"]["hectareas"] == "3.5"
+    assert ocho["status"] == "error" and "resultados" not in ocho
+    assert resultado["status"] == "partial"
+    assert resultado["metadatos"]["piscinas_terrain"] == 5
+
+    totales = resultado["totales"]
+    assert totales["hectareas"] == round(8.3 + 6.49 + 3.5, 2)
+    lunes = sum(int(p["resultados"]["lunes_dia1"])
+                for p in (uno, dos, siete))
+    assert totales["lunes_dia1"] == lunes
+
+
+def test_finca_igual_que_alimentation_por_piscina():
+    """Cada piscina da lo mismo que /alimentation con esas hectáreas"""
+    piscina = _piscina(3, Pesosiembra=2.0)
+    resultado = _con_terrain(lambda: procesar_alimentacion_finca(
+        "CAMANOVILLO",
+        PredictionRequestAlimentationFinca(piscinas=[piscina])))
+    fila = resultado["piscinas"][0]["resultados"]
+
+    datos = {columna: getattr(piscina, columna)
+             for columna in alimentation._COLUMNAS_PISCINA}
+    datos.update(finca="CAMANOVILLO", Hectareas=8.29)
+    individual = procesar_prediccion_alimentation(
+        PredictionRequestAlimentation(**datos))
+    comparados = 0
+    for campo, valor in individual["resultados"].items():
+        if campo not in fila:
+            continue
+        if isinstance(valor, str):
+            assert fila[campo] == valor, campo
+        else:
+            assert convertir_numero(fila[campo]) == valor, campo
+        comparados += 1
+    assert comparados >= 40
+
+
+def test_hectareas_invalidas_en_terrain_usan_el_request():
+    """Hectareas vacío o no numérico en Terrain no se calcula con 0.0"""
+    request = PredictionRequestAlimentationFinca(piscinas=[
+        _piscina(4, Hectareas=5.2), _piscina(5)])
+    resultado = _con_terrain(
+        lambda: procesar_alimentacion_finca("CAMANOVILLO", request))
+
+    cuatro, cinco = resultado["piscinas"]
+    assert cuatro["origen_hectareas"] == "request"
+    assert cuatro["resultados"]["hectareas"] == "5.2"
+    assert cinco["status"] == "error" and "resultados" not in cinco
+    assert "Hectareas válidas" in cinco["error"]
+    assert resultado["totales"]["hectareas"] == 5.2
+
+
+if __name__ == "__main__":
+    test_finca_toma_hectareas_de_terrain_y_suma_totales()
+    test_finca_igual_que_alimentation_por_piscina()
+    test_hectareas_invalidas_en_terrain_usan_el_request()
+    print("✅ Alimentación por finca OK")
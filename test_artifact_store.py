@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la sincronización de artefactos por generación de GCS
+"""
+
+import hashlib
+import os
+import tempfile
+
+from app.artifact_store import ArtifactStore
+from app.gcs import gcs
+
+
+class _BlobFalso:
+    def __init__(self, contenido, generation, fallar=False):
+        self.contenido = contenido
+        self.generation = generation
+        self.md5_hash = hashlib.md5(contenido).hexdigest()
+        self.size = len(contenido)
+        self.fallar = fallar
+
+    def download_to_filename(self, destino, timeout, if_generation_match):
+        assert if_generation_match == self.generation
+        with open(destino, 'wb') as f:
+            if self.fallar:
+                # La conexión se corta a mitad de la descarga
+                f.write(self.contenido[:self.size // 2])
+                raise ConnectionError("descarga interrumpida")
+            f.write(self.contenido)
+
+
+class _BucketFalso:
+    def __init__(self):
+        self.blob = None
+
+    def get_blob(self, nombre, timeout):
+        return self.blob
+
+
+def _sincronizar(bucket, store, destino):
+    buckets_originales = gcs._buckets
+    gcs._buckets = {"bucket-prueba": bucket}
+    try:
+        return store.sincronizar("bucket-prueba", "modelo.pkl", destino)
+    finally:
+        gcs._buckets = buckets_originales
+
+
+def test_reutiliza_la_copia_y_descarga_otra_generacion():
+    """Misma generación, md5 y tamaño se reutiliza; otra generación se baja"""
+    store = ArtifactStore()
+    bucket = _BucketFalso()
+    with tempfile.TemporaryDirectory() as directorio:
+        destino = os.path.join(directorio, "modelo.pkl")
+
+        bucket.blob = _BlobFalso(b"version uno", 1)
+        assert _sincronizar(bucket, store, destino)
+        assert not _sincronizar(bucket, store, destino)
+        assert store.leer_meta(destino)["generation"] == 1
+
+        bucket.blob = _BlobFalso(b"version dos, mas larga", 2)
+        assert _sincronizar(bucket, store, destino)
+        with open(destino, 'rb') as f:
+            assert f.read() == b"version dos, mas larga"
+        assert store.leer_meta(destino)["generation"] == 2
+
+        # Una copia local alterada no se da por vigente
+        with open(destino, 'ab') as f:
+            f.write(b"!")
+        assert _sincronizar(bucket, store, destino)
+
+    assert store.get_stats() == {"descargas": 3, "reutilizados": 1,
+                                 "bytes_descargados": 11 + 22 * 2}
+
+
+def test_descarga_fallida_no_deja_archivo_a_medias():
+    """Si la descarga falla queda la copia anterior y ningún temporal"""
+    store = ArtifactStore()
+    bucket = _BucketFalso()
+    with tempfile.TemporaryDirectory() as directorio:
+        destino = os.path.join(directorio, "modelo.pkl")
+        bucket.blob = _BlobFalso(b"version uno", 1)
+        _sincronizar(bucket, store, destino)
+
+        bucket.blob = _BlobFalso(b"version dos", 2, fallar=True)
+        try:
+            _sincronizar(bucket, store, destino)
+            assert False, "Se esperaba ConnectionError"
+        except ConnectionError:
+            pass
+
+        assert sorted(os.listdir(directorio)) == [
+            "modelo.pkl", "modelo.pkl.meta.json"]
+        with open(destino, 'rb') as f:
+            assert f.read() == b"version uno"
+        assert store.leer_meta(destino)["generation"] == 1
+
+        # Sin copia previa tampoco queda nada
+        nuevo = os.path.join(directorio, "scaler.pkl")
+        try:
+            _sincronizar(bucket, store, nuevo)
+            assert False, "Se esperaba ConnectionError"
+        except ConnectionError:
+            pass
+        assert not os.path.exists(nuevo)
+        assert store.leer_meta(nuevo) is None
+
+    assert store.get_stats()["descargas"] == 1
+
+
+if __name__ == "__main__":
+    test_reutiliza_la_copia_y_descarga_otra_generacion()
+    test_descarga_fallida_no_deja_archivo_a_medias()
+    print("✅ Almacén de artefactos OK")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la tabla BWCosechas compilada (BUSCARV aproximado)
+"""
+
+import numpy as np
+
+from app.bwcosechas import TablaBWCosechas, tabla_bwcosechas
+
+
+def _buscarv_original(filas, peso_consulta):
+    """Recorrido lineal que hacían los cálculos de días (solo pesos > 0)"""
+    peso_encontrado = 0.0
+    bw_cosechas = "0%"
+    for row in filas:
+        if "Pesos" in row and "BWCosechas" in row:
+            peso = float(str(row["Pesos"]))
+            if peso <= peso_consulta and peso > peso_encontrado:
+                peso_encontrado = peso
+                bw_cosechas = str(row["BWCosechas"])
+    return peso_encontrado, float(bw_cosechas.replace('%', '').strip()) / 100
+
+
+def test_busqueda_coincide_con_recorrido_lineal():
+    """Mayor peso ≤ consulta; con pesos repetidos gana la primera fila"""
+    filas = [{"Pesos": "0.10", "BWCosechas": "9.15%"},
+             {"Pesos": 30.0, "BWCosechas": "2.58516749708439%"},
+             {"Pesos": 2.0, "BWCosechas": "7.64%"},
+             {"Pesos": 0.5, "BWCosechas": "8.47%"},
+             {"Pesos": 2.0, "BWCosechas": "1.00%"},
+             {"Pesos": 31.0, "BWCosechas": 5.36}]
+    tabla = TablaBWCosechas({"rows": filas})
+    consultas = [0.05, 0.1, 0.3, 1.99, 2.0, 2.5, 29.99, 30.0, 30.5, 31.0, 99.0]
+
+    for consulta in consultas:
+        esperado = _buscarv_original(filas, consulta)
+        encontrado = tabla.buscar(consulta, solo_positivos=True)
+        assert (encontrado or (0.0, 0.0)) == esperado
+
+    pesos, fracciones = tabla.buscar_vector(consultas, solo_positivos=True)
+    for consulta, peso, fraccion in zip(consultas, pesos, fracciones):
+        esperado = _buscarv_original(filas, consulta)
+        if esperado[0] == 0.0:
+            assert np.isnan(peso) and np.isnan(fraccion)
+        else:
+            assert (peso, fraccion) == esperado
+
+
+def test_pesos_no_positivos_y_errores():
+    """Los pesos ≤ 0 solo cuentan sin `solo_positivos`; errores se reportan"""
+    tabla = TablaBWCosechas({"rows": [{"Pesos": -1, "BWCosechas": "5%"},
+                                      {"Pesos": "x", "BWCosechas": "5%"},
+                                      "no es fila"]})
+    assert tabla.buscar(0.5) == (-1.0, 0.05)
+    assert tabla.buscar(0.5, solo_positivos=True) is None
+    assert tabla.error_pesos is not None
+    assert tabla.filas_validas == [{"Pesos": -1, "BWCosechas": "5%"},
+                                   {"Pesos": "x", "BWCosechas": "5%"}]
+
+
+def test_tabla_compartida_por_instantanea():
+    """Los mismos datos devuelven la misma tabla compilada"""
+    datos = {"rows": [{"Pesos": 1.0, "BWCosechas": "7%"}]}
+    assert tabla_bwcosechas(datos) is tabla_bwcosechas(datos)
+    assert tabla_bwcosechas(dict(datos)) is not tabla_bwcosechas(datos)
+
+
+if __name__ == "__main__":
+    test_busqueda_coincide_con_recorrido_lineal()
+    test_pesos_no_positivos_y_errores()
+    test_tabla_compartida_por_instantanea()
+    print("✅ Tabla BWCosechas OK")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Pruebas del motor de cálculo por grafo de dependencias
+"""
+
+from app.alimentation import GRAFO_ALIMENTACION, AquacultureCalculator
+from app.calculation_graph import GrafoCalculo, Nodo
+
+
+class _Registro:
+    def __init__(self):
+        self.llamadas = []
+
+    def __getattr__(self, nombre):
+        return lambda: self.llamadas.append(nombre)
+
+
+def test_orden_topologico_e_invalidacion():
+    """Se respeta el orden de declaración salvo que una dependencia lo impida"""
+    grafo = GrafoCalculo([
+        Nodo('c', ['b'], ['c']),
+        Nodo('a', ['x', 'a'], ['a']),
+        Nodo('b', ['a'], ['b']),
+        Nodo('d', ['y'], ['d']),
+    ])
+    assert [n.metodo for n in grafo.orden] == ['a', 'b', 'c', 'd']
+    assert grafo.afectados('x') == {'a', 'b', 'c'}
+    assert grafo.afectados('y') == {'d'}
+    assert grafo.afectados('desconocido') == frozenset()
+
+    registro = _Registro()
+    pendientes = {'c', 'd'}
+    assert grafo.evaluar(registro, pendientes) == 2
+    assert registro.llamadas == ['c', 'd'] and not pendientes
+
+    for nodos in ([Nodo('a', ['b'], ['a']), Nodo('b', ['a'], ['b'])],
+                  [Nodo('a', [], ['x']), Nodo('b', [], ['x'])]):
+        try:
+            GrafoCalculo(nodos)
+            assert False, "Se esperaba ValueError"
+        except ValueError:
+            pass
+
+
+def _calculadora():
+    calculator = AquacultureCalculator()
+    valores = {
+        'hectareas': '7.8', 'piscinas': '5', 'fecha_siembra': '10/10/2024',
+        'fecha_muestreo': '10/12/2024', 'edad_cultivo': '62',
+        'peso_anterior': '23.33', 'peso_actual_gdia': '30',
+        'densidad_biologo_indm2': '11', 'acumulado_actual_lbs': '55042',
+        'numero_aa': '4', 'h_aireadores_mecanicos': '8',
+        'alimento_actual_kg': '614', 'peso_siembra': '1.0',
+    }
+    for clave, valor in valores.items():
+        calculator.set_controller_value(clave, valor)
+    return calculator
+
+
+def test_calculadora_evalua_cada_formula_una_vez():
+    """Varias llamadas sin cambios no recalculan; un cambio solo lo afectado"""
+    metodos = {n.metodo for n in GRAFO_ALIMENTACION.orden}
+    assert all(callable(getattr(AquacultureCalculator, m)) for m in metodos)
+
+    calculator = _calculadora()
+    calculator.generar_resultados_finales_extendidos({}, {})
+    assert calculator.nodos_evaluados == len(metodos)
+    resultados = calculator.generar_resultados_finales({})
+    assert calculator.nodos_evaluados == len(metodos)
+
+    calculator.set_controller_value('acumulado_actual_lbs', '60000')
+    calculator.calcular_todos_los_valores()
+    assert calculator.nodos_evaluados == len(metodos) + 2
+    assert calculator.get_controller_value('fca_campo') != \
+        resultados['fca_campo']
+
+    # El resultado incremental coincide con calcular desde cero
+    nueva = _calculadora()
+    nueva.set_controller_value('acumulado_actual_lbs', '60000')
+    assert nueva.generar_resultados_finales({}) == \
+        calculator.generar_resultados_finales({})
+
+
+if __name__ == "__main__":
+    test_orden_topologico_e_invalidacion()
+    test_calculadora_evalua_cada_formula_una_vez()
+    print("✅ Grafo de cálculo OK")
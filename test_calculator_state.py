@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Pruebas del estado numérico tipado de AquacultureCalculator
+"""
+
+import random
+
+from app.calculator_state import (CAMPOS, EstadoCalculadora,
+                                  convertir_numero)
+
+
+def _parsear_texto(texto):
+    """Lectura que hacían los cálculos: parsear el texto del controlador"""
+    try:
+        return convertir_numero(texto)
+    except ValueError:
+        return 0.0
+
+
+def test_numero_equivale_a_parsear_el_texto():
+    """Leer el float guarda el mismo valor que parsear el texto formateado"""
+    rng = random.Random(7)
+    valores = [0.0, -0.0, 0.005, 0.015, 2.675, -1.005, 1234567.891,
+               1e-7, 55042 / 3, float('inf'), float('nan')]
+    valores += [rng.uniform(-1e6, 1e6) for _ in range(2000)]
+
+    estado = EstadoCalculadora()
+    for valor in valores:
+        for campo, formato in (('kg_100mil', '.2f'),
+                               ('libras_totales_campo', ',.2f')):
+            estado.fijar(campo, valor)
+            texto = format(valor, formato)
+            assert estado.texto(campo) == texto
+            esperado = _parsear_texto(texto)
+            assert estado.numero(campo) == esperado
+            assert str(estado.numero(campo)) == str(esperado)
+
+    estado.fijar('lunes_dia1', 1275)
+    assert estado.texto('lunes_dia1') == "1275"
+    assert estado.lunes_dia1 == 1275.0
+
+
+def test_textos_de_entrada_y_errores():
+    """Los textos se devuelven tal cual y su número se parsea una vez"""
+    estado = EstadoCalculadora()
+    assert all(estado.texto(campo) == '' for campo in CAMPOS)
+    assert estado.hectareas == 0.0
+
+    estado.fijar_texto('hectareas', '7.8')
+    estado.fijar_texto('lunes_dia1', 'Error')
+    estado.fijar_texto('densidad_consumo_im2', '')
+    estado.fijar_texto('fecha_siembra', '10/10/2024')
+    assert estado.texto('hectareas') == '7.8' and estado.hectareas == 7.8
+    assert estado.texto('lunes_dia1') == 'Error' and estado.lunes_dia1 == 0.0
+    assert estado.texto('densidad_consumo_im2') == ''
+    assert estado.texto('fecha_siembra') == '10/10/2024'
+    assert estado.numero('sin_campo') == 0.0
+
+    # Un resultado numérico reemplaza el texto anterior
+    estado.fijar('lunes_dia1', 25)
+    assert estado.texto('lunes_dia1') == '25'
+    assert 'lunes_dia1' in estado.como_dict()
+    assert 'kg_100mil' not in estado.como_dict()
+
+
+if __name__ == "__main__":
+    test_numero_equivale_a_parsear_el_texto()
+    test_textos_de_entrada_y_errores()
+    print("✅ Estado de la calculadora OK")
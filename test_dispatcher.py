@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Pruebas del despachador de micro-lotes de /predict
+"""
+
+import threading
+
+import numpy as np
+
+from app.dispatcher import DespachadorInferencia
+
+
+def test_solicitudes_concurrentes_comparten_evaluaciones():
+    """Las llamadas simultáneas de una finca se evalúan en un mismo lote"""
+    despachador = DespachadorInferencia(ventana_ms=200, max_lote=64)
+    lotes = []
+    n = 8
+    barrera = threading.Barrier(n)
+
+    def funcion(X):
+        lotes.append(len(X))
+        return X * 2.0
+
+    resultados = {}
+
+    def solicitud(i):
+        with despachador.sesion("A"):
+            barrera.wait()
+            resultados[i] = despachador.predecir(
+                "A", funcion, np.array([[float(i), 1.0, 2.0]]))
+
+    hilos = [threading.Thread(target=solicitud, args=(i,)) for i in range(n)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    for i in range(n):
+        np.testing.assert_array_equal(resultados[i], [[2.0 * i, 2.0, 4.0]])
+    assert sum(lotes) == n
+    assert len(lotes) < n
+
+    stats = despachador.get_stats()
+    assert stats["llamadas"] == n
+    assert stats["lotes"] == len(lotes)
+    assert stats["sesiones_activas"] == 0
+
+
+def test_solicitud_sola_no_espera_la_ventana():
+    """Con una sola sesión activa el lote se cierra sin esperar"""
+    despachador = DespachadorInferencia(ventana_ms=5000, max_lote=64)
+
+    with despachador.sesion("A"):
+        resultado = despachador.predecir("A", lambda X: X + 1, np.zeros((1, 3)))
+
+    np.testing.assert_array_equal(resultado, np.ones((1, 3)))
+    assert despachador.get_stats()["espera_max_ms"] < 1000
+
+
+if __name__ == "__main__":
+    test_solicitudes_concurrentes_comparten_evaluaciones()
+    test_solicitud_sola_no_espera_la_ventana()
+    print("✅ Despachador de micro-lotes OK")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Pruebas del ejecutor acotado (carriles de hilos, cola máxima y 503)
+"""
+
+import asyncio
+import threading
+import time
+
+from app.executor import ColaSaturada, EjecutorAcotado
+
+
+def test_cola_llena_responde_503_con_retry_after():
+    """Con el hilo ocupado y la cola llena se rechaza sin esperar"""
+    ejecutor = EjecutorAcotado(hilos={"lento": 1}, cola_max=1)
+    liberar = threading.Event()
+
+    async def escenario():
+        primera = asyncio.ensure_future(
+            ejecutor.ejecutar("lento", liberar.wait, 5))
+        segunda = asyncio.ensure_future(
+            ejecutor.ejecutar("lento", lambda: "ok"))
+        await asyncio.sleep(0.05)
+
+        # El event loop sigue libre mientras el hilo está bloqueado
+        inicio = time.monotonic()
+        await asyncio.sleep(0.01)
+        assert time.monotonic() - inicio < 0.5
+
+        try:
+            await ejecutor.ejecutar("lento", lambda: "no")
+            assert False, "Se esperaba ColaSaturada"
+        except ColaSaturada as e:
+            assert e.status_code == 503
+            assert int(e.headers["Retry-After"]) >= 1
+        stats = ejecutor.get_stats()["carriles"]["lento"]
+        assert stats["en_ejecucion"] == 1 and stats["en_cola"] == 1
+
+        # Otro carril no se ve afectado
+        assert await ejecutor.ejecutar("otro", lambda: 42) == 42
+
+        liberar.set()
+        assert await primera is True
+        assert await segunda == "ok"
+
+    asyncio.run(escenario())
+    stats = ejecutor.get_stats()["carriles"]["lento"]
+    assert stats["completadas"] == 2 and stats["rechazadas"] == 1
+    assert stats["max_cola"] == 1 and stats["en_cola"] == 0
+
+
+def test_cancelar_en_cola_libera_el_puesto():
+    """Una solicitud cancelada antes de empezar no ocupa la cola"""
+    ejecutor = EjecutorAcotado(hilos={"x": 1}, cola_max=1)
+    liberar = threading.Event()
+
+    async def escenario():
+        ocupada = asyncio.ensure_future(ejecutor.ejecutar("x", liberar.wait))
+        en_cola = asyncio.ensure_future(ejecutor.ejecutar("x", lambda: 1))
+        await asyncio.sleep(0.05)
+        en_cola.cancel()
+        await asyncio.sleep(0.01)
+        ejecutor.comprobar("x")
+        liberar.set()
+        await ocupada
+
+    asyncio.run(escenario())
+    stats = ejecutor.get_stats()["carriles"]["x"]
+    assert stats["en_cola"] == 0 and stats["completadas"] == 1
+
+
+if __name__ == "__main__":
+    test_cola_llena_responde_503_con_retry_after()
+    test_cancelar_en_cola_libera_el_puesto()
+    print("✅ Ejecutor acotado OK")
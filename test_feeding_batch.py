@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Pruebas del motor vectorizado de alimentación contra el calculador escalar
+"""
+
+import random
+
+import numpy as np
+
+from app.alimentation import AquacultureCalculator
+from app.bwcosechas import TablaBWCosechas
+from app.calculator_state import CAMPOS
+from app.feeding_batch import calcular_lote_alimentacion, redondear_2
+
+PESOS_ALIMENTO = {"rows": [
+    {"Pesos": 0.5, "BWCosechas": "15%"}, {"Pesos": 2, "BWCosechas": "8%"},
+    {"Pesos": 5, "BWCosechas": "x"}, {"Pesos": 10, "BWCosechas": "4.5%"},
+    {"Pesos": 20, "BWCosechas": "3%"}, {"Pesos": 30, "BWCosechas": "0%"},
+]}
+
+
+def _calcular_escalar(fila, pesos):
+    """Mismo flujo que procesar_prediccion_alimentation, sin GCS"""
+    calculator = AquacultureCalculator()
+    calculator.pesos_alimento_data = pesos
+    valores = {
+        'hectareas': fila['Hectareas'], 'piscinas': fila['Piscinas'],
+        'edad_cultivo': fila['Edaddelcultivo'],
+        'peso_anterior': fila['Pesoanterior'],
+        'peso_actual_gdia': fila['Pesoactualgdia'],
+        'densidad_biologo_indm2': fila['Densidadbiologoindm2'],
+        'acumulado_actual_lbs': fila['AcumuladoactualLBS'],
+        'numero_aa': fila['numeroAA'],
+        'h_aireadores_mecanicos': fila['Aireadores'],
+        'alimento_actual_kg': fila['Alimentoactualkg'],
+    }
+    for clave, valor in valores.items():
+        calculator.set_controller_value(clave, str(valor))
+    calculator.set_controller_value('fecha_siembra', fila['Fechadesiembra'])
+    calculator.set_controller_value('fecha_muestreo', fila['Fechademuestreo'])
+    calculator.set_controller_value('peso_siembra', '1.0')
+    calculator.set_controller_value('densidad_atarraya', '10.0')
+    for clave in ('densidad_consumo_im2', 'peso_proyectado_gdia',
+                  'crecimiento_esperado_sem'):
+        calculator.set_controller_value(clave, '0.0')
+    try:
+        calculator.calcular_todos_los_valores()
+    except Exception as e:
+        return calculator, str(e)
+    return calculator, None
+
+
+def _filas(n):
+    rng = random.Random(18)
+
+    def valor(especiales, minimo, maximo):
+        if rng.random() < 0.2:
+            return rng.choice(especiales)
+        return round(rng.uniform(minimo, maximo), rng.choice([0, 2, 6]))
+
+    return [{
+        'Hectareas': valor([0.0, 1e-05, 1e+17], 0, 50),
+        'Piscinas': rng.randint(1, 40),
+        'Fechadesiembra': rng.choice(["01/01/2024", "", "10/10/2024"]),
+        'Fechademuestreo': rng.choice(["15/03/2024", ""]),
+        'Edaddelcultivo': rng.choice([0, 0, 74, 1]),
+        'Pesoanterior': valor([0.0], 0, 40),
+        'Pesoactualgdia': valor([0.0, 0.001, 5.0, 100.0, -1.0], 0, 45),
+        'Densidadbiologoindm2': valor([0.0, -1.0], 0, 40),
+        'AcumuladoactualLBS': valor([0.0], 0, 1e5),
+        'numeroAA': rng.choice([0, 4, 7]),
+        'Aireadores': rng.choice([0, 8]),
+        'Alimentoactualkg': valor([0.0, 1e-09], 0, 2000),
+    } for _ in range(n)]
+
+
+def test_redondear_2_es_round_de_python():
+    """Incluye empates donde np.round difiere de round()"""
+    rng = random.Random(2)
+    valores = [0.125, 0.375, 2.675, 1.005, -0.005, -0.0, 1e-300, 1e15 + 0.125]
+    valores += [rng.randint(-10 ** 6, 10 ** 6) / 1000 for _ in range(5000)]
+    valores += [rng.uniform(-1e6, 1e6) for _ in range(5000)]
+    obtenidos = redondear_2(np.array(valores))
+    for valor, obtenido in zip(valores, obtenidos):
+        assert str(float(obtenido)) == str(round(valor, 2)), valor
+    assert np.isinf(redondear_2(np.array([np.inf]))[0])
+
+
+def test_lote_igual_que_escalar():
+    """Cada campo (número y texto) coincide con el cálculo por piscina"""
+    filas = _filas(400)
+    columnas = {clave: [f[clave] for f in filas] for clave in filas[0]}
+    for pesos in (PESOS_ALIMENTO, {}):
+        resultado = calcular_lote_alimentacion(columnas,
+                                               TablaBWCosechas(pesos))
+        assert len(resultado) == len(filas)
+        for i, fila in enumerate(filas):
+            calculator, error = _calcular_escalar(fila, pesos)
+            assert resultado.errores.get(i) == error, (i, error)
+            if error:
+                continue
+            for campo in CAMPOS:
+                assert resultado.texto(campo, i) == \
+                    calculator.get_controller_value(campo), (campo, fila)
+                assert str(resultado.numero(campo, i)) == \
+                    str(calculator.estado.numero(campo)), (campo, fila)
+
+
+if __name__ == "__main__":
+    test_redondear_2_es_round_de_python()
+    test_lote_igual_que_escalar()
+    print("✅ Motor vectorizado de alimentación OK")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Pruebas del cliente compartido de Google Cloud Storage
+"""
+
+import json
+import os
+import tempfile
+import threading
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from google.cloud import storage
+
+from app.gcs import ClienteGCS, separar_ruta_gcs
+
+
+class _ClienteFalso:
+    def bucket(self, nombre):
+        return f"bucket-{nombre}"
+
+
+def test_cliente_se_crea_una_sola_vez():
+    """Hilos concurrentes comparten el mismo cliente y buckets"""
+    creados = []
+    cliente = ClienteGCS()
+
+    def crear():
+        creados.append(1)
+        return _ClienteFalso()
+
+    cliente._crear_cliente = crear
+    hilos = [threading.Thread(target=cliente.bucket, args=("azaktilsa",))
+             for _ in range(10)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert len(creados) == 1
+    assert cliente.bucket("azaktilsa") == "bucket-azaktilsa"
+    assert cliente.get_stats()["clientes_creados"] == 1
+
+
+def test_fallo_de_credenciales_no_se_reintenta_enseguida():
+    """El error se repite sin volver a resolver credenciales"""
+    intentos = []
+    cliente = ClienteGCS(reintento_cliente_s=60)
+
+    def crear():
+        intentos.append(1)
+        raise RuntimeError("credentials were not found")
+
+    cliente._crear_cliente = crear
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            cliente.cliente()
+
+    assert len(intentos) == 1
+    assert cliente.get_stats()["fallos_cliente"] == 1
+
+
+def test_credenciales_de_cuenta_de_servicio_llevan_scopes():
+    """Con archivo de clave la sesión usa los scopes de storage"""
+    clave = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = clave.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()).decode()
+    anterior = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS")
+    with tempfile.NamedTemporaryFile("w", suffix=".json") as archivo:
+        json.dump({
+            "type": "service_account", "project_id": "azaktilsa-prueba",
+            "private_key_id": "1", "private_key": pem,
+            "client_email": "prueba@azaktilsa-prueba.iam.gserviceaccount.com",
+            "client_id": "1", "token_uri": "https://oauth2.googleapis.com/token",
+        }, archivo)
+        archivo.flush()
+        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = archivo.name
+        try:
+            cliente = ClienteGCS(project="azaktilsa-prueba")._crear_cliente()
+        finally:
+            if anterior is None:
+                del os.environ["GOOGLE_APPLICATION_CREDENTIALS"]
+            else:
+                os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = anterior
+
+    credenciales = cliente._http.credentials
+    assert not credenciales.requires_scopes
+    assert set(storage.Client.SCOPE) <= set(credenciales.scopes)
+
+
+def test_separar_ruta_gcs():
+    """Rutas gs:// en (bucket, blob)"""
+    assert separar_ruta_gcs("gs://azaktilsa_fincas/Data/Rendimiento.json") == \
+        ("azaktilsa_fincas", "Data/Rendimiento.json")
+
+
+if __name__ == "__main__":
+    test_cliente_se_crea_una_sola_vez()
+    test_fallo_de_credenciales_no_se_reintenta_enseguida()
+    test_credenciales_de_cuenta_de_servicio_llevan_scopes()
+    test_separar_ruta_gcs()
+    print("✅ Cliente GCS OK")
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la inferencia compilada (scaler → modelo con NumPy puro)
+"""
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVR
+
+from app.inference import compilar_inferencia
+
+
+def _datos_animal():
+    """Datos sintéticos con la forma de [AnimalesM, Hectareas, Piscinas]"""
+    rng = np.random.default_rng(7)
+    X = rng.uniform([5, 2, 1], [30, 10, 20], (200, 3))
+    y = np.c_[X[:, 0] * X[:, 1] * 10, 20 + X[:, 0] * 0.3]
+    return X, y
+
+
+def test_random_forest_compilado_coincide_con_sklearn():
+    """El bosque compilado predice lo mismo que sklearn"""
+    X, y = _datos_animal()
+    scaler = StandardScaler().fit(X)
+    modelo = RandomForestRegressor(n_estimators=20, random_state=0)
+    modelo.fit(scaler.transform(X), y)
+
+    inferencia = compilar_inferencia(modelo, scaler)
+
+    assert inferencia.modelo_compilado
+    assert inferencia.scaler_compilado
+    assert inferencia.paridad_verificada
+    fila = np.array([[12.0, 7.8, 5]])
+    np.testing.assert_allclose(
+        inferencia.predecir(fila),
+        modelo.predict(scaler.transform(fila)), rtol=1e-12)
+
+
+def test_estimador_no_soportado_usa_sklearn():
+    """Un estimador sin núcleo compilado cae en su propio predict"""
+    X, y = _datos_animal()
+    scaler = StandardScaler().fit(X)
+    modelo = SVR().fit(scaler.transform(X), y[:, 1])
+
+    inferencia = compilar_inferencia(modelo, scaler)
+
+    assert not inferencia.modelo_compilado
+    np.testing.assert_allclose(
+        inferencia.predecir(X[:5]), modelo.predict(scaler.transform(X[:5])))
+
+
+if __name__ == "__main__":
+    test_random_forest_compilado_coincide_con_sklearn()
+    test_estimador_no_soportado_usa_sklearn()
+    print("✅ Inferencia compilada OK")
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Pruebas de los artefactos mapeados en memoria (mmap_mode='r')
+"""
+
+import os
+import shutil
+import tempfile
+import time
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import Ridge
+from sklearn.preprocessing import StandardScaler
+
+from app.artifact_store import artifact_store
+from app.inference import compilar_inferencia, compilar_nucleo
+from app.mmap_artifacts import ArtefactosMapeados
+
+
+def _datos():
+    rng = np.random.default_rng(3)
+    X = rng.uniform([5, 2, 1], [30, 10, 20], (200, 3))
+    y = np.c_[X[:, 0] * X[:, 1] * 10, 20 + X[:, 0] * 0.3]
+    return X, y
+
+
+def test_artefacto_mapeado_predice_igual():
+    """Coeficientes y núcleo compilado quedan mapeados y predicen igual"""
+    X, y = _datos()
+    scaler = StandardScaler().fit(X)
+    lineal = Ridge().fit(scaler.transform(X), y)
+    bosque = RandomForestRegressor(n_estimators=10, random_state=0)
+    bosque.fit(scaler.transform(X), y)
+    artefactos = ArtefactosMapeados(activo=True)
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta_lineal = os.path.join(directorio, "lineal.pkl")
+        ruta_bosque = os.path.join(directorio, "bosque.pkl")
+        joblib.dump(lineal, ruta_lineal, compress=3)
+        joblib.dump(bosque, ruta_bosque, compress=3)
+
+        mapeado = artefactos.cargar(ruta_lineal)
+        assert isinstance(mapeado.coef_, np.memmap)
+        assert not mapeado.coef_.flags.writeable
+        np.testing.assert_array_equal(mapeado.predict(X), lineal.predict(X))
+
+        modelo = artefactos.cargar(ruta_bosque)
+        nucleo = artefactos.cargar_nucleo(
+            ruta_bosque, lambda: compilar_nucleo(modelo))
+        assert isinstance(nucleo.umbral, np.memmap)
+        inferencia = compilar_inferencia(modelo, scaler, nucleo=nucleo)
+        assert inferencia.paridad_verificada
+        np.testing.assert_allclose(
+            inferencia.predecir(X[:5]),
+            bosque.predict(scaler.transform(X[:5])), rtol=1e-12)
+
+        # La segunda carga reutiliza las copias
+        artefactos.cargar(ruta_lineal)
+        assert artefactos.get_stats()["conversiones"] == 3
+
+        # Si cambia el origen la copia se regenera
+        time.sleep(0.01)
+        joblib.dump(Ridge(alpha=5).fit(X, y), ruta_lineal)
+        assert artefactos.cargar(ruta_lineal).alpha == 5
+        assert artefactos.get_stats()["conversiones"] == 4
+
+
+def test_origen_ilegible_cae_en_carga_normal():
+    """Sin copia posible se carga el original; sin origen falla igual"""
+    artefactos = ArtefactosMapeados(activo=True)
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "escalas.pkl")
+        joblib.dump({"escala": 2.0}, ruta)
+        os.chmod(directorio, 0o500)
+        try:
+            assert artefactos.cargar(ruta) == {"escala": 2.0}
+        finally:
+            os.chmod(directorio, 0o700)
+    if os.geteuid() != 0:
+        assert artefactos.get_stats()["fallos"] == 1
+
+    try:
+        artefactos.cargar("/no/existe.pkl")
+        assert False, "Se esperaba FileNotFoundError"
+    except FileNotFoundError:
+        pass
+
+
+def test_copias_en_directorio_propio_sin_conservar_el_original():
+    """Con la firma del blob el .pkl se borra y no se vuelve a descargar"""
+    X, y = _datos()
+    scaler = StandardScaler().fit(X)
+    bosque = RandomForestRegressor(n_estimators=5, random_state=0)
+    bosque.fit(scaler.transform(X), y)
+    descargas = []
+    meta_original = artifact_store.meta_remota
+    sincronizar_original = artifact_store.sincronizar
+
+    with tempfile.TemporaryDirectory() as tmp, \
+            tempfile.TemporaryDirectory() as volumen:
+        publicado = os.path.join(tmp, "publicado.pkl")
+        joblib.dump(bosque, publicado, compress=3)
+        destino = os.path.join(tmp, "FINCA_modelo.pkl")
+
+        artifact_store.meta_remota = lambda bucket, blob: {
+            "bucket": bucket, "blob": blob, "generation": 3,
+            "md5_hash": "x", "size": os.path.getsize(publicado)}
+
+        def sincronizar(bucket, blob, ruta):
+            descargas.append(blob)
+            shutil.copy(publicado, ruta)
+
+        artifact_store.sincronizar = sincronizar
+        artefactos = ArtefactosMapeados(activo=True, directorio=volumen)
+        try:
+            for _ in range(2):
+                modelo, firma = artefactos.sincronizar_y_cargar(
+                    "bucket", "modelo.pkl", destino)
+                nucleo = artefactos.cargar_nucleo(
+                    destino, lambda: compilar_nucleo(modelo), firma=firma)
+        finally:
+            artifact_store.meta_remota = meta_original
+            artifact_store.sincronizar = sincronizar_original
+
+        assert descargas == ["modelo.pkl"]
+        assert not os.path.exists(destino)
+        assert sorted(os.listdir(volumen)) == [
+            "FINCA_modelo.pkl.mmap", "FINCA_modelo.pkl.mmap.meta.json",
+            "FINCA_modelo.pkl.nucleo.mmap",
+            "FINCA_modelo.pkl.nucleo.mmap.meta.json"]
+        assert artefactos.tamano(destino) > 0
+
+        inferencia = compilar_inferencia(modelo, scaler, nucleo=nucleo)
+        assert inferencia.liberar_modelo() and inferencia.modelo is None
+        np.testing.assert_allclose(
+            inferencia.predecir(X[:5]),
+            bosque.predict(scaler.transform(X[:5])), rtol=1e-12)
+        assert inferencia.describir()["modelo"] == "RandomForestRegressor"
+
+
+if __name__ == "__main__":
+    test_artefacto_mapeado_predice_igual()
+    test_origen_ilegible_cae_en_carga_normal()
+    test_copias_en_directorio_propio_sin_conservar_el_original()
+    print("✅ Artefactos mapeados OK")
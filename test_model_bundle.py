@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Pruebas del bundle versionado de modelo (manifiesto, checksums, carga)
+"""
+
+import glob
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+
+import joblib
+import numpy as np
+
+from app import alimentation
+from app.gcs import gcs, separar_ruta_gcs
+from app.mmap_artifacts import artefactos_mapeados
+from app.model_bundle import (COMPONENTES_ALIMENTATION, BundleInvalido,
+                              empaquetar, extraer, leer_manifiesto, main)
+
+
+def _componentes(directorio):
+    rutas = {}
+    for i, nombre in enumerate(COMPONENTES_ALIMENTATION):
+        rutas[nombre] = os.path.join(directorio, f"{nombre}_origen.pkl")
+        joblib.dump({"componente": nombre, "pesos": np.arange(10.0) * i},
+                    rutas[nombre])
+    return rutas
+
+
+def test_empaquetar_extraer_y_rechazar_alterado():
+    """El manifiesto lleva versión y checksums; un bundle alterado falla"""
+    with tempfile.TemporaryDirectory() as directorio:
+        bundle = os.path.join(directorio, "finca.tar")
+        manifiesto = empaquetar(_componentes(directorio), bundle, "PRUEBA",
+                                version="v7")
+        assert leer_manifiesto(bundle)["version"] == "v7"
+        assert set(manifiesto["componentes"]) == set(COMPONENTES_ALIMENTATION)
+        assert main(["inspeccionar", bundle]) == 0
+
+        _, rutas = extraer(bundle, os.path.join(directorio, "x"),
+                           requeridos=COMPONENTES_ALIMENTATION)
+        assert joblib.load(rutas["selector"])["componente"] == "selector"
+
+        # Sin cambios no se reescribe (la copia mapeada sigue vigente)
+        mtime = os.stat(rutas["modelo"]).st_mtime_ns
+        extraer(bundle, os.path.join(directorio, "x"))
+        assert os.stat(rutas["modelo"]).st_mtime_ns == mtime
+
+        alterado = os.path.join(directorio, "alterado.tar")
+        with tarfile.open(bundle) as origen, \
+                tarfile.open(alterado, "w") as destino:
+            for miembro in origen.getmembers():
+                datos = origen.extractfile(miembro).read()
+                if miembro.name == "scaler.pkl":
+                    datos = datos[:-1] + bytes([datos[-1] ^ 1])
+                destino.addfile(miembro, io.BytesIO(datos))
+        try:
+            extraer(alterado, os.path.join(directorio, "y"))
+            assert False, "Se esperaba BundleInvalido"
+        except BundleInvalido as e:
+            assert "scaler" in str(e)
+
+
+class _BlobFalso:
+    def __init__(self, origen, generation):
+        self.origen = origen
+        self.generation = generation
+        self.md5_hash = str(generation)
+        self.size = os.path.getsize(origen)
+        self.descargas = 0
+
+    def download_to_filename(self, destino, timeout, if_generation_match):
+        assert if_generation_match == self.generation
+        self.descargas += 1
+        shutil.copy(self.origen, destino)
+
+
+class _BucketFalso:
+    def __init__(self, blobs):
+        self.blobs = blobs
+        self.pedidos = []
+
+    def get_blob(self, nombre, timeout):
+        self.pedidos.append(nombre)
+        return self.blobs.get(nombre)
+
+
+def test_carga_por_bundle_y_version_en_respuesta():
+    """La finca se carga del bundle, reporta su versión y solo deja copias"""
+    finca = "PRUEBA_BUNDLE"
+    bucket_bundle, blob_bundle = separar_ruta_gcs(
+        alimentation.BUNDLE_ALIMENTATION_PATH.format(finca=finca))
+    buckets_originales = gcs._buckets
+    directorio_original = artefactos_mapeados.directorio
+    with tempfile.TemporaryDirectory() as directorio, \
+            tempfile.TemporaryDirectory() as volumen:
+        bundle = os.path.join(directorio, "bundle.tar")
+        empaquetar(_componentes(directorio), bundle, finca, version="2026.10")
+        blob = _BlobFalso(bundle, 12)
+        gcs._buckets = {bucket_bundle: _BucketFalso({blob_bundle: blob})}
+        artefactos_mapeados.directorio = volumen
+        try:
+            for _ in range(2):
+                artefactos, tamano = \
+                    alimentation._descargar_y_cargar_artefactos(finca)
+            version = alimentation.version_modelo(finca)
+            temporales = glob.glob(f"/tmp/{finca}_*")
+            copias = sorted(os.listdir(volumen))
+        finally:
+            gcs._buckets = buckets_originales
+            artefactos_mapeados.directorio = directorio_original
+            alimentation._versiones_modelo.pop(finca, None)
+            for ruta in glob.glob(f"/tmp/{finca}_*"):
+                os.remove(ruta)
+
+    # La segunda carga usa las copias vigentes sin descargar el bundle
+    assert blob.descargas == 1
+    assert [a["componente"] for a in artefactos] == \
+        list(COMPONENTES_ALIMENTATION)
+    assert tamano > 0
+    assert version == "2026.10"
+    # Ni el tar ni los .pkl extraídos: solo las copias mapeadas
+    assert temporales == []
+    assert copias == sorted(
+        [f"{finca}_alimentation.tar.manifest.json"] +
+        [f"{finca}_alimentation_{nombre}.pkl.mmap{extra}"
+         for nombre in COMPONENTES_ALIMENTATION
+         for extra in ("", ".meta.json")])
+
+
+def test_sin_bundle_carga_los_cuatro_blobs():
+    """Sin bundle publicado se cargan los blobs sueltos, versión blobs-<gen>"""
+    finca = "PRUEBA_BLOBS"
+    bucket_bundle, blob_bundle = separar_ruta_gcs(
+        alimentation.BUNDLE_ALIMENTATION_PATH.format(finca=finca))
+    buckets_originales = gcs._buckets
+    with tempfile.TemporaryDirectory() as directorio:
+        origenes = _componentes(directorio)
+        alimentation.modelos[finca] = {
+            nombre: f"gs://bucket-prueba/{finca}/{nombre}.pkl"
+            for nombre in COMPONENTES_ALIMENTATION}
+        fincas = _BucketFalso({
+            f"{finca}/{nombre}.pkl": _BlobFalso(origenes[nombre], 40 + i)
+            for i, nombre in enumerate(COMPONENTES_ALIMENTATION)})
+        bundles = _BucketFalso({})
+        gcs._buckets = {"bucket-prueba": fincas, bucket_bundle: bundles}
+        try:
+            artefactos, tamano = \
+                alimentation._descargar_y_cargar_artefactos(finca)
+            version = alimentation.version_modelo(finca)
+        finally:
+            gcs._buckets = buckets_originales
+            del alimentation.modelos[finca]
+            alimentation._versiones_modelo.pop(finca, None)
+            for ruta in glob.glob(f"/tmp/{finca}_*"):
+                os.remove(ruta)
+
+    assert bundles.pedidos == [blob_bundle]
+    assert [a["componente"] for a in artefactos] == \
+        list(COMPONENTES_ALIMENTATION)
+    assert tamano > 0
+    assert version == "blobs-40"
+
+
+if __name__ == "__main__":
+    test_empaquetar_extraer_y_rechazar_alterado()
+    test_carga_por_bundle_y_version_en_respuesta()
+    test_sin_bundle_carga_los_cuatro_blobs()
+    print("✅ Bundles de modelo OK")
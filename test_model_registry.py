@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Pruebas del registro residente de modelos (LRU con presupuesto de memoria)
+"""
+
+import threading
+import time
+
+from app.model_registry import ModelRegistry
+
+
+def test_registro_hits_misses_y_lru():
+    """Las cargas repetidas se sirven desde memoria y se expulsa la menos usada"""
+    registro = ModelRegistry(max_bytes=100)
+    cargas = []
+
+    def cargador(nombre, tamano):
+        def cargar():
+            cargas.append(nombre)
+            return f"modelo-{nombre}", tamano
+        return cargar
+
+    assert registro.obtener("a", cargador("a", 40)) == "modelo-a"
+    assert registro.obtener("b", cargador("b", 40)) == "modelo-b"
+    assert registro.obtener("a", cargador("a", 40)) == "modelo-a"
+
+    # "b" es la menos usada y debe salir al cargar "c"
+    registro.obtener("c", cargador("c", 40))
+
+    assert registro.contiene("a")
+    assert not registro.contiene("b")
+    assert cargas == ["a", "b", "c"]
+
+    stats = registro.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+    assert stats["evictions"] == 1
+    assert stats["bytes_en_uso"] == 80
+
+
+def test_cargas_concurrentes_comparten_una_descarga():
+    """Varias solicitudes en frío de la misma finca ejecutan una sola carga"""
+    registro = ModelRegistry(max_bytes=100)
+    cargas = []
+
+    def cargar():
+        cargas.append(1)
+        time.sleep(0.05)
+        return "modelo", 10
+
+    resultados = []
+    hilos = [threading.Thread(
+        target=lambda: resultados.append(registro.obtener("a", cargar)))
+        for _ in range(20)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert len(cargas) == 1
+    assert resultados == ["modelo"] * 20
+
+
+if __name__ == "__main__":
+    test_registro_hits_misses_y_lru()
+    test_cargas_concurrentes_comparten_una_descarga()
+    print("✅ Registro de modelos OK")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la lectura incremental de NDJSON para /alimentation/stream
+"""
+
+import asyncio
+import json
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.alimentation import procesar_lote_ndjson
+from app.ndjson_stream import (RespuestaNDJSON, en_lotes, linea_json,
+                               lineas_ndjson)
+
+
+async def _fragmentos(datos, tamano):
+    for i in range(0, len(datos), tamano):
+        yield datos[i:i + tamano]
+
+
+async def _leer(datos, tamano, max_bytes=None, lote=None):
+    registros = lineas_ndjson(_fragmentos(datos, tamano), max_bytes)
+    if lote:
+        return [l async for l in en_lotes(registros, lote)]
+    return [r async for r in registros]
+
+
+def test_lineas_partidas_entre_fragmentos():
+    """Las líneas se reconstruyen aunque lleguen partidas en varios trozos"""
+    datos = (b'{"a": 1}\n\n{"b": "\xc3\xb1"}\r\n[1, 2]\n{roto\n'
+             + b'{"largo": "' + b"x" * 100 + b'"}\n{"c": 3}')
+    for tamano in (1, 3, 7, 1000):
+        registros = asyncio.run(_leer(datos, tamano, max_bytes=64))
+        assert [n for n, _ in registros] == [1, 2, 3, 4, 5, 6]
+        assert registros[0][1] == {"a": 1}
+        assert registros[1][1] == {"b": "ñ"}
+        assert registros[2][1] == "Cada línea debe ser un objeto JSON"
+        assert registros[3][1].startswith("JSON inválido")
+        assert "64 bytes" in registros[4][1]
+        assert registros[5][1] == {"c": 3}
+
+    lotes = asyncio.run(_leer(b'{"a": 1}\n' * 5, 4, lote=2))
+    assert [len(l) for l in lotes] == [2, 2, 1]
+
+
+def test_respuesta_lee_el_cuerpo_mientras_responde():
+    """Cada lote se responde sin esperar al final de la subida"""
+    app = FastAPI()
+
+    @app.post("/eco")
+    async def eco(request: Request):
+        async def lotes():
+            async for lote in en_lotes(lineas_ndjson(request.stream()), 3):
+                yield linea_json([registro for _, registro in lote])
+        return RespuestaNDJSON(lotes())
+
+    def cuerpo():
+        for i in range(7):
+            yield f'{{"i": {i}}}\n'.encode()
+
+    respuesta = TestClient(app).post("/eco", content=cuerpo())
+    assert respuesta.headers["content-type"] == "application/x-ndjson"
+    lineas = [json.loads(l) for l in respuesta.text.splitlines()]
+    assert [len(l) for l in lineas] == [3, 3, 1]
+    assert lineas[-1] == [{"i": 6}]
+
+
+def test_lote_de_registros_de_alimentacion():
+    """Cada línea devuelve su resultado o su error, con el número de línea"""
+    valido = {"finca": "CAMANOVILLO", "Hectareas": 7.8, "Piscinas": 5,
+              "Fechadesiembra": "10/10/2024", "Fechademuestreo": "10/12/2024",
+              "Edaddelcultivo": 62, "Pesoanterior": 23.33,
+              "Pesoactualgdia": 30, "Densidadbiologoindm2": 11,
+              "AcumuladoactualLBS": 55042, "numeroAA": 4, "Aireadores": 8,
+              "Alimentoactualkg": 614}
+    filas = procesar_lote_ndjson([
+        (1, valido), (2, {"finca": "CAMANOVILLO"}), (3, "JSON inválido: x")])
+    assert [f["linea"] for f in filas] == [1, 2, 3]
+    assert filas[0]["status"] == "success"
+    assert filas[0]["resultados"]["lunes_dia1"] > 0
+    assert filas[1]["status"] == "error" and filas[1]["detalle"]
+    assert filas[2] == {"linea": 3, "error": "JSON inválido: x",
+                        "status": "error"}
+    for fila in filas:
+        assert json.loads(linea_json(fila)) is not None
+
+
+if __name__ == "__main__":
+    test_lineas_partidas_entre_fragmentos()
+    test_respuesta_lee_el_cuerpo_mientras_responde()
+    test_lote_de_registros_de_alimentacion()
+    print("✅ NDJSON de alimentación OK")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Pruebas del modo pre-fork: memoria compartida por fork y estimación
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from app import warmup
+from app.gcs import gcs
+from app.prefork import (estado_memoria, limite_memoria, memoria_proceso,
+                         parsear_smaps, trabajadores_que_caben)
+
+SMAPS = """\
+55d0c0000000-55d0c0021000 r--p 00000000 08:01 1 /usr/bin/python3
+Rss:                 400 kB
+Pss:                 150 kB
+Shared_Clean:        300 kB
+Shared_Dirty:          0 kB
+Private_Clean:        60 kB
+Private_Dirty:        40 kB
+7f00-7f10 rw-p 00000000 00:00 0
+Rss:                 100 kB
+Pss:                  50 kB
+Shared_Dirty:        100 kB
+"""
+
+
+def test_smaps_y_limites():
+    """Suma de campos de smaps, límite de cgroup y trabajadores que caben"""
+    memoria = parsear_smaps(SMAPS)
+    assert memoria["rss"] == 500 * 1024 and memoria["pss"] == 200 * 1024
+    assert memoria["compartida"] == 400 * 1024
+    assert memoria["privada"] == 100 * 1024
+
+    with tempfile.TemporaryDirectory() as raiz:
+        assert limite_memoria(raiz) is None
+        with open(os.path.join(raiz, "memory.max"), "w") as f:
+            f.write("536870912\n")
+        assert limite_memoria(raiz) == 512 * 2 ** 20
+        with open(os.path.join(raiz, "memory.max"), "w") as f:
+            f.write("max\n")
+        assert limite_memoria(raiz) is None
+
+    mib = 2 ** 20
+    assert trabajadores_que_caben(512 * mib, 300 * mib, 40 * mib, 2) == 7
+    assert trabajadores_que_caben(None, 300 * mib, 40 * mib, 2) is None
+
+    estado = estado_memoria()
+    assert estado["modo"] == "proceso_unico"
+    assert estado["proceso"]["rss"] > 0
+
+
+def test_hijo_comparte_la_memoria_del_padre():
+    """Un arreglo creado antes del fork aparece como memoria compartida"""
+    arreglo = np.ones(8 * 2 ** 20 // 8)  # 8 MiB ya escritos
+    cliente_original = gcs._cliente
+    gcs._cliente = object()
+    lectura, escritura = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            datos = {"memoria": memoria_proceso(),
+                     "cliente_gcs": gcs._cliente is None,
+                     "suma": float(arreglo.sum())}
+            os.write(escritura, json.dumps(datos).encode())
+        finally:
+            os._exit(0)
+    gcs._cliente = cliente_original
+    os.close(escritura)
+    with os.fdopen(lectura) as f:
+        datos = json.loads(f.read())
+    os.waitpid(pid, 0)
+
+    assert datos["suma"] == arreglo.size
+    assert datos["memoria"]["compartida"] >= arreglo.nbytes
+    # El hijo no hereda las conexiones de GCS del padre
+    assert datos["cliente_gcs"]
+
+
+def test_precarga_sin_timeout_no_deja_hilos_antes_del_fork():
+    """El maestro espera toda la precarga y los hijos no la repiten"""
+    tareas_originales = warmup._tareas_warmup
+    listo_original = warmup.estado_warmup.listo
+    ejecutadas = []
+    warmup._tareas_warmup = lambda: [
+        ("lenta", lambda: (time.sleep(0.3), ejecutadas.append("lenta"))),
+        ("rapida", lambda: ejecutadas.append("rapida"))]
+    try:
+        warmup.estado_warmup.listo = False
+        warmup.ejecutar_warmup(timeout=None)
+        assert sorted(ejecutadas) == ["lenta", "rapida"]
+        assert not any(h.name.startswith("warmup")
+                       for h in threading.enumerate())
+
+        # Como en un hijo forkeado: ya listo, no se vuelve a precargar
+        warmup.iniciar_warmup()
+        time.sleep(0.1)
+        assert len(ejecutadas) == 2
+    finally:
+        warmup._tareas_warmup = tareas_originales
+        warmup.estado_warmup.listo = listo_original
+
+
+if __name__ == "__main__":
+    test_smaps_y_limites()
+    test_hijo_comparte_la_memoria_del_padre()
+    test_precarga_sin_timeout_no_deja_hilos_antes_del_fork()
+    print("✅ Modo pre-fork OK")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Pruebas del pool de procesos opcional y del cálculo de CPUs del contenedor
+"""
+
+import os
+import tempfile
+import threading
+
+from fastapi import HTTPException
+
+from app.animal import PredictionRequest
+from app.process_pool import PoolProcesos, cpus_disponibles
+
+
+def _escribir(directorio, ruta, contenido):
+    ruta = os.path.join(directorio, ruta)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    with open(ruta, "w") as f:
+        f.write(contenido)
+
+
+def test_cpus_segun_cuota_de_cgroup():
+    """cgroup v2, v1 y sin límite; nunca más que la afinidad del proceso"""
+    afinidad = cpus_disponibles("/no/existe")
+    assert afinidad >= 1
+
+    with tempfile.TemporaryDirectory() as v2:
+        _escribir(v2, "cpu.max", "50000 100000\n")
+        assert cpus_disponibles(v2) == 1
+        _escribir(v2, "cpu.max", "max 100000\n")
+        assert cpus_disponibles(v2) == afinidad
+        _escribir(v2, "cpu.max", f"{150000 * afinidad} 100000\n")
+        assert cpus_disponibles(v2) == afinidad
+
+    with tempfile.TemporaryDirectory() as v1:
+        _escribir(v1, "cpu/cpu.cfs_quota_us", "100000\n")
+        _escribir(v1, "cpu/cpu.cfs_period_us", "100000\n")
+        assert cpus_disponibles(v1) == 1
+        _escribir(v1, "cpu/cpu.cfs_quota_us", "-1\n")
+        assert cpus_disponibles(v1) == afinidad
+
+
+def test_tareas_en_procesos_trabajadores():
+    """Resultados y HTTPException vuelven al proceso principal"""
+    pool = PoolProcesos(activo=True, trabajadores=2, inicializador=None)
+    try:
+        filas = pool.ejecutar("alimentation_ndjson", [(1, "JSON inválido")])
+        assert filas == [{"linea": 1, "error": "JSON inválido",
+                          "status": "error"}]
+
+        try:
+            pool.ejecutar("predict", PredictionRequest(
+                finca="NO_EXISTE", AnimalesM=1, Hectareas=1, Piscinas=1))
+            assert False, "Se esperaba HTTPException"
+        except HTTPException as e:
+            assert e.status_code == 400 and "NO_EXISTE" in e.detail
+
+        stats = pool.get_stats()
+        assert stats["enviadas"] == 2 and stats["completadas"] == 2
+        assert stats["en_curso"] == 0
+    finally:
+        pool.cerrar()
+
+
+def test_iniciar_avisa_cuando_los_trabajadores_estan_listos():
+    """El readiness del proceso principal sigue al arranque del pool"""
+    listo = threading.Event()
+    pool = PoolProcesos(activo=True, trabajadores=2, inicializador=None)
+    try:
+        pool.iniciar(al_listo=listo.set)
+        assert listo.wait(60)
+    finally:
+        pool.cerrar()
+
+    inactivo = PoolProcesos(activo=False)
+    inactivo.iniciar(al_listo=listo.clear)
+    assert listo.is_set() and inactivo._pool is None
+
+
+if __name__ == "__main__":
+    test_cpus_segun_cuota_de_cgroup()
+    test_tareas_en_procesos_trabajadores()
+    test_iniciar_avisa_cuando_los_trabajadores_estan_listos()
+    print("✅ Pool de procesos OK")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la cache de datos de referencia (TTL y revalidación)
+"""
+
+import json
+import os
+import tempfile
+
+import pytest
+
+from app import reference_data
+from app.reference_data import obtener_json_referencia
+
+
+def _escribir(ruta, filas, mtime):
+    with open(ruta, "w") as f:
+        json.dump({"rows": filas}, f)
+    os.utime(ruta, (mtime, mtime))
+
+
+def test_instantanea_compartida_y_revalidada():
+    """Misma instancia inmutable hasta que cambia la generación"""
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "pesos_alimento.json")
+        _escribir(ruta, [{"Pesos": 1.0, "BWCosechas": "7%"}], 1_000_000)
+        antes = dict(reference_data.get_stats())
+
+        primera = obtener_json_referencia(ruta)
+        segunda = obtener_json_referencia(ruta)
+        assert primera is segunda
+        with pytest.raises(TypeError):
+            primera["rows"].append({})
+        with pytest.raises(TypeError):
+            primera["rows"][0]["Pesos"] = 2.0
+
+        # Vencido el TTL sin cambios se conserva la misma instantánea
+        assert obtener_json_referencia(ruta, ttl_s=0) is primera
+
+        # Con el archivo modificado se recarga
+        _escribir(ruta, [{"Pesos": 2.0, "BWCosechas": "6%"}], 2_000_000)
+        nueva = obtener_json_referencia(ruta, ttl_s=0)
+        assert nueva["rows"][0]["Pesos"] == 2.0
+
+        stats = reference_data.get_stats()
+        assert stats["misses"] - antes["misses"] == 1
+        assert stats["hits"] - antes["hits"] == 1
+        assert stats["sin_cambios"] - antes["sin_cambios"] == 1
+        assert stats["recargas"] - antes["recargas"] == 1
+
+
+def test_recarga_vacia_conserva_la_copia_sin_repetir_la_descarga():
+    """Si la nueva generación llega vacía se respeta el TTL hasta la próxima"""
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "Terrain.json")
+        _escribir(ruta, [{"Piscinas": 1, "Hectareas": "8.3"}], 1_000_000)
+        primera = obtener_json_referencia(ruta)
+        antes = dict(reference_data.get_stats())
+
+        with open(ruta, "w") as f:
+            json.dump({}, f)
+        os.utime(ruta, (2_000_000, 2_000_000))
+        assert obtener_json_referencia(ruta, ttl_s=0) is primera
+        # Dentro del TTL no se vuelve a revalidar ni a descargar
+        assert obtener_json_referencia(ruta, ttl_s=60) is primera
+
+        stats = reference_data.get_stats()
+        assert stats["recargas_vacias"] - antes["recargas_vacias"] == 1
+        assert stats["recargas"] == antes["recargas"]
+        assert stats["revalidaciones"] - antes["revalidaciones"] == 1
+        assert stats["hits"] - antes["hits"] == 1
+
+
+if __name__ == "__main__":
+    test_instantanea_compartida_y_revalidada()
+    test_recarga_vacia_conserva_la_copia_sin_repetir_la_descarga()
+    print("✅ Datos de referencia OK")
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Pruebas de los índices de Terrain/Rendimiento y su reconstrucción por versión
+"""
+
+import json
+import os
+import tempfile
+
+from app.reference_data import derivar
+from app.reference_index import IndiceRendimiento, IndiceTerrain
+
+
+def test_indice_terrain_respeta_estructuras_de_fetch_data():
+    """Claves por finca, lista 'data' y diccionario 'fincas'"""
+    por_clave = IndiceTerrain({
+        "CAMANOVILLO": {"rows": [{"Piscinas": 1, "Hectareas": "8.3"},
+                                 {"Piscinas": 2, "Hectareas": "6.49"},
+                                 {"Piscinas": 2, "Hectareas": "9.9"}]},
+        "grovital": [{"Piscinas": "7", "Hectareas": "2.2"}]
+    })
+    camanovillo = por_clave.finca("camanovillo")
+    assert camanovillo.opciones == ["1", "2", "2"]
+    assert camanovillo.por_piscina["2"]["Hectareas"] == "6.49"
+    assert por_clave.finca("GROVITAL").por_piscina["7"]["Hectareas"] == "2.2"
+    assert por_clave.finca("SUFAAZA").filas == []
+
+    por_data = IndiceTerrain({"data": [
+        {"finca": "sufaaza", "Piscinas": 1, "Hectareas": "3.8"},
+        {"finca": "FERTIAGRO", "Piscinas": 1, "Hectareas": "4.0"}]})
+    assert por_data.finca("SUFAAZA").por_piscina["1"]["Hectareas"] == "3.8"
+
+    por_fincas = IndiceTerrain({"fincas": {"TIERRAVID": [
+        {"Piscinas": 3, "Hectareas": "2.9"}]}})
+    assert por_fincas.finca("tierravid").opciones == ["3"]
+
+
+def test_indice_rendimiento_por_finca_o_todas():
+    """Filas propias de la finca o, si no tiene, todas las filas"""
+    filas = [{"Gramos": 10, "Rendimiento": 30, "finca": "GROVITAL"},
+             {"Gramos": 11, "Rendimiento": 33}]
+    indice = IndiceRendimiento({"rows": filas})
+    assert indice.finca("grovital") == [filas[0]]
+    assert indice.finca("SUFAAZA") == filas
+
+
+def test_indice_se_reconstruye_solo_si_cambia_el_archivo():
+    """El índice se reutiliza mientras la instantánea no cambie"""
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "Terrain.json")
+        with open(ruta, "w") as f:
+            json.dump({"CAMANOVILLO": [{"Piscinas": 1}]}, f)
+        os.utime(ruta, (1_000_000, 1_000_000))
+
+        construcciones = []
+
+        def construir(data):
+            construcciones.append(1)
+            return IndiceTerrain(data)
+
+        primero = derivar(ruta, "indice", construir)
+        assert derivar(ruta, "indice", construir, ttl_s=0) is primero
+        assert len(construcciones) == 1
+
+        with open(ruta, "w") as f:
+            json.dump({"CAMANOVILLO": [{"Piscinas": 1}, {"Piscinas": 2}]}, f)
+        os.utime(ruta, (2_000_000, 2_000_000))
+
+        nuevo = derivar(ruta, "indice", construir, ttl_s=0)
+        assert nuevo.finca("CAMANOVILLO").opciones == ["1", "2"]
+        assert len(construcciones) == 2
+
+
+if __name__ == "__main__":
+    test_indice_terrain_respeta_estructuras_de_fetch_data()
+    test_indice_rendimiento_por_finca_o_todas()
+    test_indice_se_reconstruye_solo_si_cambia_el_archivo()
+    print("✅ Índices de referencia OK")
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la tabla de rendimiento con búsqueda por arreglos ordenados
+"""
+
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from app.gcs import gcs
+from app.rendimiento import CargadorRendimiento, TablaRendimiento
+
+
+def _busqueda_original(tabla, gramos):
+    """Búsqueda lineal que hacía `obtener_rendimiento` antes"""
+    return tabla.get(gramos, tabla[
+        min(tabla.keys(), key=lambda x: abs(x - gramos))])
+
+
+def test_tabla_coincide_con_busqueda_lineal():
+    """Escalar y vectorizado dan lo mismo que el recorrido de claves"""
+    # Claves desordenadas para comprobar el desempate por orden de inserción
+    tabla = {30: 94, 10: 85, 20: 90, 15: 88, 45: 100, 25: 92, 40: 98, 35: 96}
+    compilada = TablaRendimiento(tabla)
+    gramos = np.arange(-5, 60, 0.5)
+
+    esperado = [_busqueda_original(tabla, g) for g in gramos]
+
+    assert [compilada.obtener(g) for g in gramos] == esperado
+    assert compilada.obtener_vector(gramos).tolist() == esperado
+
+
+def test_empate_respeta_orden_del_diccionario():
+    """A igual distancia gana la clave que aparece primero"""
+    assert TablaRendimiento({20: 1, 10: 2}).obtener(15) == 1
+    assert TablaRendimiento({10: 2, 20: 1}).obtener(15) == 2
+
+
+def test_cargador_sirve_cache_y_refresca():
+    """Arranca con la copia en disco y la reemplaza al refrescar"""
+    with tempfile.TemporaryDirectory() as directorio:
+        origen = os.path.join(directorio, "Rendimiento.json")
+        cache = os.path.join(directorio, "cache.json")
+        with open(origen, "w") as f:
+            json.dump({"rows": [{"Gramos": 10, "Rendimiento": 70},
+                                {"Gramos": 20, "Rendimiento": 80}]}, f)
+
+        # Se sustituye la descarga remota por la lectura del archivo
+        with open(origen) as f:
+            data = json.load(f)
+        cargador = CargadorRendimiento(origen, archivo_cache=cache)
+        cargador._descargar = lambda: ("v1", data)
+
+        assert cargador.get_stats()["origen"] == "respaldo"
+        assert cargador.refrescar()
+        assert cargador._tabla.obtener(12) == 70
+        assert cargador.get_stats()["version"] == "v1"
+
+        # Un proceso nuevo arranca con la última copia buena
+        nuevo = CargadorRendimiento(origen, archivo_cache=cache)
+        assert nuevo.get_stats()["origen"] == "cache"
+        assert nuevo.get_stats()["version"] == "v1"
+        assert nuevo._tabla.obtener(19) == 80
+
+
+class _BlobFalso:
+    generation = 7
+    size = None
+
+    def download_as_bytes(self, timeout, if_generation_match):
+        assert if_generation_match == 7
+        return json.dumps({"rows": [{"Gramos": 10, "Rendimiento": 70}]}
+                          ).encode()
+
+
+class _BucketFalso:
+    def get_blob(self, nombre, timeout):
+        return _BlobFalso()
+
+
+def test_descarga_gcs_pasa_por_el_cliente_compartido():
+    """La tabla en gs:// usa los helpers de `gcs` y sus contadores"""
+    buckets_originales = gcs._buckets
+    gcs._buckets = {"azaktilsa_fincas": _BucketFalso()}
+    antes = gcs.get_stats()
+    try:
+        cargador = CargadorRendimiento(
+            "gs://azaktilsa_fincas/Data/Rendimiento.json", archivo_cache=None)
+        assert cargador.refrescar()
+        assert cargador.get_stats()["version"] == "gen-7"
+        # Misma generación: solo metadatos, sin descarga
+        assert not cargador.refrescar()
+        despues = gcs.get_stats()
+    finally:
+        gcs._buckets = buckets_originales
+
+    assert despues["metadatos"] - antes["metadatos"] == 2
+    assert despues["descargas"] - antes["descargas"] == 1
+
+
+def test_warmup_espera_la_tabla_remota():
+    """La precarga deja la tabla remota cargada o registra el fallo"""
+    from app import animal, warmup
+
+    assert "rendimiento_animal" in dict(warmup._tareas_warmup())
+    original = animal.cargador_rendimiento
+    animal.cargador_rendimiento = CargadorRendimiento(
+        "gs://x/Rendimiento.json", archivo_cache=None)
+    try:
+        def falla():
+            raise ConnectionError("sin red")
+
+        animal.cargador_rendimiento._descargar = falla
+        try:
+            warmup._precargar_rendimiento_animal()
+            assert False, "Se esperaba RuntimeError"
+        except RuntimeError as e:
+            assert "respaldo" in str(e)
+
+        animal.cargador_rendimiento._descargar = lambda: (
+            "v1", {"rows": [{"Gramos": 10, "Rendimiento": 70}]})
+        warmup._precargar_rendimiento_animal()
+        assert animal.cargador_rendimiento.tabla().obtener(10) == 70
+    finally:
+        animal.cargador_rendimiento.detener()
+        animal.cargador_rendimiento = original
+
+
+def test_hilo_no_repite_la_descarga_de_la_precarga():
+    """Con la tabla remota ya cargada el hilo espera al siguiente ciclo"""
+    cargador = CargadorRendimiento("gs://x/Rendimiento.json",
+                                   intervalo_s=60, archivo_cache=None)
+    llamadas = []
+    cargador._descargar = lambda: llamadas.append(1) or ("v1", {
+        "rows": [{"Gramos": 10, "Rendimiento": 70}]})
+    assert cargador.refrescar()
+    cargador.iniciar()
+    cargador._hilo.join(0.2)
+    cargador.detener()
+    assert len(llamadas) == 1
+
+
+if __name__ == "__main__":
+    test_tabla_coincide_con_busqueda_lineal()
+    test_empate_respeta_orden_del_diccionario()
+    test_cargador_sirve_cache_y_refresca()
+    test_descarga_gcs_pasa_por_el_cliente_compartido()
+    test_warmup_espera_la_tabla_remota()
+    test_hilo_no_repite_la_descarga_de_la_precarga()
+    print("✅ Tabla de rendimiento OK")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Pruebas de los solvers de la inversión de AnimalesM
+"""
+
+import types
+
+import numpy as np
+
+from app import animal
+from app.animal import (PredictionRequest, resolver_brent,
+                        resolver_relajacion, resolver_relajacion_lote)
+
+
+def _predecir_sintetico(X):
+    """Modelo analítico: Consumo creciente con AnimalesM, Gramos fijo en 20"""
+    consumo = X[:, 0] ** 1.1 * X[:, 1] * 5.0
+    gramos = np.full(len(X), 20.0)
+    return np.column_stack([consumo, gramos])
+
+
+def test_brent_converge_con_menos_llamadas_que_relajacion():
+    """Ambos solvers cumplen el margen; brent evalúa mucho menos el modelo"""
+    _, meta_relajacion = resolver_relajacion(
+        _predecir_sintetico, 12.0, 7.8, 5)
+    resultado, meta_brent = resolver_brent(
+        _predecir_sintetico, 12.0, 7.8, 5)
+
+    assert meta_relajacion["convergio"]
+    assert meta_brent["convergio"]
+    assert abs(resultado["AnimalesM"] - 12.0) <= 0.01
+    assert abs(meta_brent["residuo"]) <= 0.01
+    assert meta_brent["llamadas_modelo"] * 3 < meta_relajacion["llamadas_modelo"]
+
+
+def test_relajacion_lote_coincide_con_escalar():
+    """El lote sincronizado da lo mismo que resolver cada fila por separado"""
+    filas = [(12.0, 7.8, 5), (8.0, 3.2, 2), (20.0, 9.5, 11), (12.0, 7.8, 5)]
+    llamadas = []
+
+    def predecir(X):
+        llamadas.append(len(X))
+        return _predecir_sintetico(X)
+
+    salida, n_llamadas = resolver_relajacion_lote(
+        predecir, *[list(c) for c in zip(*filas)])
+
+    for fila, (resultado, metadatos) in zip(filas, salida):
+        esperado, meta_esperada = resolver_relajacion(
+            _predecir_sintetico, *fila)
+        assert resultado == esperado
+        assert metadatos == meta_esperada
+
+    # Una llamada por iteración para todo el lote, con filas que van saliendo
+    assert n_llamadas == max(m["iteraciones"] for _, m in salida)
+    assert llamadas[0] == len(filas)
+    assert llamadas == sorted(llamadas, reverse=True)
+
+
+def test_lote_usa_el_solver_por_defecto_en_filas_sin_solver():
+    """Una fila sin Solver toma PREDICT_SOLVER en lugar de fallar"""
+    inferencia = types.SimpleNamespace(predecir=_predecir_sintetico)
+    cargar_original = animal.cargar_inferencia
+    solver_original = animal.PREDICT_SOLVER
+    animal.cargar_inferencia = lambda finca: inferencia
+    animal.PREDICT_SOLVER = "brent"
+    try:
+        salida = animal.procesar_prediccion_animal_lote([
+            PredictionRequest(finca="CAMANOVILLO", AnimalesM=12,
+                              Hectareas=7.8, Piscinas=5),
+            PredictionRequest(finca="CAMANOVILLO", AnimalesM=8,
+                              Hectareas=3.2, Piscinas=2,
+                              Solver="relajacion"),
+            PredictionRequest(finca="CAMANOVILLO", AnimalesM=8,
+                              Hectareas=3.2, Piscinas=2, Solver="otro"),
+        ])
+    finally:
+        animal.cargar_inferencia = cargar_original
+        animal.PREDICT_SOLVER = solver_original
+
+    sin_solver, relajacion, invalida = salida["resultados"]
+    esperado, meta = resolver_brent(_predecir_sintetico, 12, 7.8, 5)
+    assert sin_solver == {**esperado, "metadatos": meta}
+    assert relajacion["metadatos"] == resolver_relajacion(
+        _predecir_sintetico, 8, 3.2, 2)[1]
+    assert invalida["status"] == "error"
+    assert salida["metadatos"]["fincas"]["CAMANOVILLO"]["filas"] == 2
+
+
+if __name__ == "__main__":
+    test_brent_converge_con_menos_llamadas_que_relajacion()
+    test_relajacion_lote_coincide_con_escalar()
+    test_lote_usa_el_solver_por_defecto_en_filas_sin_solver()
+    print("✅ Solvers de AnimalesM OK")
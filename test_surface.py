@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la superficie de respuesta precalculada (modo approx de /predict)
+"""
+
+import os
+import tempfile
+
+import numpy as np
+
+from app import animal
+from app.animal import resolver_relajacion, resolver_relajacion_lote
+from app.model_registry import model_registry
+from app.surface import Superficie
+
+
+def _predecir_sintetico(X):
+    """Modelo analítico: Consumo creciente con AnimalesM, Gramos fijo en 20"""
+    consumo = X[:, 0] ** 1.1 * X[:, 1] * 5.0
+    gramos = np.full(len(X), 20.0)
+    return np.column_stack([consumo, gramos])
+
+
+def _superficie():
+    return Superficie.construir(
+        _predecir_sintetico, resolver_relajacion_lote,
+        np.linspace(8, 16, 5), np.linspace(6, 9, 4), np.arange(4, 7),
+        finca="PRUEBA")
+
+
+def test_superficie_interpola_cerca_del_solver_exacto():
+    """Dentro de la malla la interpolación queda cerca del valor exacto"""
+    superficie = _superficie()
+
+    consulta = superficie.consultar(12.0, 7.8, 5)
+    exacto, _ = resolver_relajacion(_predecir_sintetico, 12.0, 7.8, 5)
+
+    for salida in ("Consumo", "LibrasXHA", "AnimalesM"):
+        error = abs(consulta["valores"][salida] - exacto[salida])
+        cota = consulta["error_estimado"][salida]
+        assert error <= max(4 * cota, 0.05 * abs(exacto[salida]))
+
+    # Fuera de la malla no hay respuesta aproximada
+    assert superficie.consultar(40.0, 7.8, 5) is None
+
+
+def test_superficie_se_guarda_y_carga():
+    """El .npz conserva ejes, valores y errores"""
+    superficie = _superficie()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "superficie_PRUEBA.npz")
+        superficie.guardar(ruta)
+        cargada = Superficie.cargar(ruta)
+
+    assert cargada.finca == "PRUEBA"
+    np.testing.assert_array_equal(cargada.valores, superficie.valores)
+    np.testing.assert_array_equal(cargada.errores, superficie.errores)
+    assert cargada.consultar(12.0, 7.8, 5) == superficie.consultar(12.0, 7.8, 5)
+
+
+def test_fallo_de_carga_no_queda_en_el_registro():
+    """Una superficie ausente se reintenta pasado SUPERFICIE_REINTENTO_S"""
+    ruta_original = animal.SUPERFICIE_PATH
+    reintento_original = animal.SUPERFICIE_REINTENTO_S
+    with tempfile.TemporaryDirectory() as directorio:
+        animal.SUPERFICIE_PATH = os.path.join(
+            directorio, "superficie_{finca}.npz")
+        animal.SUPERFICIE_REINTENTO_S = 60.0
+        try:
+            assert animal.cargar_superficie("PRUEBA") is None
+            assert not model_registry.contiene("superficie:PRUEBA")
+
+            # Dentro de la ventana no se vuelve a intentar
+            _superficie().guardar(os.path.join(
+                directorio, "superficie_PRUEBA.npz"))
+            assert animal.cargar_superficie("PRUEBA") is None
+
+            animal.SUPERFICIE_REINTENTO_S = 0.0
+            assert animal.cargar_superficie("PRUEBA").finca == "PRUEBA"
+        finally:
+            animal.SUPERFICIE_PATH = ruta_original
+            animal.SUPERFICIE_REINTENTO_S = reintento_original
+            animal._superficies_fallidas.pop("PRUEBA", None)
+            model_registry.invalidar("superficie:PRUEBA")
+
+
+if __name__ == "__main__":
+    test_superficie_interpola_cerca_del_solver_exacto()
+    test_superficie_se_guarda_y_carga()
+    test_fallo_de_carga_no_queda_en_el_registro()
+    print("✅ Superficie de respuesta OK")